@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+
+from . import limite_login
 
 User = get_user_model()
 
@@ -9,23 +12,42 @@ class EmailBackend(ModelBackend):
     Backend de autenticación personalizado que permite login con email
     """
     def authenticate(self, request, username=None, email=None, password=None, **kwargs):
+        cuenta = email or username
+        if not cuenta:
+            return None
+
+        # Antes de cualquier hash: IP o cuenta bloqueadas por demasiados fallos.
+        # PermissionDenied corta la cadena de backends (ModelBackend no vuelve a intentar).
+        restante = limite_login.bloqueo_restante(request, cuenta)
+        if restante:
+            if request is not None:
+                request.login_bloqueo = restante
+            raise PermissionDenied
+
         try:
             # Intenta autenticar con email si se proporciona
             if email:
-                user = User.objects.get(email__iexact=email)
-            elif username:
-                user = User.objects.get(username__iexact=username)
+                user = User.objects.get(email=User.objects.normalize_email(email))
             else:
-                return None
-            
-            # Verifica la contraseña
-            if user.check_password(password) and self.user_can_authenticate(user):
-                return user
+                user = User.objects.get(username__iexact=username)
         except User.DoesNotExist:
-            return None
-    
+            if not email:
+                # El admin envía el email como username: lo resuelve ModelBackend
+                return None
+            # Mismo costo que una contraseña incorrecta para no delatar qué correos existen
+            User().set_password(password)
+            raise PermissionDenied
+
+        # Verifica la contraseña
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        # Ya se hizo el hash: que ModelBackend no lo repita para la misma cuenta
+        raise PermissionDenied
+
     def get_user(self, user_id):
         try:
-            return User.objects.get(pk=user_id)
+            user = User.objects.get(pk=user_id)
         except User.DoesNotExist:
             return None
+        # Un usuario desactivado pierde la sesión en la siguiente petición
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,133 @@
+"""
+Límite de intentos de login por IP y por cuenta.
+
+Cada verificación de contraseña es un PBKDF2 completo; un script que golpee
+el formulario de login deja los workers sin CPU. Antes de cualquier hash,
+``EmailBackend.authenticate`` consulta aquí si la IP o la cuenta están
+bloqueadas: es una sola lectura a la caché (``get_many``) y el intento se
+rechaza sin tocar la base de datos.
+
+Los fallos se cuentan con una ventana deslizante aproximada: un contador por
+ventana fija de ``LOGIN_VENTANA`` segundos, y el total es el de la ventana
+actual más la parte proporcional de la anterior. Al pasar el límite
+(``LOGIN_MAX_FALLOS_IP`` o ``LOGIN_MAX_FALLOS_CUENTA``) se bloquea esa IP o
+cuenta durante ``LOGIN_BLOQUEO`` segundos. Un login correcto reinicia el
+contador de la cuenta (no el de la IP).
+
+Los contadores viven en la caché ``LOGIN_CACHE``; con varios workers debe
+ser compartida (Redis, archivo) o cada proceso lleva su propia cuenta.
+``metricas()`` devuelve los totales de fallos, bloqueos, rechazos y éxitos.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+EVENTOS = ('fallos', 'rechazados', 'bloqueos_ip', 'bloqueos_cuenta', 'exitos')
+
+
+def _cache():
+    return caches[getattr(settings, 'LOGIN_CACHE', 'default')]
+
+
+def _ajuste(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+def ip_de(request):
+    if request is None:
+        return None
+    # Detrás de un proxy, LOGIN_IP_HEADER indica la cabecera con la IP real (p. ej. HTTP_X_REAL_IP)
+    cabecera = _ajuste('LOGIN_IP_HEADER', None)
+    if cabecera and request.META.get(cabecera):
+        return request.META[cabecera].split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR')
+
+
+def _sujetos(request, cuenta):
+    """(tipo, identificador, límite) a controlar para este intento."""
+    sujetos = []
+    ip = ip_de(request)
+    if ip:
+        sujetos.append(('ip', ip, _ajuste('LOGIN_MAX_FALLOS_IP', 50)))
+    if cuenta:
+        # Hash para que la clave no dependa de lo que escriba el usuario
+        valor = hashlib.sha256(cuenta.strip().lower().encode()).hexdigest()[:32]
+        sujetos.append(('cuenta', valor, _ajuste('LOGIN_MAX_FALLOS_CUENTA', 5)))
+    return sujetos
+
+
+def _clave_bloqueo(tipo, valor):
+    return f'login:bloqueo:{tipo}:{valor}'
+
+
+def _clave_contador(tipo, valor, ventana):
+    return f'login:fallos:{tipo}:{valor}:{ventana}'
+
+
+def _contar(cache, clave, timeout):
+    cache.add(clave, 0, timeout)
+    try:
+        return cache.incr(clave)
+    except ValueError:
+        # La clave expiró entre add e incr
+        cache.set(clave, 1, timeout)
+        return 1
+
+
+def _metrica(evento):
+    _contar(_cache(), f'login:metricas:{evento}', None)
+
+
+def bloqueo_restante(request, cuenta):
+    """
+    Segundos que faltan para que la IP o la cuenta puedan volver a intentar,
+    0 si no están bloqueadas. No verifica contraseñas ni consulta la BD.
+    """
+    claves = [_clave_bloqueo(tipo, valor) for tipo, valor, _ in _sujetos(request, cuenta)]
+    if not claves:
+        return 0
+    hasta = max(_cache().get_many(claves).values(), default=0)
+    restante = int(hasta - time.time()) + 1 if hasta else 0
+    if restante > 0:
+        _metrica('rechazados')
+        return restante
+    return 0
+
+
+def registrar_fallo(request, cuenta):
+    """Cuenta un fallo para la IP y la cuenta; bloquea la que pase su límite."""
+    cache = _cache()
+    duracion = _ajuste('LOGIN_VENTANA', 300)
+    bloqueo = _ajuste('LOGIN_BLOQUEO', 900)
+    ahora = time.time()
+    ventana, transcurrido = divmod(ahora, duracion)
+    ventana = int(ventana)
+    peso_anterior = 1 - transcurrido / duracion
+
+    _metrica('fallos')
+    for tipo, valor, limite in _sujetos(request, cuenta):
+        actual = _contar(cache, _clave_contador(tipo, valor, ventana), duracion * 2)
+        anterior = cache.get(_clave_contador(tipo, valor, ventana - 1), 0)
+        if actual + anterior * peso_anterior >= limite:
+            cache.set(_clave_bloqueo(tipo, valor), ahora + bloqueo, bloqueo)
+            _metrica(f'bloqueos_{tipo}')
+
+
+def registrar_exito(request, cuenta):
+    """Login correcto: reinicia los contadores de la cuenta."""
+    _metrica('exitos')
+    if not cuenta:
+        return
+    duracion = _ajuste('LOGIN_VENTANA', 300)
+    ventana = int(time.time() // duracion)
+    claves = []
+    for tipo, valor, _ in _sujetos(None, cuenta):
+        claves += [_clave_contador(tipo, valor, ventana), _clave_contador(tipo, valor, ventana - 1)]
+    _cache().delete_many(claves)
+
+
+def metricas():
+    valores = _cache().get_many([f'login:metricas:{evento}' for evento in EVENTOS])
+    return {evento: valores.get(f'login:metricas:{evento}', 0) for evento in EVENTOS}
@@ -1,12 +1,17 @@
 """
 Comando para limpiar registros de usuarios inactivos que no completaron verificación.
-Uso: python manage.py cleanup_inactive_users --days=7
+Borra por lotes de claves primarias (cada lote en su propia transacción) y al
+final purga las sesiones expiradas, así puede correr cada noche desde cron.
+Uso: python manage.py cleanup_inactive_users --days=7 --noinput --batch-size=1000
+     python manage.py cleanup_inactive_users --dry-run
 """
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 from datetime import timedelta
 from accounts.models import User
+from accounts.sesion import purgar_expiradas
 
 class Command(BaseCommand):
     help = 'Elimina usuarios inactivos que no completaron verificación después de N días'
@@ -18,9 +23,39 @@ class Command(BaseCommand):
             default=7,
             help='Eliminar usuarios inactivos más antiguos de N días (default: 7)'
         )
+        parser.add_argument(
+            '--noinput', '--no-input',
+            action='store_false',
+            dest='interactive',
+            help='No pedir confirmación (para cron)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo mostrar cuántos usuarios se eliminarían'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Usuarios por lote de borrado (default: 1000)'
+        )
+
+    def _lotes(self, usuarios, tamano):
+        """Claves primarias en orden, de a `tamano`, sin cargar toda la tabla."""
+        ultimo = 0
+        while True:
+            ids = list(
+                usuarios.filter(pk__gt=ultimo).order_by('pk').values_list('pk', flat=True)[:tamano]
+            )
+            if not ids:
+                return
+            yield ids
+            ultimo = ids[-1]
 
     def handle(self, *args, **options):
         days = options['days']
+        tamano = max(1, options['batch_size'])
         fecha_limite = timezone.now() - timedelta(days=days)
 
         # Buscar usuarios inactivos creados hace más de N días
@@ -42,25 +77,44 @@ class Command(BaseCommand):
         # Mostrar información antes de eliminar
         self.stdout.write(
             self.style.WARNING(
-                f'\n⚠️  Se van a eliminar {cantidad} usuarios inactivos más antiguos de {days} días:'
+                f'\n⚠️  Se {"eliminarían" if options["dry_run"] else "van a eliminar"} '
+                f'{cantidad} usuarios inactivos más antiguos de {days} días'
             )
         )
 
-        for usuario in usuarios_antiguos:
-            self.stdout.write(f'   - {usuario.email} (creado: {usuario.date_joined})')
+        # El detalle por usuario solo con -v 2
+        if options['verbosity'] >= 2:
+            for ids in self._lotes(usuarios_antiguos, tamano):
+                for email, creado in User.objects.filter(pk__in=ids).order_by('pk').values_list('email', 'date_joined'):
+                    self.stdout.write(f'   - {email} (creado: {creado})')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS('\n✅ Simulación: no se eliminó nada'))
+            return
 
         # Confirmar antes de eliminar
-        confirmacion = input('\n¿Deseas continuar? (s/n): ')
+        if options['interactive']:
+            confirmacion = input('\n¿Deseas continuar? (s/n): ')
 
-        if confirmacion.lower() != 's':
-            self.stdout.write(self.style.ERROR('\n❌ Operación cancelada'))
-            return
+            if confirmacion.lower() != 's':
+                self.stdout.write(self.style.ERROR('\n❌ Operación cancelada'))
+                return
+
+        # Eliminar por lotes: cada lote bloquea y borra como mucho `tamano` filas
+        eliminados = 0
+        for ids in self._lotes(usuarios_antiguos, tamano):
+            with transaction.atomic():
+                # Se repite el filtro por si alguien activó la cuenta mientras tanto
+                eliminados += usuarios_antiguos.filter(pk__in=ids).delete()[1].get(User._meta.label, 0)
+            self.stdout.write(f'   {eliminados}/{cantidad} eliminados')
 
-        # Eliminar
-        usuarios_antiguos.delete()
+        # La tabla de sesiones no indexa el usuario: se purgan las expiradas por
+        # expire_date; las vigentes de un usuario borrado ya no autentican.
+        sesiones = purgar_expiradas(tamano)
 
         self.stdout.write(
             self.style.SUCCESS(
-                f'\n✅ {cantidad} usuarios inactivos eliminados correctamente'
+                f'\n✅ {eliminados} usuarios inactivos eliminados correctamente'
+                + (f' ({sesiones} sesiones expiradas purgadas)' if sesiones is not None else '')
             )
         )
@@ -0,0 +1,31 @@
+"""
+Barrido de sesiones expiradas. La tabla django_session solo crece si nadie
+la limpia; este comando la recorre por lotes usando el índice de expire_date
+para no bloquearla en una sola transacción grande.
+Programarlo una vez al día, p. ej. en cron:
+    15 3 * * *  cd /app/backend && python manage.py purgar_sesiones
+Uso: python manage.py purgar_sesiones --batch-size=1000
+"""
+
+from django.core.management.base import BaseCommand
+
+from accounts.sesion import purgar_expiradas
+
+
+class Command(BaseCommand):
+    help = 'Borra por lotes las sesiones expiradas de la base de datos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Sesiones por lote de borrado (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        borradas = purgar_expiradas(max(1, options['batch_size']))
+        if borradas is None:
+            self.stdout.write(self.style.WARNING('⚠️  El motor de sesiones no usa la base de datos; no hay nada que purgar'))
+            return
+        self.stdout.write(self.style.SUCCESS(f'✅ {borradas} sesiones expiradas eliminadas'))
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:01
+
+import accounts.models
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import Lower, Trim
+
+
+def normalizar_emails(apps, schema_editor):
+    """
+    Pasa a minúsculas y sin espacios los emails existentes. Si dos cuentas
+    quedarían con el mismo email la migración se detiene para resolverlo a
+    mano (no se borra ni se fusiona ninguna cuenta).
+    """
+    User = apps.get_model('accounts', 'User')
+    duplicados = list(
+        User.objects
+        .values(normal=Lower(Trim('email')))
+        .annotate(n=Count('id'))
+        .filter(n__gt=1)
+        .values_list('normal', flat=True)
+    )
+    if duplicados:
+        raise RuntimeError(
+            "Emails repetidos al ignorar mayúsculas, corrígelos antes de migrar: "
+            + ", ".join(sorted(duplicados))
+        )
+    User.objects.filter(~Q(email=Lower(Trim('email')))).update(email=Lower(Trim('email')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_rol'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', accounts.models.UserManager()),
+            ],
+        ),
+        migrations.RunPython(normalizar_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='user_email_lower_uniq'),
+        ),
+    ]
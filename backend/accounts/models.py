@@ -1,5 +1,24 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
 from django.db import models
+from django.contrib.auth.signals import user_logged_in, user_login_failed
+from django.db.models.signals import post_save, post_delete
+from django.db.models.functions import Lower
+from django.dispatch import receiver
+
+
+class UserManager(BaseUserManager):
+    """
+    El email se guarda normalizado (sin espacios y en minúsculas), así las
+    búsquedas son igualdades que usan el índice único de ``email``.
+    """
+
+    @classmethod
+    def normalize_email(cls, email):
+        return (email or '').strip().lower()
+
+    def get_by_natural_key(self, username):
+        return self.get(**{self.model.USERNAME_FIELD: self.normalize_email(username)})
+
 
 class User(AbstractUser):
     email = models.EmailField(unique=True)
@@ -14,5 +33,58 @@ class User(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
+    objects = UserManager()
+
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            # Unicidad sin distinguir mayúsculas aunque se escriba sin pasar por save()
+            models.UniqueConstraint(Lower('email'), name='user_email_lower_uniq'),
+        ]
+
     def __str__(self):
         return f"{self.username} ({self.rol})"
+
+    def save(self, *args, **kwargs):
+        self.email = User.objects.normalize_email(self.email)
+        super().save(*args, **kwargs)
+
+
+# Las copias del usuario guardadas en sesión (accounts.sesion) dejan de valer
+# en cuanto cambia la fila. Se usan señales y no save()/delete() para cubrir
+# también los borrados por queryset (p. ej. cleanup_inactive_users).
+@receiver(post_save, sender=User)
+def _invalidar_sesiones_al_guardar(sender, instance, update_fields=None, **kwargs):
+    from .sesion import CAMPOS_INVALIDAN, invalidar
+    if update_fields is None or CAMPOS_INVALIDAN & set(update_fields):
+        invalidar(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def _invalidar_sesiones_al_borrar(sender, instance, **kwargs):
+    from .sesion import invalidar
+    invalidar(instance.pk)
+
+
+@receiver(user_logged_in)
+def _copiar_usuario_al_iniciar_sesion(sender, request, user, **kwargs):
+    # El login ya escribe la sesión: la copia viaja en ese mismo guardado
+    from .sesion import guardar_copia
+    if request is not None and hasattr(request, 'session'):
+        guardar_copia(request.session, user)
+
+
+# Contadores del límite de intentos (accounts.limite_login). user_login_failed
+# cubre cualquier entrada que pase por authenticate(): formulario, admin y JWT.
+@receiver(user_login_failed)
+def _contar_login_fallido(sender, credentials, request=None, **kwargs):
+    from . import limite_login
+    if getattr(request, 'login_bloqueo', 0):
+        # Rechazado por el bloqueo: no suma como un intento nuevo
+        return
+    limite_login.registrar_fallo(request, credentials.get('email') or credentials.get('username'))
+
+
+@receiver(user_logged_in)
+def _reiniciar_limite_login(sender, request, user, **kwargs):
+    from . import limite_login
+    limite_login.registrar_exito(request, user.email)
@@ -1,7 +1,12 @@
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed, Throttled
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth import authenticate
 
+from . import limite_login
+
 User = get_user_model()
 
 
@@ -32,7 +37,7 @@ class LoginSerializer(serializers.Serializer):
 
         # Buscar usuario por email
         try:
-            user = User.objects.get(email=email)
+            user = User.objects.get(email=User.objects.normalize_email(email))
             # Validar la contraseña directamente
             if not user.check_password(password):
                 raise serializers.ValidationError("Credenciales inválidas.")
@@ -43,3 +48,49 @@ class LoginSerializer(serializers.Serializer):
             return data
         except User.DoesNotExist:
             raise serializers.ValidationError("Credenciales inválidas.")
+
+
+# ==================== JWT (rutas /api/) ====================
+
+def _agregar_claims(token, user):
+    """Claims que usan las rutas /api/ para autorizar sin consultar la BD."""
+    token['rol'] = user.rol
+    token['email'] = user.email
+    token['username'] = user.username
+    return token
+
+
+class TokenConRolSerializer(TokenObtainPairSerializer):
+    """Par de tokens con el rol del usuario embebido."""
+
+    @classmethod
+    def get_token(cls, user):
+        return _agregar_claims(super().get_token(user), user)
+
+    def validate(self, attrs):
+        request = self.context.get('request')
+        try:
+            datos = super().validate(attrs)
+        except AuthenticationFailed:
+            # Bloqueado por accounts.limite_login: 429 con Retry-After en vez de 401
+            if getattr(request, 'login_bloqueo', 0):
+                raise Throttled(wait=request.login_bloqueo)
+            raise
+        limite_login.registrar_exito(request, self.user.email)
+        return datos
+
+
+class TokenRefreshConRolSerializer(TokenRefreshSerializer):
+    """
+    Renueva el access token con el rol actual del usuario (no el copiado del
+    refresh), así un cambio de rol o una desactivación aplica al renovar.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(
+            pk=refresh.payload.get(api_settings.USER_ID_CLAIM), is_active=True
+        ).first()
+        if user is None:
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        return {'access': str(_agregar_claims(refresh.access_token, user))}
@@ -0,0 +1,138 @@
+"""
+Usuario autenticado cacheado en la sesión.
+
+Django carga el usuario de la base de datos en cada petición autenticada
+(``backend.get_user``). Aquí se guarda en la sesión una copia de los campos
+que usan las vistas (id, email, username, rol, is_active y los flags de
+staff) junto con la versión del usuario al momento de copiarla. La versión
+vive en la caché y se reemplaza cada vez que el usuario se guarda o se
+borra; si la versión de la sesión no coincide con la de la caché (o la
+caché no la tiene) se vuelve al camino normal de Django contra la base de
+datos, que además revalida el hash de sesión y rechaza usuarios inactivos.
+
+La versión es un token aleatorio y no un contador: si la clave se pierde de
+la caché, la nueva versión nunca coincide con una copia vieja.
+
+Para que la invalidación llegue a todos los procesos, la caché
+``AUTH_USER_CACHE`` debe ser compartida (Redis, archivo). Con ``locmem`` cada
+proceso vería solo sus propios cambios y otro worker seguiría aceptando una
+copia vieja; por eso con una ``LocMemCache`` no se guardan copias y cada
+petición usa el camino normal de Django.
+"""
+import uuid
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib import auth
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+
+CLAVE_SESION = '_auth_user_snapshot'
+CAMPOS = ('id', 'email', 'username', 'rol', 'is_active', 'is_staff', 'is_superuser')
+# Cambios en estos campos invalidan las copias en sesión (password: cambia el hash de sesión)
+CAMPOS_INVALIDAN = set(CAMPOS) | {'password'}
+
+
+def _cache():
+    return caches[getattr(settings, 'AUTH_USER_CACHE', 'default')]
+
+
+def compartida():
+    """True si la caché de versiones es visible para todos los procesos."""
+    return not isinstance(_cache(), LocMemCache)
+
+
+def _clave_version(user_id):
+    return f'auth:usuario:{user_id}:version'
+
+
+def version_actual(user_id):
+    """Versión vigente del usuario o None si la caché no la tiene."""
+    return _cache().get(_clave_version(user_id))
+
+
+def asegurar_version(user_id):
+    """Devuelve la versión vigente, creándola si no existe."""
+    cache = _cache()
+    clave = _clave_version(user_id)
+    timeout = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 300)
+    cache.add(clave, uuid.uuid4().hex, timeout)
+    return cache.get(clave)
+
+
+def invalidar(user_id):
+    """Nueva versión para el usuario: toda copia en sesión deja de ser válida."""
+    _cache().delete(_clave_version(user_id))
+
+
+def _desde_copia(copia):
+    from .models import User
+    # Solo los campos copiados quedan cargados; cualquier otro se lee de la BD al accederlo.
+    # from_db espera los valores en el orden de los campos del modelo.
+    campos = [f.attname for f in User._meta.concrete_fields if f.attname in CAMPOS]
+    user = User.from_db('default', campos, [copia[campo] for campo in campos])
+    user.backend = copia['backend']
+    return user
+
+
+def guardar_copia(session, user):
+    """Guarda en la sesión la copia del usuario con su versión vigente."""
+    if not compartida():
+        return
+    copia = {campo: getattr(user, campo) for campo in CAMPOS}
+    copia['backend'] = session.get(auth.BACKEND_SESSION_KEY)
+    copia['version'] = asegurar_version(user.pk)
+    session[CLAVE_SESION] = copia
+
+
+def obtener_usuario(request):
+    """
+    Usuario de la petición: la copia de la sesión si su versión sigue vigente,
+    si no el de ``django.contrib.auth.get_user`` (consulta a la BD).
+    """
+    session = request.session
+    user_id = session.get(auth.SESSION_KEY)
+    if user_id is None or not compartida():
+        session.pop(CLAVE_SESION, None)
+        return auth.get_user(request)
+
+    copia = session.get(CLAVE_SESION)
+    if (
+        copia
+        and str(copia['id']) == str(user_id)
+        and copia['backend'] == session.get(auth.BACKEND_SESSION_KEY)
+        and copia['version'] is not None
+        and copia['version'] == version_actual(user_id)
+    ):
+        return _desde_copia(copia)
+
+    # Fallback explícito: carga, valida hash de sesión y is_active desde la BD
+    user = auth.get_user(request)
+    if user.is_authenticated and user.is_active:
+        guardar_copia(session, user)
+    else:
+        session.pop(CLAVE_SESION, None)
+    return user
+
+
+# ===========================
+# LIMPIEZA DE SESIONES
+# ===========================
+def purgar_expiradas(tamano=1000):
+    """
+    Borra las sesiones expiradas de la tabla por lotes de `tamano` claves
+    (usa el índice de expire_date) y devuelve cuántas borró, o None si el
+    motor de sesiones no guarda en la BD. Con ``cached_db`` las copias en la
+    caché expiran solas con la misma fecha.
+    """
+    store = import_module(settings.SESSION_ENGINE).SessionStore
+    if not hasattr(store, 'get_model_class'):
+        return None
+    expiradas = store.get_model_class().objects.filter(expire_date__lt=timezone.now())
+    borradas = 0
+    while True:
+        claves = list(expiradas.values_list('pk', flat=True)[:tamano])
+        if not claves:
+            return borradas
+        borradas += expiradas.filter(pk__in=claves).delete()[0]
@@ -31,7 +31,7 @@ urlpatterns = [
     path('home/', home_redirect, name='home'), 
     
     # ==================== RUTAS TEMPLATES (Gestión de Usuarios - Admin) ====================
-    # Vistas basadas en funciones protegidas con @user_passes_test(es_admin).
+    # Vistas basadas en funciones protegidas con @requiere('gestion') (ver mytienda/accesos.py).
     path("usuarios/", usuarios_lista, name="usuarios_lista"),
     path("usuarios/crear/", usuario_crear, name="usuario_crear"),
     path("usuarios/editar/<int:usuario_id>/", usuario_editar, name="usuario_editar"),
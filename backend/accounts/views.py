@@ -1,4 +1,9 @@
+from datetime import timedelta
+from decimal import Decimal
+
 from django.contrib.auth import get_user_model, authenticate, login, logout
+from django.db.models import Count, DecimalField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.shortcuts import render, redirect, get_object_or_404 
 from django.contrib import messages
 from django.views.decorators.http import require_http_methods
@@ -9,30 +14,22 @@ from rest_framework.response import Response
 from rest_framework import status, generics, permissions
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.views import APIView
-from django.contrib.auth.decorators import user_passes_test, login_required # Se añade login_required
+from django.contrib.auth.decorators import login_required
 from django.http import HttpResponseForbidden # Se añade HttpResponseForbidden
 from .serializers import RegisterSerializer, LoginSerializer
 from django.contrib.auth.tokens import default_token_generator
 from accounts.models import User
 # Importación del formulario (asumiendo que está en el mismo paquete de la app)
 from .forms import UsuarioForm 
+from mytienda.accesos import requiere
+from mytienda.fechas import hoy, inicio_dia
+from mytienda.paginacion import paginar, urls_paginacion
+from ventas.models import Venta
 
 # ✅ Obtiene el modelo de usuario configurado en AUTH_USER_MODEL
 User = get_user_model()
 
 
-# ==================== Funciones de soporte (Decoradores) ====================
-
-def es_admin(user):
-    """Verifica si el usuario tiene el rol de ADMIN."""
-    # Asume que el modelo de usuario tiene un campo 'rol'
-    return user.is_authenticated and user.rol == "ADMIN"
-
-def es_cajero(user):
-    """Verifica si el usuario tiene el rol de CAJERO."""
-    return user.is_authenticated and user.rol == "CAJERO"
-
-
 # ==================== VISTAS BASADAS EN TEMPLATES (Auth & Base) ====================
 
 class RegisterTemplateView(View):
@@ -43,7 +40,7 @@ class RegisterTemplateView(View):
         return render(request, 'accounts/register.html')
     
     def post(self, request):
-        email = request.POST.get('email', '').strip().lower()
+        email = User.objects.normalize_email(request.POST.get('email', ''))
         username = request.POST.get('username', '').strip()
         password = request.POST.get('password', '').strip()
         password_confirm = request.POST.get('password_confirm', '').strip()
@@ -68,7 +65,7 @@ class RegisterTemplateView(View):
             })
         
         # Verificar si el usuario ya existe (ACTIVO)
-        usuario_activo = User.objects.filter(email__iexact=email, is_active=True).exists()
+        usuario_activo = User.objects.filter(email=email, is_active=True).exists()
         if usuario_activo:
             messages.error(request, 'El correo ya está registrado y está activo')
             return render(request, 'accounts/register.html', {
@@ -77,7 +74,7 @@ class RegisterTemplateView(View):
         
         # Si existe (activo o inactivo), mostrar error y re-renderizar el formulario
         # (No permitimos re-registro automático sobre un email ya registrado)
-        usuario_existente = User.objects.filter(email__iexact=email).exists()
+        usuario_existente = User.objects.filter(email=email).exists()
         if usuario_existente:
             messages.error(request, 'El correo ya está registrado (si olvidaste la contraseña usa recuperar).')
             return render(request, 'accounts/register.html', {
@@ -136,7 +133,7 @@ class LoginTemplateView(View):
         return render(request, 'accounts/login.html')
     
     def post(self, request):
-        email = request.POST.get('email', '').strip().lower()
+        email = User.objects.normalize_email(request.POST.get('email', ''))
         password = request.POST.get('password', '').strip()
         
         if not email or not password:
@@ -154,6 +151,13 @@ class LoginTemplateView(View):
                 return redirect('/inventario/') # Redirige a la URL del dashboard/inventario
             else:
                 return redirect('/ventas/crear/') # Redirige a la URL de creación de ventas para Cajeros
+        elif getattr(request, 'login_bloqueo', 0):
+            # Bloqueado por accounts.limite_login: no se verificó ninguna contraseña
+            minutos = -(-request.login_bloqueo // 60)
+            messages.error(request, f'Demasiados intentos fallidos. Intenta de nuevo en {minutos} minuto(s).')
+            response = render(request, 'accounts/login.html', {'email': email}, status=429)
+            response['Retry-After'] = str(request.login_bloqueo)
+            return response
         else:
             messages.error(request, 'Correo o contraseña incorrectos')
             return render(request, 'accounts/login.html', {
@@ -181,13 +185,50 @@ class HomeTemplateView(View):
 
 # ==================== VISTAS BASADAS EN TEMPLATES (Gestión de Usuarios - Admin) ====================
 
-@user_passes_test(es_admin, login_url='login') 
+@requiere('gestion')
 def usuarios_lista(request):
-    """Lista todos los usuarios (Solo Admin)."""
-    usuarios = User.objects.all()
-    return render(request, "accounts/usuarios_lista.html", {"usuarios": usuarios})
+    """
+    Lista de usuarios (Solo Admin), paginada por id y filtrable por texto
+    (email/usuario) y rol, con la última venta y las ventas de los últimos
+    30 días de cada uno.
+    """
+    # Subconsultas correlacionadas: se calculan solo para las filas de la página
+    # y usan el índice (usuario, fecha) de Venta
+    ventas = Venta.objects.filter(usuario=OuterRef('pk'))
+    recientes = ventas.filter(fecha__gte=inicio_dia(hoy() - timedelta(days=29))).values('usuario')
+    usuarios = User.objects.only(
+        'id', 'username', 'email', 'first_name', 'last_name', 'rol', 'is_active'
+    ).annotate(
+        ultima_venta=Subquery(ventas.order_by('-fecha').values('fecha')[:1]),
+        ventas_30d=Coalesce(Subquery(recientes.annotate(n=Count('id')).values('n')), 0),
+        total_30d=Coalesce(
+            Subquery(recientes.annotate(t=Sum('total_final')).values('t')),
+            Value(Decimal('0')),
+            output_field=DecimalField(max_digits=15, decimal_places=2),
+        ),
+    )
+
+    q = request.GET.get('q', '').strip()
+    if q:
+        usuarios = usuarios.filter(Q(email__icontains=q) | Q(username__icontains=q))
+    rol = request.GET.get('rol', '')
+    if rol in dict(User.ROLES):
+        usuarios = usuarios.filter(rol=rol)
+
+    usuarios, siguiente = paginar(usuarios, request.GET.get('cursor'), campo='id')
+
+    siguiente_url, primera_url = urls_paginacion(request, siguiente)
+
+    return render(request, "accounts/usuarios_lista.html", {
+        "usuarios": usuarios,
+        "roles": User.ROLES,
+        "q": q,
+        "rol": rol,
+        "siguiente_url": siguiente_url,
+        "primera_url": primera_url,
+    })
 
-@user_passes_test(es_admin, login_url='login') 
+@requiere('gestion')
 def usuario_crear(request):
     """Permite crear un nuevo usuario (Solo Admin)."""
     if request.method == "POST":
@@ -206,7 +247,7 @@ def usuario_crear(request):
         form = UsuarioForm()
     return render(request, "accounts/usuario_form.html", {"form": form})
 
-@user_passes_test(es_admin, login_url='login') 
+@requiere('gestion')
 def usuario_editar(request, usuario_id):
     """Permite editar un usuario existente (Solo Admin)."""
     user = get_object_or_404(User, id=usuario_id)
@@ -228,7 +269,7 @@ def usuario_editar(request, usuario_id):
         form = UsuarioForm(instance=user) 
     return render(request, "accounts/usuario_form.html", {"form": form, "user_to_edit": user})
 
-@user_passes_test(es_admin, login_url='login') 
+@requiere('gestion')
 def usuario_eliminar(request, usuario_id):
     """Elimina un usuario (Solo Admin)."""
     user = get_object_or_404(User, id=usuario_id)
@@ -0,0 +1,73 @@
+"""
+Benchmark del registro de compras con facturas grandes de proveedor.
+Cada compra se registra dentro de una transacción que se revierte al final,
+así que el comando no deja datos en la base.
+Uso: python manage.py bench_compras --lineas=500 --repeticiones=5
+"""
+
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from compras.models import Compra
+from inventario.models import Producto, Proveedor
+
+
+class Command(BaseCommand):
+    help = 'Mide el tiempo y las consultas de Compra.registrar con facturas de N líneas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lineas', type=int, default=500, help='Líneas por factura (default: 500)')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Facturas a registrar (default: 5)')
+        parser.add_argument(
+            '--nuevos',
+            type=float,
+            default=0.2,
+            help='Fracción de líneas con códigos de producto inexistentes (default: 0.2)'
+        )
+
+    def handle(self, *args, **options):
+        lineas_n = options['lineas']
+        nuevos_n = int(lineas_n * options['nuevos'])
+        existentes_n = lineas_n - nuevos_n
+        base = 900_000_000
+
+        tiempos, consultas = [], []
+        with transaction.atomic():
+            proveedor = Proveedor.objects.create(
+                nombre='Bench', telefono='0', direccion='-', correo='bench-compras@example.com'
+            )
+            Producto.objects.bulk_create([
+                Producto(codigo=base + i, nombre=f'Bench {i}', stock=0,
+                         precio_compra=Decimal('1'), precio_venta=Decimal('2'))
+                for i in range(existentes_n)
+            ])
+            existentes = list(Producto.objects.filter(codigo__gte=base, codigo__lt=base + existentes_n))
+
+            for rep in range(options['repeticiones']):
+                lineas = [
+                    {'producto_id': p.id, 'cantidad': 3, 'precio': Decimal('1.50')}
+                    for p in existentes
+                ] + [
+                    {'codigo': base + 100_000 * (rep + 1) + i, 'nombre': f'Nuevo {i}',
+                     'cantidad': 2, 'precio': Decimal('4')}
+                    for i in range(nuevos_n)
+                ]
+                with CaptureQueriesContext(connection) as ctx:
+                    inicio = time.perf_counter()
+                    Compra.registrar(proveedor.id, lineas)
+                    tiempos.append(time.perf_counter() - inicio)
+                consultas.append(len(ctx))
+
+            transaction.set_rollback(True)
+
+        tiempos.sort()
+        self.stdout.write(f'Facturas de {lineas_n} líneas ({nuevos_n} productos nuevos), '
+                          f'{len(tiempos)} repeticiones en {connection.vendor}')
+        self.stdout.write(f'  mediana: {tiempos[len(tiempos) // 2] * 1000:.1f} ms   '
+                          f'mínimo: {tiempos[0] * 1000:.1f} ms   máximo: {tiempos[-1] * 1000:.1f} ms')
+        self.stdout.write(f'  consultas por factura: {max(consultas)}')
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark terminado'))
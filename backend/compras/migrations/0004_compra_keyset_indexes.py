@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compras', '0003_detallecompra_producto_codigo_and_more'),
+        ('inventario', '0011_fecha_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='compra',
+            index=models.Index(fields=['fecha', 'id'], name='compra_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='compra',
+            index=models.Index(fields=['proveedor', 'fecha', 'id'], name='compra_proveedor_fecha_idx'),
+        ),
+    ]
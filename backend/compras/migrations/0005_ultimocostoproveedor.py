@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill(apps, schema_editor):
+    """Toma el último costo por proveedor y producto del histórico de compras."""
+    DetalleCompra = apps.get_model('compras', 'DetalleCompra')
+    UltimoCostoProveedor = apps.get_model('compras', 'UltimoCostoProveedor')
+
+    ultimos = {}
+    detalles = (
+        DetalleCompra.objects
+        .filter(producto__isnull=False)
+        .select_related('compra')
+        .order_by('compra__fecha', 'compra_id', 'pk')
+        .iterator(chunk_size=2000)
+    )
+    for d in detalles:
+        ultimos[(d.compra.proveedor_id, d.producto_id)] = (d.precio_unitario, d.compra)
+
+    UltimoCostoProveedor.objects.bulk_create(
+        [
+            UltimoCostoProveedor(proveedor_id=proveedor_id, producto_id=producto_id,
+                                 costo=costo, fecha=compra.fecha, compra=compra)
+            for (proveedor_id, producto_id), (costo, compra) in ultimos.items()
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compras', '0004_compra_keyset_indexes'),
+        ('inventario', '0011_fecha_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UltimoCostoProveedor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('costo', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('fecha', models.DateTimeField()),
+                ('compra', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='compras.compra')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ultimos_costos', to='inventario.producto')),
+                ('proveedor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ultimos_costos', to='inventario.proveedor')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('proveedor', 'producto'), name='uniq_ultimo_costo_proveedor_producto')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
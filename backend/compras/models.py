@@ -1,4 +1,6 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
 from django.utils import timezone
 from django.db.models import SET_NULL
 from inventario.models import Producto, Proveedor, Inventario
@@ -8,9 +10,105 @@ class Compra(models.Model):
     fecha = models.DateTimeField(default=timezone.now)
     total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
 
+    class Meta:
+        indexes = [
+            # Listado paginado por clave (fecha, id), global y por proveedor
+            models.Index(fields=['fecha', 'id'], name='compra_fecha_id_idx'),
+            models.Index(fields=['proveedor', 'fecha', 'id'], name='compra_proveedor_fecha_idx'),
+        ]
+
     def __str__(self):
         return f"Compra #{self.id} - {self.proveedor.nombre}"
 
+    @classmethod
+    def registrar(cls, proveedor_id, lineas):
+        """
+        Registra una compra completa en una sola transacción.
+
+        `lineas` es una lista de dicts con `cantidad`, `precio` y, para
+        identificar el producto, `producto_id` o `codigo` (+ `nombre` opcional).
+        Los productos se resuelven con una consulta por ids y otra por códigos;
+        los códigos desconocidos se crean en bloque. Detalles y movimientos se
+        insertan con bulk_create y el stock se suma con un único UPDATE.
+        Las líneas cuyo producto no se puede resolver se ignoran.
+        Devuelve la compra creada, o None si no quedó ninguna línea válida.
+        """
+        with transaction.atomic():
+            ids = {l['producto_id'] for l in lineas if l.get('producto_id')}
+            por_id = Producto.objects.in_bulk(ids) if ids else {}
+
+            codigos = {l['codigo'] for l in lineas if not por_id.get(l.get('producto_id')) and l.get('codigo')}
+            por_codigo = Producto.objects.in_bulk(codigos, field_name='codigo') if codigos else {}
+
+            # Crear productos mínimos para los códigos que no existen
+            nuevos = {}
+            for l in lineas:
+                codigo = l.get('codigo')
+                if codigo in codigos and codigo not in por_codigo and codigo not in nuevos:
+                    nuevos[codigo] = Producto(
+                        codigo=codigo,
+                        nombre=l.get('nombre') or f"Producto {codigo}",
+                        precio_compra=l['precio'],
+                        precio_venta=l['precio'],
+                        stock=0,
+                        activo=True,
+                    )
+            if nuevos:
+                # ignore_conflicts: otra compra pudo crear el mismo código en paralelo
+                Producto.objects.bulk_create(nuevos.values(), ignore_conflicts=True)
+                por_codigo.update(Producto.objects.in_bulk(list(nuevos), field_name='codigo'))
+
+            items = []
+            for l in lineas:
+                producto = por_id.get(l.get('producto_id')) or por_codigo.get(l.get('codigo'))
+                if producto is not None:
+                    items.append((producto, l['cantidad'], l['precio']))
+            if not items:
+                return None
+
+            compra = cls.objects.create(
+                proveedor_id=proveedor_id,
+                total=sum((cantidad * precio for _, cantidad, precio in items), Decimal("0")),
+            )
+
+            DetalleCompra.objects.bulk_create([
+                DetalleCompra(
+                    compra=compra,
+                    producto=producto,
+                    producto_nombre=producto.nombre,
+                    producto_codigo=producto.codigo,
+                    cantidad=cantidad,
+                    precio_unitario=precio,
+                )
+                for producto, cantidad, precio in items
+            ])
+
+            # Un movimiento ENTRADA por producto (la referencia es única por compra y producto)
+            por_producto = {}
+            for producto, cantidad, precio in items:
+                acumulado = por_producto.setdefault(producto.id, [0, Decimal("0")])
+                acumulado[0] += cantidad
+                acumulado[1] += cantidad * precio
+            Inventario.objects.bulk_create([
+                Inventario(
+                    producto_id=producto_id,
+                    tipo="ENTRADA",
+                    cantidad=cantidad,
+                    numero_referencia=f"COMPRA-{compra.id}-{producto_id}",
+                    fecha=compra.fecha,
+                    costo_unitario=(valor / cantidad).quantize(Decimal("0.0001")),
+                )
+                for producto_id, (cantidad, valor) in por_producto.items()
+            ])
+
+            # Stock y costo promedio ponderado de todos los productos en un solo bulk_update
+            Producto.aplicar_entradas([
+                (producto.id, cantidad, precio) for producto, cantidad, precio in items
+            ])
+
+            UltimoCostoProveedor.registrar_compra(compra, items)
+        return compra
+
 
 class DetalleCompra(models.Model):
     compra = models.ForeignKey(Compra, related_name='detalles', on_delete=models.CASCADE)
@@ -34,3 +132,48 @@ class DetalleCompra(models.Model):
             except Exception:
                 pass
         super().save(*args, **kwargs)
+
+
+class UltimoCostoProveedor(models.Model):
+    """
+    Último costo unitario pagado a cada proveedor por cada producto.
+    Lo mantienen Compra.registrar y OrdenCompra.recibir_lote para que el
+    autocompletado del formulario de compra sea una búsqueda por clave única en
+    vez de recorrer DetalleCompra.
+    """
+    proveedor = models.ForeignKey(Proveedor, on_delete=models.CASCADE, related_name='ultimos_costos')
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='ultimos_costos')
+    costo = models.DecimalField(max_digits=15, decimal_places=2)
+    fecha = models.DateTimeField()
+    compra = models.ForeignKey(Compra, on_delete=SET_NULL, null=True, blank=True, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['proveedor', 'producto'], name='uniq_ultimo_costo_proveedor_producto'),
+        ]
+
+    def __str__(self):
+        return f"{self.proveedor} / {self.producto}: ${self.costo}"
+
+    @classmethod
+    def registrar_compra(cls, compra, items):
+        """Upsert del costo de cada producto de la compra (si se repite, gana la última línea)."""
+        cls.registrar(
+            {(compra.proveedor_id, producto.id): precio for producto, _, precio in items},
+            compra.fecha,
+            compra=compra,
+        )
+
+    @classmethod
+    def registrar(cls, costos, fecha, compra=None):
+        """Upsert de `costos` ({(proveedor_id, producto_id): costo}) con una sola consulta."""
+        cls.objects.bulk_create(
+            [
+                cls(proveedor_id=proveedor_id, producto_id=producto_id,
+                    costo=costo, fecha=fecha, compra=compra)
+                for (proveedor_id, producto_id), costo in costos.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['proveedor', 'producto'],
+            update_fields=['costo', 'fecha', 'compra'],
+        )
@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import compra_crear, compra_lista, compra_detalle
+from .views import compra_crear, compra_lista, compra_detalle, api_productos
 
 urlpatterns = [
     path('', compra_lista, name='compra_lista'),
     path('crear/', compra_crear, name='compra_crear'),
     path('<int:compra_id>/', compra_detalle, name='compra_detalle'),
+    path('api/productos/', api_productos, name='compras_api_productos'),
 ]
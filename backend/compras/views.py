@@ -1,33 +1,58 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth.decorators import login_required, user_passes_test # Se añade user_passes_test
+from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
+from django.db.models import Count, OuterRef, Prefetch, Subquery, Sum
+from django.db.models.functions import Coalesce
 from decimal import Decimal
 
 # Importación de la función de chequeo de Admin
-from accounts.views import es_admin 
+from mytienda.accesos import requiere
 
-from inventario.models import Producto, Proveedor, Inventario
-from .models import Compra, DetalleCompra
+from inventario.models import Producto, Proveedor
+from .models import Compra, DetalleCompra, UltimoCostoProveedor
+from mytienda.fechas import filtro_dias, parse_fecha
+from mytienda.paginacion import paginar, urls_paginacion
 
 
 # ==================== API PARA AUTOCOMPLETADO ====================
 
 # No requiere restricción de rol, ya que asume que el usuario ya está logueado para usar el formulario de compra
+@login_required(login_url='login')
 def api_productos(request): 
-    """API para obtener productos con búsqueda"""
+    """API para obtener productos con búsqueda.
+
+    Con `proveedor=<id>` cada producto incluye el último costo pagado a ese
+    proveedor (`ultimo_costo`, `ultima_compra`), leído de UltimoCostoProveedor.
+    Con `con_costo=1` solo devuelve los productos que ya tienen costo para ese
+    proveedor; así el formulario autocompleta todas sus filas en una petición.
+    """
     query = request.GET.get('q', '').lower()
+    proveedor_id = request.GET.get('proveedor', '')
+    proveedor_id = int(proveedor_id) if proveedor_id.isdigit() else None
     
     # Solo productos activos (no mostrar los eliminados/desactivados)
     productos = Producto.objects.filter(activo=True)
     
     if query:
         productos = productos.filter(nombre__icontains=query) | productos.filter(codigo__icontains=query)
+
+    limite = 20
+    if proveedor_id:
+        costo = UltimoCostoProveedor.objects.filter(proveedor_id=proveedor_id, producto=OuterRef('pk'))
+        productos = productos.annotate(
+            ultimo_costo=Subquery(costo.values('costo')[:1]),
+            ultima_compra=Subquery(costo.values('fecha')[:1]),
+        )
+        if request.GET.get('con_costo') == '1':
+            productos = productos.filter(ultimos_costos__proveedor_id=proveedor_id)
+            limite = 500
     
-    productos = productos[:20]  # Limitar a 20 resultados
+    productos = productos[:limite]  # Limitar resultados
     
-    data = [
-        {
+    data = []
+    for p in productos:
+        item = {
             'id': p.id,
             'nombre': p.nombre,
             'codigo': p.codigo,
@@ -35,26 +60,51 @@ def api_productos(request):
             'precio_venta': str(p.precio_venta),
             'stock': p.stock
         }
-        for p in productos
-    ]
+        if proveedor_id:
+            item['ultimo_costo'] = f"{p.ultimo_costo:.2f}" if p.ultimo_costo is not None else None
+            item['ultima_compra'] = p.ultima_compra.isoformat() if p.ultima_compra else None
+        data.append(item)
     
     return JsonResponse(data, safe=False)
 
 
 # ==================== LISTA DE COMPRAS ====================
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO: Usando nombre de ruta 'login'
+@requiere('gestion')
 def compra_lista(request):
-    """Mostrar todas las compras registradas"""
-    compras = Compra.objects.all().order_by('-id')
-    return render(request, 'compras/compra_lista.html', {'compras': compras})
+    """Mostrar las compras registradas, paginadas por (fecha, id) y filtrables por proveedor y días"""
+    # Conteos por subconsulta correlacionada: solo se calculan para las filas de la página
+    lineas = DetalleCompra.objects.filter(compra=OuterRef('pk')).values('compra')
+    compras = Compra.objects.select_related('proveedor').annotate(
+        num_lineas=Coalesce(Subquery(lineas.annotate(n=Count('id')).values('n')), 0),
+        unidades=Coalesce(Subquery(lineas.annotate(u=Sum('cantidad')).values('u')), 0),
+    )
+
+    proveedor_id = request.GET.get('proveedor', '')
+    if proveedor_id.isdigit():
+        compras = compras.filter(proveedor_id=proveedor_id)
+    fecha_inicio = parse_fecha(request.GET.get('fecha_inicio'))
+    fecha_fin = parse_fecha(request.GET.get('fecha_fin'))
+    compras = compras.filter(**filtro_dias('fecha', fecha_inicio, fecha_fin))
+
+    compras, siguiente = paginar(compras, request.GET.get('cursor'))
+
+    siguiente_url, primera_url = urls_paginacion(request, siguiente)
+
+    return render(request, 'compras/compra_lista.html', {
+        'compras': compras,
+        'proveedores': Proveedor.objects.order_by('nombre').only('id', 'nombre'),
+        'proveedor_id': proveedor_id,
+        'fecha_inicio': fecha_inicio,
+        'fecha_fin': fecha_fin,
+        'siguiente_url': siguiente_url,
+        'primera_url': primera_url,
+    })
 
 
 # ==================== CREAR COMPRA ====================
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO: Usando nombre de ruta 'login'
+@requiere('gestion')
 def compra_crear(request):
     """Crear nueva compra con múltiples productos"""
     proveedores = Proveedor.objects.all()
@@ -67,8 +117,7 @@ def compra_crear(request):
             messages.error(request, "Debes seleccionar un proveedor.")
             return redirect('compra_crear')
 
-        items = []
-        total_compra = Decimal("0")
+        lineas = []
 
         # Obtener listas de datos
         producto_ids = request.POST.getlist('producto_id[]')
@@ -88,102 +137,48 @@ def compra_crear(request):
                 if not cantidad_str or not precio_str:
                     continue
 
-                producto = None
-
-                # Intentar resolver por ID si viene
-                if prod_id and str(prod_id).strip():
-                    try:
-                        producto = Producto.objects.get(id=int(prod_id))
-                    except (Producto.DoesNotExist, ValueError):
-                        producto = None
-
-                # Si no se resolvió por id, intentar por código enviado en el mismo índice
-                if not producto:
-                    codigo = ''
-                    nombre = ''
-                    try:
-                        codigo = producto_codigos[idx].strip()
-                    except Exception:
-                        codigo = ''
-                    try:
-                        nombre = producto_nombres[idx].strip()
-                    except Exception:
-                        nombre = ''
-
-                    if codigo:
-                        try:
-                            producto = Producto.objects.filter(codigo=int(codigo)).first()
-                        except ValueError:
-                            producto = None
-
-                        # Crear producto mínimo si no existe (esta vista es admin-only)
-                        if not producto:
-                            try:
-                                producto = Producto.objects.create(
-                                    codigo=int(codigo),
-                                    nombre=(nombre or f"Producto {codigo}"),
-                                    precio_compra=Decimal(precio_str),
-                                    precio_venta=Decimal(precio_str),
-                                    stock=0,
-                                    activo=True
-                                )
-                            except Exception:
-                                producto = None
-
-                # Si aún no hay producto, ignorar esta línea
-                if not producto:
-                    continue
-
                 cantidad = int(cantidad_str)
                 precio = Decimal(precio_str)
-
-                # Si la cantidad es cero o negativa, ignorar la línea (no es válida para crear)
-                if cantidad <= 0:
-                    continue
-
-                if precio < 0:
-                    messages.error(request, f"El precio debe ser válido para {producto.nombre}.")
-                    return redirect('compra_crear')
-
-                subtotal = cantidad * precio
-                items.append((producto, cantidad, precio, subtotal))
-                total_compra += subtotal
-
-            except (ValueError, IndexError):
+            except (ValueError, ArithmeticError):
                 # Ignorar si hay un error en un producto, pero podríamos ser más estrictos
                 continue
 
-        if not items:
+            # Si la cantidad es cero o negativa, ignorar la línea (no es válida para crear)
+            if cantidad <= 0 or not precio.is_finite():
+                continue
+
+            try:
+                prod_id = int(prod_id) if str(prod_id).strip() else None
+            except ValueError:
+                prod_id = None
+            try:
+                codigo = int(producto_codigos[idx].strip() or 0) or None
+            except (ValueError, IndexError):
+                codigo = None
+            try:
+                nombre = producto_nombres[idx].strip()
+            except IndexError:
+                nombre = ''
+
+            if precio < 0:
+                messages.error(request, f"El precio debe ser válido para {nombre or codigo or prod_id}.")
+                return redirect('compra_crear')
+
+            lineas.append({
+                'producto_id': prod_id,
+                'codigo': codigo,
+                'nombre': nombre,
+                'cantidad': cantidad,
+                'precio': precio,
+            })
+
+        # Resolver productos, crear detalles, movimientos y stock en una sola transacción
+        compra = Compra.registrar(proveedor_id, lineas) if lineas else None
+
+        if not compra:
             messages.error(request, "Debes agregar al menos un producto.")
             return redirect('compra_crear')
 
-        # Crear compra
-        compra = Compra.objects.create(
-            proveedor_id=proveedor_id,
-            total=total_compra
-        )
-
-        # Crear detalles y movimientos de inventario
-        for producto, cantidad, precio_unitario, subtotal in items:
-            # Detalle de compra
-            DetalleCompra.objects.create(
-                compra=compra,
-                producto=producto,
-                cantidad=cantidad,
-                precio_unitario=precio_unitario
-            )
-
-            # Movimiento de inventario (ENTRADA)
-            Inventario.objects.create(
-                producto=producto,
-                tipo="ENTRADA",
-                cantidad=cantidad,
-                numero_referencia=f"COMPRA-{compra.id}-{producto.id}"
-            )
-            
-            # Nota: El stock del producto se actualiza mediante un signal o un método 
-            # en el modelo Inventario al crearse el movimiento.
-
         messages.success(request, f"Compra #{compra.id} registrada correctamente. Total: ${compra.total}")
         return redirect('compra_detalle', compra_id=compra.id)
 
@@ -195,9 +190,13 @@ def compra_crear(request):
 
 # ==================== DETALLE DE COMPRA ====================
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO: Usando nombre de ruta 'login'
+@requiere('gestion')
 def compra_detalle(request, compra_id):
     """Ver detalles de una compra específica"""
-    compra = get_object_or_404(Compra, id=compra_id)
+    compra = get_object_or_404(
+        Compra.objects.select_related('proveedor').prefetch_related(
+            Prefetch('detalles', queryset=DetalleCompra.objects.select_related('producto').order_by('id'))
+        ),
+        id=compra_id,
+    )
     return render(request, 'compras/compra_detalle.html', {'compra': compra})
\ No newline at end of file
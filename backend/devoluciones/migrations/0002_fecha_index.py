@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:36
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('devoluciones', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='devolucion',
+            name='fecha',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
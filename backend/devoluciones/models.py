@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F
 
 from ventas.models import Venta, DetalleVenta
 from inventario.models import Producto, Inventario
@@ -13,27 +15,133 @@ class Devolucion(models.Model):
     cantidad = models.IntegerField()
     motivo = models.CharField(max_length=250, blank=True)
     usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
-    fecha = models.DateTimeField(default=timezone.now)
+    fecha = models.DateTimeField(default=timezone.now, db_index=True)
 
     def __str__(self):
         prod = self.producto.nombre if self.producto else (self.detalle_venta.producto_nombre if self.detalle_venta else 'Sin producto')
         return f"Devolución #{self.id} - {prod} x {self.cantidad}"
 
+    @property
+    def referencia_inventario(self):
+        # numero_referencia admite 20 caracteres: el id de la devolución basta para que sea único
+        return f"DEV-{self.id}"
+
     def save(self, *args, **kwargs):
         is_new = self.pk is None
         # Asegurar producto si no fue pasado
         if not self.producto and self.detalle_venta and self.detalle_venta.producto:
             self.producto = self.detalle_venta.producto
 
-        super().save(*args, **kwargs)
-
-        # Solo crear movimiento la primera vez que se crea la devolución
-        if is_new and self.producto and self.cantidad:
-            # Crear movimiento de tipo 'ENTRADA' para reingresar el stock
-            referencia = f"DEV-{int(self.fecha.timestamp()*1000)}-{self.id}"
-            Inventario.objects.create(
-                producto=self.producto,
-                tipo='ENTRADA',
-                cantidad=self.cantidad,
-                numero_referencia=referencia,
-            )
+        # La devolución, su ENTRADA, el contador de la línea y el resumen diario
+        # se escriben juntos: si algo falla no queda stock ni reporte a medias
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            # Solo crear movimiento la primera vez que se crea la devolución
+            if is_new and self.producto and self.cantidad:
+                # Crear movimiento de tipo 'ENTRADA' para reingresar el stock
+                Inventario.objects.create(
+                    producto=self.producto,
+                    tipo='ENTRADA',
+                    cantidad=self.cantidad,
+                    numero_referencia=self.referencia_inventario,
+                )
+
+            if is_new and self.detalle_venta and self.cantidad:
+                # Contador de unidades devueltas de la línea (UPDATE atómico)
+                DetalleVenta.objects.filter(pk=self.detalle_venta_id).update(
+                    cantidad_devuelta=F('cantidad_devuelta') + self.cantidad
+                )
+                self.detalle_venta.cantidad_devuelta += self.cantidad
+
+            # Descontar la devolución del resumen diario de ventas
+            if is_new and self.detalle_venta and self.cantidad:
+                from reportes.models import VentaProductoDia
+                VentaProductoDia.registrar_devolucion(self.detalle_venta, self.cantidad)
+
+    @classmethod
+    def registrar_lote(cls, venta, cantidades, motivo='', usuario=None):
+        """
+        Registra en una sola transacción la devolución de varias líneas de una venta.
+        `cantidades` es {detalle_venta_id: cantidad}. Si alguna cantidad no es
+        válida no se registra nada y se lanza ValidationError con todos los errores.
+
+        Bloquea las líneas afectadas, inserta devoluciones y movimientos ENTRADA
+        con bulk_create y aplica el stock con un único UPDATE agrupado por producto.
+        """
+        cantidades = {int(k): int(v) for k, v in cantidades.items() if int(v) > 0}
+        if not cantidades:
+            return []
+
+        with transaction.atomic():
+            detalles = {
+                d.id: d
+                for d in DetalleVenta.objects
+                .select_for_update()
+                .select_related('venta')
+                .filter(venta=venta, id__in=cantidades)
+                .order_by('id')
+            }
+
+            errores = []
+            for detalle_id, cantidad in cantidades.items():
+                detalle = detalles.get(detalle_id)
+                if detalle is None:
+                    errores.append(f"La línea {detalle_id} no pertenece a la venta #{venta.id}.")
+                elif cantidad > detalle.max_devolvible:
+                    errores.append(f"No se puede devolver {cantidad} de {detalle.producto_nombre}. Máximo: {detalle.max_devolvible}")
+            if errores:
+                raise ValidationError(errores)
+
+            # El UPDATE condicional es la garantía final frente a devoluciones concurrentes
+            for detalle_id, cantidad in cantidades.items():
+                actualizado = DetalleVenta.objects.filter(
+                    id=detalle_id, cantidad_devuelta__lte=F('cantidad') - cantidad
+                ).update(cantidad_devuelta=F('cantidad_devuelta') + cantidad)
+                if not actualizado:
+                    detalle = detalles[detalle_id]
+                    raise ValidationError([f"La cantidad devolvible de {detalle.producto_nombre} cambió, intenta de nuevo."])
+                detalles[detalle_id].cantidad_devuelta += cantidad
+
+            ahora = timezone.now()
+            devoluciones = cls.objects.bulk_create([
+                cls(
+                    venta=venta,
+                    detalle_venta=detalles[detalle_id],
+                    producto_id=detalles[detalle_id].producto_id,
+                    cantidad=cantidad,
+                    motivo=motivo,
+                    usuario=usuario,
+                    fecha=ahora,
+                )
+                for detalle_id, cantidad in cantidades.items()
+            ])
+            if any(d.pk is None for d in devoluciones):
+                # Backends sin RETURNING en bulk_create: recuperar los ids recién insertados
+                ids = cls.objects.filter(venta=venta, fecha=ahora, detalle_venta_id__in=cantidades) \
+                    .values_list('detalle_venta_id', 'id')
+                por_detalle = dict(ids)
+                for d in devoluciones:
+                    d.pk = d.id = por_detalle[d.detalle_venta_id]
+
+            # Movimientos ENTRADA sin pasar por Inventario.save (el stock se aplica abajo)
+            con_producto = [d for d in devoluciones if d.producto_id]
+            Inventario.objects.bulk_create([
+                Inventario(
+                    producto_id=d.producto_id,
+                    tipo='ENTRADA',
+                    cantidad=d.cantidad,
+                    numero_referencia=d.referencia_inventario,
+                    fecha=ahora,
+                )
+                for d in con_producto
+            ])
+
+            # Las unidades devueltas reingresan al costo promedio vigente
+            Producto.aplicar_entradas([(d.producto_id, d.cantidad, None) for d in con_producto])
+
+            from reportes.models import VentaProductoDia
+            for d in devoluciones:
+                VentaProductoDia.registrar_devolucion(detalles[d.detalle_venta_id], d.cantidad)
+
+        return devoluciones
@@ -1,18 +1,21 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.http import HttpResponseForbidden
+from django.core.exceptions import ValidationError
 
 from .models import Devolucion
 from ventas.models import Venta, DetalleVenta
 from inventario.models import Producto
 from django.http import JsonResponse
-from django.db.models import Sum
-from django.contrib.auth.decorators import login_required
+from mytienda.accesos import requiere
 
+from django.db.models.functions import Lower
 
-@login_required(login_url='login')
-@user_passes_test(lambda u: u.rol in ["ADMIN", "CAJERO"], login_url='login')
+from mytienda.fechas import filtro_dias, parse_fecha
+from mytienda.paginacion import paginar, urls_paginacion
+
+
+@requiere('caja')
 def devoluciones_list(request):
     """
     Mostrar listado de devoluciones. Desde aquí se puede ir a crear una nueva devolucion.
@@ -23,15 +26,21 @@ def devoluciones_list(request):
     else:
         # CAJERO: solo ve devoluciones que él registró
         devoluciones = Devolucion.objects.filter(usuario=request.user).select_related('producto', 'usuario', 'venta').order_by('-fecha')
-    
+
+    # Filtro opcional por rango de días (usa el índice de fecha)
+    fecha_inicio = parse_fecha(request.GET.get('fecha_inicio'))
+    fecha_fin = parse_fecha(request.GET.get('fecha_fin'))
+    devoluciones = devoluciones.filter(**filtro_dias('fecha', fecha_inicio, fecha_fin))
+
     context = {
         'devoluciones': devoluciones,
+        'fecha_inicio': fecha_inicio,
+        'fecha_fin': fecha_fin,
     }
     return render(request, 'devoluciones/index.html', context)
 
 
-@login_required(login_url='login')
-@user_passes_test(lambda u: u.rol in ["ADMIN", "CAJERO"], login_url='login')
+@requiere('caja')
 def venta_detalles_api(request, venta_id):
     """API que devuelve los detalles de una venta junto con la cantidad máxima que puede devolverse."""
     venta = Venta.objects.filter(id=venta_id).first()
@@ -41,37 +50,65 @@ def venta_detalles_api(request, venta_id):
     datos = []
     detalles = venta.detalles.select_related('producto').all()
     for d in detalles:
-        total_devueltas = Devolucion.objects.filter(detalle_venta=d).aggregate(total=Sum('cantidad'))['total'] or 0
-        max_returnable = max(0, d.cantidad - total_devueltas)
         datos.append({
             'detalle_id': d.id,
             'producto_id': d.producto.id if d.producto else None,
             'producto_nombre': d.producto.nombre if d.producto else d.producto_nombre,
             'cantidad_vendida': d.cantidad,
-            'cantidad_devuelta': total_devueltas,
-            'max_returnable': max_returnable,
+            'cantidad_devuelta': d.cantidad_devuelta,
+            'max_returnable': d.max_devolvible,
         })
 
     return JsonResponse({'venta_id': venta.id, 'detalles': datos})
 
 
-@login_required(login_url='login')
-@user_passes_test(lambda u: u.rol in ["ADMIN", "CAJERO"], login_url='login')
+@requiere('caja')
 def ventas_for_devoluciones(request):
-    """Mostrar un listado simple de ventas para elegir desde cuál devolver.
+    """Buscar la venta desde la cual devolver.
     ADMIN ve todas, CAJERO ve solo sus propias ventas.
+
+    Filtros opcionales: número de venta, email del cliente, rango de días y
+    código de producto. El listado se pagina por (fecha, id) con cursor, así
+    que cualquier página cuesta lo mismo sin importar el tamaño del histórico.
     """
-    if request.user.rol == "ADMIN":
-        ventas = Venta.objects.select_related('usuario').order_by('-id')[:200]
-    else:
+    ventas = Venta.objects.select_related('usuario')
+    if request.user.rol != "ADMIN":
         # CAJERO: solo ve sus propias ventas
-        ventas = Venta.objects.filter(usuario=request.user).select_related('usuario').order_by('-id')[:200]
-    
-    return render(request, 'devoluciones/ventas_list.html', {'ventas': ventas})
+        ventas = ventas.filter(usuario=request.user)
+
+    filtros = {
+        'venta_id': request.GET.get('venta_id', '').strip(),
+        'email': request.GET.get('email', '').strip(),
+        'codigo': request.GET.get('codigo', '').strip(),
+        'fecha_inicio': parse_fecha(request.GET.get('fecha_inicio')),
+        'fecha_fin': parse_fecha(request.GET.get('fecha_fin')),
+    }
 
+    if filtros['venta_id']:
+        ventas = ventas.filter(id=filtros['venta_id']) if filtros['venta_id'].isdigit() else ventas.none()
+    if filtros['email']:
+        # Coincide con el índice funcional LOWER(email_cliente)
+        ventas = ventas.alias(email_norm=Lower('email_cliente')).filter(email_norm=filtros['email'].lower())
+    if filtros['codigo']:
+        ventas = ventas.filter(
+            id__in=DetalleVenta.objects.filter(producto_codigo=filtros['codigo']).values('venta_id')
+        )
+    ventas = ventas.filter(**filtro_dias('fecha', filtros['fecha_inicio'], filtros['fecha_fin']))
 
-@login_required(login_url='login')
-@user_passes_test(lambda u: u.rol in ["ADMIN", "CAJERO"], login_url='login')
+    ventas, siguiente = paginar(ventas, request.GET.get('cursor'))
+
+    siguiente_url, primera_url = urls_paginacion(request, siguiente)
+
+    context = {
+        'ventas': ventas,
+        'filtros': filtros,
+        'siguiente_url': siguiente_url,
+        'primera_url': primera_url,
+    }
+    return render(request, 'devoluciones/ventas_list.html', context)
+
+
+@requiere('caja')
 def devolver_desde_venta(request, venta_id):
     """Página que muestra el detalle de la venta y permite seleccionar productos a devolver.
     POST procesará las cantidades por detalle y creará las devoluciones.
@@ -87,8 +124,7 @@ def devolver_desde_venta(request, venta_id):
 
     if request.method == 'POST':
         motivo = request.POST.get('motivo', '')
-        created = []
-        errors = []
+        cantidades = {}
 
         for detalle in detalles:
             key = f'detalle_{detalle.id}'
@@ -99,42 +135,28 @@ def devolver_desde_venta(request, venta_id):
             except Exception:
                 cantidad = 0
 
-            if cantidad <= 0:
-                continue
-
-            # verificar cantidad maxima
-            total_devueltas = Devolucion.objects.filter(detalle_venta=detalle).aggregate(total=Sum('cantidad'))['total'] or 0
-            max_returnable = detalle.cantidad - total_devueltas
-            if cantidad > max_returnable:
-                errors.append(f"No se puede devolver {cantidad} de {detalle.producto_nombre or detalle.producto.nombre}. Máximo: {max_returnable}")
-                continue
+            if cantidad > 0:
+                cantidades[detalle.id] = cantidad
 
-            devol = Devolucion.objects.create(
-                venta=venta,
-                detalle_venta=detalle,
-                producto=detalle.producto,
-                cantidad=cantidad,
-                motivo=motivo,
-                usuario=request.user
-            )
-            created.append(devol.id)
-
-        if created:
-            messages.success(request, f'Devoluciones registradas: {created}')
-        if errors:
-            for e in errors:
-                messages.error(request, e)
+        # Toda la devolución se aplica en una transacción: o todas las líneas o ninguna
+        try:
+            creadas = Devolucion.registrar_lote(venta, cantidades, motivo=motivo, usuario=request.user)
+        except ValidationError as e:
+            for error in e.messages:
+                messages.error(request, error)
+        else:
+            if creadas:
+                messages.success(request, f'Devoluciones registradas: {[d.id for d in creadas]}')
 
         return redirect('devolver_desde_venta', venta_id=venta.id)
 
     # calcular max por detalle para mostrar
     detalle_info = []
     for d in detalles:
-        total_devueltas = Devolucion.objects.filter(detalle_venta=d).aggregate(total=Sum('cantidad'))['total'] or 0
         detalle_info.append({
             'detalle': d,
-            'max_returnable': max(0, d.cantidad - total_devueltas),
-            'cantidad_devuelta': total_devueltas,
+            'max_returnable': d.max_devolvible,
+            'cantidad_devuelta': d.cantidad_devuelta,
         })
 
     context = {
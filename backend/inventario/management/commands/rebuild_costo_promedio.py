@@ -0,0 +1,27 @@
+"""
+Comando para recalcular el costo promedio ponderado y el valor de inventario
+de cada producto reproduciendo el libro de movimientos.
+Uso: python manage.py rebuild_costo_promedio --chunk-size=2000
+"""
+
+from django.core.management.base import BaseCommand
+
+from inventario.models import Producto
+
+
+class Command(BaseCommand):
+    help = 'Recalcula costo promedio y valor de inventario desde los movimientos de Inventario'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Filas leídas/actualizadas por lote (default: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        productos = Producto.reconstruir_costos(chunk_size=options['chunk_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Costos recalculados para {productos} productos')
+        )
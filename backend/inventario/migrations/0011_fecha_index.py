@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:36
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0010_alter_ordencompra_costo_unitario_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='inventario',
+            name='fecha',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:49
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, Sum
+
+
+def backfill(apps, schema_editor):
+    """
+    Completa el costo unitario de las entradas por compra (referencia
+    COMPRA-<compra>-<producto>) e inicializa costo promedio y valor con el
+    precio de compra. `rebuild_costo_promedio` reproduce luego el libro completo.
+    """
+    Inventario = apps.get_model('inventario', 'Inventario')
+    Producto = apps.get_model('inventario', 'Producto')
+    DetalleCompra = apps.get_model('compras', 'DetalleCompra')
+
+    movimientos = Inventario.objects.filter(tipo='ENTRADA', numero_referencia__startswith='COMPRA-').order_by('pk')
+    lote = []
+    for mov in movimientos.iterator(chunk_size=2000):
+        lote.append(mov)
+        if len(lote) == 2000:
+            _costear(lote, Inventario, DetalleCompra)
+            lote = []
+    if lote:
+        _costear(lote, Inventario, DetalleCompra)
+
+    Producto.objects.update(costo_promedio=F('precio_compra'))
+    Producto.objects.filter(stock__gt=0).update(valor_inventario=F('stock') * F('precio_compra'))
+
+
+def _costear(lote, Inventario, DetalleCompra):
+    claves = {}
+    for mov in lote:
+        try:
+            _, compra_id, producto_id = mov.numero_referencia.split('-')
+            claves[mov.pk] = (int(compra_id), int(producto_id))
+        except ValueError:
+            continue
+    filas = (
+        DetalleCompra.objects
+        .filter(compra_id__in={c for c, _ in claves.values()})
+        .values('compra_id', 'producto_id')
+        .annotate(unidades=Sum('cantidad'), valor=Sum(F('cantidad') * F('precio_unitario')))
+    )
+    costos = {
+        (f['compra_id'], f['producto_id']): Decimal(f['valor']) / f['unidades']
+        for f in filas if f['unidades']
+    }
+    costeados = []
+    for mov in lote:
+        costo = costos.get(claves.get(mov.pk))
+        if costo is not None:
+            mov.costo_unitario = costo.quantize(Decimal('0.0001'))
+            costeados.append(mov)
+    Inventario.objects.bulk_update(costeados, ['costo_unitario'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0011_fecha_index'),
+        ('compras', '0003_detallecompra_producto_codigo_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventario',
+            name='costo_unitario',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=15, null=True),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='costo_promedio',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=15),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='valor_inventario',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=17),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0012_costo_promedio'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ordencompra',
+            index=models.Index(fields=['estado', 'fecha_creacion', 'id'], name='orden_estado_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:01
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import Lower, Trim
+
+
+def normalizar_correos(apps, schema_editor):
+    """Igual que accounts 0003: minúsculas, y se detiene si quedarían correos repetidos."""
+    Proveedor = apps.get_model('inventario', 'Proveedor')
+    duplicados = list(
+        Proveedor.objects
+        .values(normal=Lower(Trim('correo')))
+        .annotate(n=Count('id'))
+        .filter(n__gt=1)
+        .values_list('normal', flat=True)
+    )
+    if duplicados:
+        raise RuntimeError(
+            "Correos de proveedor repetidos al ignorar mayúsculas, corrígelos antes de migrar: "
+            + ", ".join(sorted(duplicados))
+        )
+    Proveedor.objects.filter(~Q(correo=Lower(Trim('correo')))).update(correo=Lower(Trim('correo')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0013_orden_estado_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalizar_correos, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='proveedor',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('correo'), name='proveedor_correo_lower_uniq'),
+        ),
+    ]
@@ -1,6 +1,15 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import Sum, Case, When, F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.db.models.functions import Lower
 from django.utils import timezone
 
+CENTAVOS = Decimal('0.01')
+DIEZMILESIMAS = Decimal('0.0001')
+
 # ===========================
 # MODELO PROVEEDOR
 # ===========================
@@ -10,9 +19,19 @@ class Proveedor(models.Model):
     direccion = models.CharField(max_length=200)
     correo = models.EmailField(unique=True)#para la validacion de correo unico
 
+    class Meta:
+        constraints = [
+            # El correo se guarda en minúsculas; esto impide duplicados que difieran solo en mayúsculas
+            models.UniqueConstraint(Lower('correo'), name='proveedor_correo_lower_uniq'),
+        ]
+
     def __str__(self):
         return self.nombre
 
+    def save(self, *args, **kwargs):
+        self.correo = (self.correo or '').strip().lower()
+        super().save(*args, **kwargs)
+
 
 # ===========================
 # PRODUCTO
@@ -24,10 +43,132 @@ class Producto(models.Model):
     precio_compra = models.DecimalField(max_digits=15, decimal_places=3)
     precio_venta = models.DecimalField(max_digits=15, decimal_places=3)
     activo = models.BooleanField(default=True)  # Para desactivar sin eliminar
+    # Costo promedio ponderado y valor del stock; se mantienen con cada movimiento
+    costo_promedio = models.DecimalField(max_digits=15, decimal_places=4, default=0, editable=False)
+    valor_inventario = models.DecimalField(max_digits=17, decimal_places=2, default=0, editable=False)
+
+    CAMPOS_STOCK = ['stock', 'costo_promedio', 'valor_inventario']
 
     def __str__(self):
         return f"{self.nombre} ({self.codigo})"
 
+    @property
+    def costo_vigente(self):
+        """Costo promedio, o el precio de compra si aún no hay entradas valorizadas."""
+        if self.costo_promedio:
+            return Decimal(self.costo_promedio)
+        return Decimal(str(self.precio_compra or 0))
+
+    @property
+    def margen_unitario(self):
+        return Decimal(str(self.precio_venta or 0)) - self.costo_vigente
+
+    def registrar_entrada(self, cantidad, costo_unitario=None):
+        """
+        Suma unidades al stock en memoria (O(1)). Con `costo_unitario` (compras)
+        recalcula el promedio ponderado; sin él (devoluciones, ajustes) las
+        unidades entran al costo vigente y el promedio no cambia.
+        """
+        costo = self.costo_vigente
+        anterior = self.stock
+        self.stock += cantidad
+        if costo_unitario is not None and anterior > 0 and self.stock > 0:
+            # Stock creado sin movimientos todavía no tiene valor: se toma al precio de compra
+            base = Decimal(self.valor_inventario) if self.costo_promedio else anterior * costo
+            valor = base + cantidad * Decimal(costo_unitario)
+            self.costo_promedio = (valor / self.stock).quantize(DIEZMILESIMAS)
+            self.valor_inventario = valor.quantize(CENTAVOS)
+            return
+        if costo_unitario is not None:
+            # Sin stock previo el promedio arranca en el costo de esta entrada
+            costo = Decimal(costo_unitario)
+        self.costo_promedio = costo
+        self.valor_inventario = (max(self.stock, 0) * costo).quantize(CENTAVOS)
+
+    def registrar_salida(self, cantidad):
+        """Descuenta unidades al costo promedio vigente (O(1))."""
+        costo = self.costo_vigente
+        self.stock -= cantidad
+        self.costo_promedio = costo
+        self.valor_inventario = (max(self.stock, 0) * costo).quantize(CENTAVOS)
+
+    @classmethod
+    def aplicar_entradas(cls, entradas):
+        """
+        Aplica varias entradas en bloque: `entradas` es una lista de
+        (producto_id, cantidad, costo_unitario o None). Bloquea los productos
+        en orden de id, calcula en memoria y guarda con un único bulk_update.
+        Debe llamarse dentro de una transacción.
+        """
+        ids = sorted({producto_id for producto_id, _, _ in entradas})
+        productos = {p.id: p for p in cls.objects.select_for_update().filter(id__in=ids).order_by('id')}
+        for producto_id, cantidad, costo_unitario in entradas:
+            producto = productos.get(producto_id)
+            if producto is not None:
+                producto.registrar_entrada(cantidad, costo_unitario)
+        cls.objects.bulk_update(productos.values(), cls.CAMPOS_STOCK)
+        return productos
+
+    @classmethod
+    def aplicar_salidas(cls, salidas):
+        """Como `aplicar_entradas`, para una lista de (producto_id, cantidad) que salen del stock."""
+        ids = sorted({producto_id for producto_id, _ in salidas})
+        productos = {p.id: p for p in cls.objects.select_for_update().filter(id__in=ids).order_by('id')}
+        for producto_id, cantidad in salidas:
+            producto = productos.get(producto_id)
+            if producto is not None:
+                producto.registrar_salida(cantidad)
+        cls.objects.bulk_update(productos.values(), cls.CAMPOS_STOCK)
+        return productos
+
+    @classmethod
+    def reconstruir_costos(cls, chunk_size=2000):
+        """
+        Recalcula costo promedio y valor de inventario reproduciendo el libro de
+        movimientos (Inventario) en orden cronológico y por lotes. El stock que
+        no tiene movimientos (saldo inicial) se valoriza al precio de compra.
+        """
+        with transaction.atomic():
+            netos = dict(
+                Inventario.objects.values('producto_id')
+                .annotate(neto=Sum(Case(
+                    When(tipo='ENTRADA', then=F('cantidad')),
+                    default=-F('cantidad'),
+                )))
+                .values_list('producto_id', 'neto')
+            )
+            productos = {}
+            for p in cls.objects.select_for_update().order_by('id').iterator(chunk_size=chunk_size):
+                real = p.stock
+                p.stock = real - (netos.get(p.id) or 0)
+                p.costo_promedio = Decimal(0)
+                p.valor_inventario = (max(p.stock, 0) * p.costo_vigente).quantize(CENTAVOS)
+                productos[p.id] = (p, real)
+
+            movimientos = (
+                Inventario.objects.order_by('fecha', 'id')
+                .values_list('producto_id', 'tipo', 'cantidad', 'costo_unitario')
+                .iterator(chunk_size=chunk_size)
+            )
+            for producto_id, tipo, cantidad, costo_unitario in movimientos:
+                producto, _ = productos[producto_id]
+                if tipo == 'ENTRADA':
+                    producto.registrar_entrada(cantidad, costo_unitario)
+                else:
+                    producto.registrar_salida(cantidad)
+
+            for producto, real in productos.values():
+                if producto.stock != real:
+                    # Ajustes de stock hechos fuera del libro: valorizar la diferencia al costo vigente
+                    producto.stock = real
+                    producto.valor_inventario = (max(real, 0) * producto.costo_vigente).quantize(CENTAVOS)
+            cls.objects.bulk_update(
+                [p for p, _ in productos.values()],
+                ['costo_promedio', 'valor_inventario'],
+                batch_size=chunk_size,
+            )
+        return len(productos)
+
 
 # ===========================
 # ORDEN DE COMPRA
@@ -50,18 +191,68 @@ class OrdenCompra(models.Model):
     fecha_creacion = models.DateTimeField(default=timezone.now)
     fecha_recepcion = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['estado', 'fecha_creacion', 'id'], name='orden_estado_fecha_idx'),
+        ]
+
     def __str__(self):
         return f"OC-{self.id} | {self.producto.nombre} x {self.cantidad}"
 
     def recibir(self):
-        if self.estado != 'RECIBIDA':
-            self.producto.stock += self.cantidad
-            self.producto.save()
+        """Recibe esta orden (ver `recibir_lote`). Devuelve False si ya no estaba pendiente."""
+        # Nota: creación de alertas tipo 'COMPRA' desactivada por petición. Si se necesita
+        # reactivar, restaurar la llamada a AlertaInventario.objects.create(...)
+        recibidas = type(self).recibir_lote([self.id])
+        if recibidas:
             self.estado = 'RECIBIDA'
-            self.fecha_recepcion = timezone.now()
-            self.save()
-            # Nota: creación de alertas tipo 'COMPRA' desactivada por petición. Si se necesita
-            # reactivar, restaurar la llamada a AlertaInventario.objects.create(...)
+            self.fecha_recepcion = recibidas[0].fecha_recepcion
+        return bool(recibidas)
+
+    @classmethod
+    def recibir_lote(cls, ids):
+        """
+        Recibe varias órdenes en una sola transacción: bloquea las órdenes
+        pendientes (las ya recibidas o canceladas se ignoran, así que reintentar
+        es inofensivo), registra una ENTRADA por orden con su costo, aplica el
+        stock agrupado por producto bajo bloqueo de fila y actualiza el último
+        costo de cada proveedor (UltimoCostoProveedor).
+        Devuelve las órdenes recibidas en esta llamada.
+        """
+        with transaction.atomic():
+            ordenes = list(
+                cls.objects.select_for_update()
+                .filter(id__in=ids, estado='PENDIENTE')
+                .order_by('id')
+            )
+            if not ordenes:
+                return []
+
+            ahora = timezone.now()
+            # La referencia OC-<id> es única: una segunda recepción de la misma orden falla aquí
+            Inventario.objects.bulk_create([
+                Inventario(
+                    producto_id=o.producto_id,
+                    tipo='ENTRADA',
+                    cantidad=o.cantidad,
+                    numero_referencia=f"OC-{o.id}",
+                    fecha=ahora,
+                    costo_unitario=o.costo_unitario,
+                )
+                for o in ordenes
+            ])
+            Producto.aplicar_entradas([(o.producto_id, o.cantidad, o.costo_unitario) for o in ordenes])
+            # Último costo por proveedor para el autocompletado de compras (si se repite, gana la última orden)
+            from compras.models import UltimoCostoProveedor
+            UltimoCostoProveedor.registrar(
+                {(o.proveedor_id, o.producto_id): o.costo_unitario for o in ordenes}, ahora
+            )
+
+            for o in ordenes:
+                o.estado = 'RECIBIDA'
+                o.fecha_recepcion = ahora
+            cls.objects.filter(id__in=[o.id for o in ordenes]).update(estado='RECIBIDA', fecha_recepcion=ahora)
+        return ordenes
 
 
 # ===========================
@@ -72,27 +263,39 @@ class Inventario(models.Model):
     tipo = models.CharField(max_length=10, choices=[('ENTRADA', 'Entrada'), ('SALIDA', 'Salida')])
     cantidad = models.IntegerField()
     numero_referencia = models.CharField(max_length=20, unique=True, blank=True, null=True)
-    fecha = models.DateTimeField(default=timezone.now)
+    fecha = models.DateTimeField(default=timezone.now, db_index=True)
+    # Costo unitario de las entradas por compra; vacío en devoluciones y ajustes
+    costo_unitario = models.DecimalField(max_digits=15, decimal_places=4, null=True, blank=True)
 
     def __str__(self):
         return f"{self.tipo} - {self.producto.nombre} ({self.cantidad})"
 
     def save(self, *args, **kwargs):
-        if self.tipo == 'ENTRADA':
-            self.producto.stock += self.cantidad
-        elif self.tipo == 'SALIDA':
-            self.producto.stock -= self.cantidad
-        self.producto.save()
-        super().save(*args, **kwargs)
-
-    def delete(self, *args, **kwargs):
-        if self.producto_id and Producto.objects.filter(id=self.producto_id).exists():
+        with transaction.atomic():
+            self._bloquear_producto()
             if self.tipo == 'ENTRADA':
-                self.producto.stock -= self.cantidad
+                self.producto.registrar_entrada(self.cantidad, self.costo_unitario)
             elif self.tipo == 'SALIDA':
-                self.producto.stock += self.cantidad
-            self.producto.save()
-        super().delete(*args, **kwargs)
+                self.producto.registrar_salida(self.cantidad)
+            self.producto.save(update_fields=Producto.CAMPOS_STOCK)
+            super().save(*args, **kwargs)
+
+    def _bloquear_producto(self):
+        """Bloquea el producto y refresca stock/costos en la instancia recibida (puede venir desactualizada)."""
+        actual = Producto.objects.select_for_update().filter(pk=self.producto_id).values(*Producto.CAMPOS_STOCK).get()
+        for campo, valor in actual.items():
+            setattr(self.producto, campo, valor)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            if self.producto_id and Producto.objects.filter(id=self.producto_id).exists():
+                self._bloquear_producto()
+                if self.tipo == 'ENTRADA':
+                    self.producto.registrar_salida(self.cantidad)
+                elif self.tipo == 'SALIDA':
+                    self.producto.registrar_entrada(self.cantidad)
+                self.producto.save(update_fields=Producto.CAMPOS_STOCK)
+            return super().delete(*args, **kwargs)
 
 
 
@@ -116,3 +319,18 @@ class AlertaInventario(models.Model):
 
     def __str__(self):
         return f"{self.titulo} - {self.fecha.date()}"
+
+
+# Entradas de caché etiquetadas 'catalogo' (mytienda.cacheado): nombres y
+# precios. Los movimientos de stock guardan solo CAMPOS_STOCK y no invalidan.
+@receiver(post_save, sender=Producto)
+def _invalidar_catalogo(sender, instance, update_fields=None, **kwargs):
+    from mytienda import cacheado
+    if update_fields is None or not set(update_fields) <= set(Producto.CAMPOS_STOCK):
+        cacheado.invalidar('catalogo')
+
+
+@receiver(post_delete, sender=Producto)
+def _invalidar_catalogo_al_borrar(sender, instance, **kwargs):
+    from mytienda import cacheado
+    cacheado.invalidar('catalogo')
@@ -4,8 +4,8 @@ from .views import (
     ProductoViewSet, InventarioViewSet,
     inventario_dashboard, producto_lista, producto_crear, producto_editar, producto_eliminar, inventario_movimiento,
     proveedor_lista, proveedor_crear,
-    # Órdenes y alertas archivadas (ver backend/archived/20251123_orders_alerts)
     proveedor_editar, proveedor_eliminar, proveedor_detalle,
+    orden_lista, orden_crear, orden_recibir, orden_recibir_lote,
     orden_detalle, orden_editar, orden_cancelar,verificar_codigo_producto,
     verificar_correo_proveedor
 )
@@ -44,7 +44,16 @@ urlpatterns = [
     path('proveedores/eliminar/<int:proveedor_id>/', proveedor_eliminar, name='proveedor_eliminar'),
     path('proveedores/<int:proveedor_id>/', proveedor_detalle, name='proveedor_detalle'),
 
-    # Órdenes de compra y Alertas: archivadas.
+    # Órdenes de compra
+    path('ordenes/', orden_lista, name='orden_lista'),
+    path('ordenes/crear/', orden_crear, name='orden_crear'),
+    path('ordenes/recibir/', orden_recibir_lote, name='orden_recibir_lote'),
+    path('ordenes/<int:orden_id>/', orden_detalle, name='orden_detalle'),
+    path('ordenes/<int:orden_id>/editar/', orden_editar, name='orden_editar'),
+    path('ordenes/<int:orden_id>/cancelar/', orden_cancelar, name='orden_cancelar'),
+    path('ordenes/<int:orden_id>/recibir/', orden_recibir, name='orden_recibir'),
+
+    # Alertas: archivadas.
     # Si necesitas restaurarlas mueve los archivos desde `backend/archived/20251123_orders_alerts/`
     # y añade las rutas correspondientes aquí.
 
@@ -1,6 +1,5 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.contrib.auth.decorators import login_required, user_passes_test # Se añade user_passes_test
 from rest_framework import viewsets
 from decimal import Decimal
 from django.http import JsonResponse
@@ -9,7 +8,7 @@ from reportlab.lib.pagesizes import letter
 from django.db.models import Sum, Count # Importación necesaria para el dashboard
 
 # IMPORTACIONES ADICIONALES
-from accounts.views import es_admin # Importa la función de chequeo de Admin
+from mytienda.accesos import requiere
 # FIN IMPORTACIONES ADICIONALES
 
 from .models import (
@@ -17,6 +16,7 @@ from .models import (
     Proveedor, OrdenCompra, AlertaInventario
 )
 from ventas.models import Venta, DetalleVenta
+from mytienda.paginacion import paginar, urls_paginacion
 from .serializers import ProductoSerializer, InventarioSerializer
 
 
@@ -31,8 +31,7 @@ class InventarioViewSet(viewsets.ModelViewSet):
     queryset = Inventario.objects.all()
     serializer_class = InventarioSerializer
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login')
+@requiere('gestion')
 def api_producto_create(request):
     """API simple para crear un Producto mínimo y opcionalmente un movimiento de Inventario.
     Form data accepted: codigo, nombre, precio_compra, precio_venta, cantidad_inicial (opcional)
@@ -127,9 +126,7 @@ def api_productos_search(request):
 
 # ==================== DASHBOARD ====================
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO: Usando nombre de ruta 'login'
-@login_required(login_url='login')
+@requiere('gestion')
 def inventario_dashboard(request):
     """Dashboard simple del home - solo datos básicos"""
     
@@ -139,7 +136,8 @@ def inventario_dashboard(request):
     
     total_productos = productos.count()
     # Aseguramos que la importación de Sum se haga al inicio
-    stock_total = productos.aggregate(total=Sum('stock'))['total'] or 0
+    totales = productos.aggregate(total=Sum('stock'), valor=Sum('valor_inventario'))
+    stock_total = totales['total'] or 0
     bajo_stock = productos.filter(stock__lte=5).count()
 
     context = {
@@ -147,30 +145,22 @@ def inventario_dashboard(request):
         'movimientos': movimientos,
         'total_productos': total_productos,
         'stock_total': stock_total,
+        'valor_inventario': totales['valor'] or 0,
         'bajo_stock': bajo_stock,
     }
     return render(request, 'inventario/dashboard.html', context)
-    try:
-        filtered = [ (n,u) for (n,u) in request.menu_items if ('orden' not in n.lower() and 'alert' not in n.lower()) ]
-    except Exception:
-        filtered = None
-    if filtered is not None:
-        context['menu_items'] = filtered
-    return render(request, 'inventario/dashboard.html', context)
 
 
 # ==================== PRODUCTOS ====================
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') 
+@requiere('gestion')
 def producto_lista(request):
     # ✅ OPTIMIZACIÓN: Cargar solo productos activos sin queries adicionales
     productos = Producto.objects.filter(activo=True).order_by('nombre')  # Solo productos activos
     return render(request, 'inventario/producto_lista.html', {'productos': productos})
 
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO
+@requiere('gestion')
 def producto_crear(request):
     if request.method == 'POST':
         try:
@@ -220,8 +210,7 @@ def verificar_codigo_producto(request):
     return JsonResponse({'existe': existe})
 
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login')
+@requiere('gestion')
 def producto_editar(request, producto_id):
     producto = get_object_or_404(Producto, id=producto_id)
     
@@ -244,7 +233,8 @@ def producto_editar(request, producto_id):
             producto.nombre = nombre
             producto.precio_compra = float(precio_compra)
             producto.precio_venta = float(precio_venta)
-            producto.save()
+            # Solo los campos del formulario: stock y costos los mantienen los movimientos
+            producto.save(update_fields=['nombre', 'precio_compra', 'precio_venta'])
             messages.success(request, f'Producto "{nombre}" actualizado exitosamente')
             return redirect('producto_lista')
 
@@ -255,8 +245,7 @@ def producto_editar(request, producto_id):
     return render(request, 'inventario/producto_form.html', {'producto': producto, 'editar': True})
 
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login')
+@requiere('gestion')
 def producto_eliminar(request, producto_id):
     producto = get_object_or_404(Producto, id=producto_id)
     
@@ -271,8 +260,7 @@ def producto_eliminar(request, producto_id):
 
 # ==================== MOVIMIENTOS ====================
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO
+@requiere('gestion')
 def inventario_movimiento(request):
     if request.method == 'POST':
         try:
@@ -319,16 +307,14 @@ def inventario_movimiento(request):
 
 # ==================== PROVEEDORES ====================
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO
+@requiere('gestion')
 def proveedor_lista(request):
     # ✅ OPTIMIZACIÓN: Cargar proveedores sin queries adicionales
     proveedores = Proveedor.objects.all().order_by('nombre')
     return render(request, 'inventario/proveedor_lista.html', {'proveedores': proveedores})
 
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO
+@requiere('gestion')
 def proveedor_crear(request):
     if request.method == 'POST':
         nombre = request.POST.get('nombre', '').strip()
@@ -348,7 +334,7 @@ def proveedor_crear(request):
             return render(request, 'inventario/proveedor_form.html', context)
 
         # Validar correo único (case-insensitive)
-        if Proveedor.objects.filter(correo__iexact=correo).exists():
+        if Proveedor.objects.filter(correo=correo).exists():
             messages.error(request, f"El correo '{correo}' ya está registrado con otro proveedor")
             return render(request, 'inventario/proveedor_form.html', context)
 
@@ -370,11 +356,10 @@ def proveedor_crear(request):
 # Esta función helper no necesita el decorador si solo es llamada por AJAX y la vista principal está protegida
 def verificar_correo_proveedor(request):
     correo = request.GET.get('correo', '').strip().lower()
-    existe = Proveedor.objects.filter(correo__iexact=correo).exists()
+    existe = Proveedor.objects.filter(correo=correo).exists()
     return JsonResponse({'existe': existe})
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO
+@requiere('gestion')
 def proveedor_editar(request, proveedor_id):
     prov = get_object_or_404(Proveedor, id=proveedor_id)
     if request.method == 'POST':
@@ -391,7 +376,7 @@ def proveedor_editar(request, proveedor_id):
 
         # Validar correo único (pero permite el mismo correo del proveedor actual)
         if correo != prov.correo.lower():
-            if Proveedor.objects.filter(correo__iexact=correo).exists():
+            if Proveedor.objects.filter(correo=correo).exists():
                 messages.error(request, f"El correo '{correo}' ya está registrado con otro proveedor")
                 return render(request, 'inventario/proveedor_form.html', context)
 
@@ -410,8 +395,7 @@ def proveedor_editar(request, proveedor_id):
     return render(request, 'inventario/proveedor_form.html', {'proveedor': prov, 'editar': True})
 
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO
+@requiere('gestion')
 def proveedor_eliminar(request, proveedor_id):
     prov = get_object_or_404(Proveedor, id=proveedor_id)
     if request.method == 'POST':
@@ -422,70 +406,160 @@ def proveedor_eliminar(request, proveedor_id):
     return render(request, 'inventario/proveedor_confirm_delete.html', {'proveedor': prov})
 
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO
+@requiere('gestion')
 def proveedor_detalle(request, proveedor_id):
     prov = get_object_or_404(Proveedor, id=proveedor_id)
-    ordenes = prov.ordenes.all().order_by('-fecha_creacion')
+    ordenes = prov.ordenes.select_related('producto').order_by('-fecha_creacion')
     return render(request, 'inventario/proveedor_detalle.html', {'proveedor': prov, 'ordenes': ordenes})
 
 
 # ==================== ÓRDENES ====================
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO
+def _datos_orden(request):
+    """Lee y valida el formulario de orden. Devuelve (datos, error)."""
+    try:
+        proveedor = Proveedor.objects.get(id=int(request.POST.get('proveedor', '')))
+        producto = Producto.objects.get(id=int(request.POST.get('producto', '')), activo=True)
+        cantidad = int(request.POST.get('cantidad', ''))
+        costo = Decimal(request.POST.get('costo_unitario', '').strip())
+    except (ValueError, ArithmeticError, Proveedor.DoesNotExist, Producto.DoesNotExist):
+        return None, 'Completa proveedor, producto, cantidad y costo con valores válidos.'
+    if cantidad <= 0 or not costo.is_finite() or costo < 0:
+        return None, 'La cantidad debe ser mayor que 0 y el costo no puede ser negativo.'
+    return {
+        'proveedor': proveedor,
+        'producto': producto,
+        'cantidad': cantidad,
+        'costo_unitario': costo,
+        'subtotal': cantidad * costo,
+    }, None
+
+
+@requiere('gestion')
 def orden_lista(request):
-    # Archived: moved to backend/archived/20251123_orders_alerts/views_archived.py
-    # Render a minimal notice template so routes remain available but inform users.
-    return render(request, 'inventario/orden_archived_notice.html')
+    """Órdenes de compra, pendientes primero; desde aquí se reciben en lote."""
+    estado = request.GET.get('estado', 'PENDIENTE')
+    ordenes = OrdenCompra.objects.select_related('proveedor', 'producto')
+    if estado in dict(OrdenCompra.ESTADOS):
+        ordenes = ordenes.filter(estado=estado)
+    proveedor_id = request.GET.get('proveedor', '')
+    if proveedor_id.isdigit():
+        ordenes = ordenes.filter(proveedor_id=proveedor_id)
+
+    ordenes, siguiente = paginar(ordenes, request.GET.get('cursor'), campo='fecha_creacion', tamano=200)
+    siguiente_url, primera_url = urls_paginacion(request, siguiente)
+
+    return render(request, 'inventario/orden_lista.html', {
+        'ordenes': ordenes,
+        'estado': estado,
+        'estados': OrdenCompra.ESTADOS,
+        'proveedores': Proveedor.objects.order_by('nombre').only('id', 'nombre'),
+        'proveedor_id': proveedor_id,
+        'siguiente_url': siguiente_url,
+        'primera_url': primera_url,
+    })
 
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO
+@requiere('gestion')
 def orden_crear(request):
-    # Archived: moved implementation to archived views file.
-    return render(request, 'inventario/orden_archived_notice.html')
+    contexto = {
+        'proveedores': Proveedor.objects.order_by('nombre'),
+        'productos': Producto.objects.filter(activo=True).order_by('nombre'),
+    }
+    if request.method == 'POST':
+        datos, error = _datos_orden(request)
+        if error:
+            messages.error(request, error)
+            return render(request, 'inventario/orden_form.html', contexto)
+        orden = OrdenCompra.objects.create(**datos)
+        messages.success(request, f'Orden OC-{orden.id} creada')
+        return redirect('orden_lista')
+    return render(request, 'inventario/orden_form.html', contexto)
 
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO
+@requiere('gestion')
 def orden_recibir(request, orden_id):
-    # Archived: moved to archived views file.
-    return render(request, 'inventario/orden_archived_notice.html')
+    """Recibe una orden (solo POST)."""
+    orden = get_object_or_404(OrdenCompra, id=orden_id)
+    if request.method == 'POST':
+        if orden.recibir():
+            messages.success(request, f'Orden OC-{orden.id} recibida: +{orden.cantidad} unidades')
+        else:
+            messages.warning(request, f'La orden OC-{orden.id} ya no estaba pendiente')
+    return redirect('orden_detalle', orden_id=orden.id)
 
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO
+@requiere('gestion')
+def orden_recibir_lote(request):
+    """Recibe todas las órdenes marcadas en el listado en una sola transacción."""
+    if request.method == 'POST':
+        ids = [int(i) for i in request.POST.getlist('ordenes') if i.isdigit()]
+        recibidas = OrdenCompra.recibir_lote(ids)
+        omitidas = len(set(ids)) - len(recibidas)
+        if recibidas:
+            unidades = sum(o.cantidad for o in recibidas)
+            messages.success(request, f'{len(recibidas)} órdenes recibidas ({unidades} unidades)')
+        if omitidas:
+            messages.warning(request, f'{omitidas} órdenes ya no estaban pendientes y se omitieron')
+        if not ids:
+            messages.error(request, 'Selecciona al menos una orden')
+    return redirect('orden_lista')
+
+
+@requiere('gestion')
 def orden_detalle(request, orden_id):
-    # Archived: moved to archived views file.
-    return render(request, 'inventario/orden_archived_notice.html')
+    orden = get_object_or_404(OrdenCompra.objects.select_related('proveedor', 'producto'), id=orden_id)
+    return render(request, 'inventario/orden_detalle.html', {'orden': orden})
 
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO
+@requiere('gestion')
 def orden_editar(request, orden_id):
-    # Archived: moved to archived views file.
-    return render(request, 'inventario/orden_archived_notice.html')
+    orden = get_object_or_404(OrdenCompra, id=orden_id)
+    if orden.estado != 'PENDIENTE':
+        messages.error(request, 'Solo se pueden editar órdenes pendientes')
+        return redirect('orden_detalle', orden_id=orden.id)
+
+    contexto = {
+        'orden': orden,
+        'editar': True,
+        'proveedores': Proveedor.objects.order_by('nombre'),
+        'productos': Producto.objects.filter(activo=True).order_by('nombre'),
+    }
+    if request.method == 'POST':
+        datos, error = _datos_orden(request)
+        if error:
+            messages.error(request, error)
+            return render(request, 'inventario/orden_form.html', contexto)
+        # Solo si sigue pendiente (pudo recibirse mientras se editaba)
+        if not OrdenCompra.objects.filter(id=orden.id, estado='PENDIENTE').update(**datos):
+            messages.error(request, 'La orden ya no está pendiente')
+        else:
+            messages.success(request, f'Orden OC-{orden.id} actualizada')
+        return redirect('orden_detalle', orden_id=orden.id)
+    return render(request, 'inventario/orden_form.html', contexto)
 
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO
+@requiere('gestion')
 def orden_cancelar(request, orden_id):
-    # Archived: moved to archived views file.
-    return render(request, 'inventario/orden_archived_notice.html')
+    orden = get_object_or_404(OrdenCompra.objects.select_related('producto'), id=orden_id)
+    if request.method == 'POST':
+        if OrdenCompra.objects.filter(id=orden.id, estado='PENDIENTE').update(estado='CANCELADA'):
+            messages.success(request, f'Orden OC-{orden.id} cancelada')
+        else:
+            messages.error(request, 'Solo se pueden cancelar órdenes pendientes')
+        return redirect('orden_lista')
+    return render(request, 'inventario/orden_confirm_cancel.html', {'orden': orden})
 
 
 # ==================== ALERTAS ====================
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO
+@requiere('gestion')
 def alertas_lista(request):
     # Archived: moved to backend/archived/20251123_orders_alerts/views_archived.py
     return render(request, 'inventario/alertas_archived_notice.html')
 
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO
+@requiere('gestion')
 def alerta_marcar_leida(request, alerta_id):
     # Archived: moved to archived views file.
     return render(request, 'inventario/alertas_archived_notice.html')
\ No newline at end of file
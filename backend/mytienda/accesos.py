@@ -0,0 +1,129 @@
+"""
+Registro de roles, áreas de acceso y menú lateral.
+
+Todo lo que decide quién entra a qué está declarado aquí:
+
+- ``AREAS``: qué roles tienen acceso a cada área de la aplicación. Las vistas
+  declaran su área con ``@requiere('gestion')`` (o ``RequiereAreaMixin``) y
+  quedan anotadas en ``RUTAS``.
+- ``MENU``: entradas del menú lateral y los roles que las ven.
+
+Las rutas ``/api/`` usan ``permiso_area(area)``, que lee el rol del claim
+del JWT en lugar del usuario de la sesión.
+
+Al importar el módulo se compilan a tablas de búsqueda (área -> roles,
+rol -> menú), así cada chequeo es una consulta de diccionario/conjunto. El
+menú no se arma por petición: el context processor ``menu`` lo entrega como
+objeto perezoso y solo se resuelve si una plantilla lo recorre.
+"""
+from functools import wraps
+
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.permissions import BasePermission
+
+ADMIN = "ADMIN"
+CAJERO = "CAJERO"
+# Cualquier otro valor de User.rol (solo para el menú)
+OTRO = "*"
+
+# Área -> roles con acceso
+AREAS = {
+    # Inventario, compras, proveedores, reportes y usuarios
+    'gestion': (ADMIN,),
+    # Punto de venta: ventas, caja y devoluciones
+    'caja': (ADMIN, CAJERO),
+}
+
+# Menú lateral en orden: (nombre, url, roles que lo ven)
+MENU = (
+    ("Home", "/", (ADMIN, OTRO)),
+    ("Usuarios", "/usuarios/", (ADMIN,)),
+    ("Venta", "/ventas/crear/", (CAJERO,)),
+    ("Mis Ventas", "/ventas/mis-ventas/", (CAJERO,)),
+    ("Inventario", "/inventario/productos/", (ADMIN, OTRO)),
+    ("Ventas", "/ventas/", (ADMIN, OTRO)),
+    ("Caja", "/ventas/turno/", (ADMIN, CAJERO)),
+    ("Compras", "/compras/", (ADMIN, OTRO)),
+    ("Órdenes", "/inventario/ordenes/", (ADMIN,)),
+    ("Proveedores", "/inventario/proveedores/", (ADMIN, OTRO)),
+    ("Devoluciones", "/devoluciones/", (ADMIN, CAJERO, OTRO)),
+    ("Reportes", "/reportes/", (ADMIN,)),
+)
+
+# Tablas compiladas
+_ROLES_POR_AREA = {area: frozenset(roles) for area, roles in AREAS.items()}
+_MENU_POR_ROL = {
+    rol: tuple((nombre, url) for nombre, url, roles in MENU if rol in roles)
+    for rol in (ADMIN, CAJERO, OTRO)
+}
+
+# Vista (módulo.nombre) -> área; lo llena @requiere al importar las vistas
+RUTAS = {}
+
+
+def roles_de(area):
+    try:
+        return _ROLES_POR_AREA[area]
+    except KeyError:
+        raise ImproperlyConfigured(f"Área de acceso desconocida: {area!r}")
+
+
+def tiene_acceso(user, area):
+    return user.is_authenticated and user.rol in roles_de(area)
+
+
+def menu_para(user):
+    if not user.is_authenticated:
+        return ()
+    return _MENU_POR_ROL.get(user.rol, _MENU_POR_ROL[OTRO])
+
+
+def requiere(area, login_url='login'):
+    """
+    Restringe una vista a los roles del área. Sin sesión o con otro rol
+    redirige al login, igual que login_required + user_passes_test.
+    """
+    roles = roles_de(area)
+
+    def decorador(vista):
+        RUTAS[f"{vista.__module__}.{vista.__name__}"] = area
+
+        @wraps(vista)
+        def envuelta(request, *args, **kwargs):
+            user = request.user
+            if user.is_authenticated and user.rol in roles:
+                return vista(request, *args, **kwargs)
+            return redirect_to_login(request.get_full_path(), login_url)
+        return envuelta
+    return decorador
+
+
+class RequiereAreaMixin:
+    """Equivalente a @requiere para vistas basadas en clases (atributo ``area``)."""
+    area = None
+    login_url = 'login'
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.area is not None:
+            roles_de(cls.area)
+            RUTAS[f"{cls.__module__}.{cls.__name__}"] = cls.area
+
+    def dispatch(self, request, *args, **kwargs):
+        if not tiene_acceso(request.user, self.area):
+            return redirect_to_login(request.get_full_path(), self.login_url)
+        return super().dispatch(request, *args, **kwargs)
+
+
+def permiso_area(area):
+    """Permiso DRF para las rutas /api/: compara el claim ``rol`` del token con el área."""
+    roles = roles_de(area)
+
+    class PermisoArea(BasePermission):
+        def has_permission(self, request, view):
+            token = request.auth
+            return token is not None and token.get('rol') in roles
+
+    PermisoArea.__name__ = f'PermisoArea_{area}'
+    return PermisoArea
@@ -0,0 +1,174 @@
+"""
+Helpers sobre la caché del proyecto (``CACHES['default']``, ver settings).
+
+- Claves por partes: ``obtener(('dashboard', 'kpis', hoy), calcular)``. La
+  primera parte es el espacio de nombres con el que se cuentan aciertos y
+  fallos (``estadisticas()``).
+- Etiquetas con versión: cada etiqueta tiene un número de versión en la
+  caché que forma parte de la clave final. ``invalidar('catalogo')`` sube la
+  versión y todas las entradas con esa etiqueta dejan de encontrarse (expiran
+  solas con su TTL), sin recorrer ni borrar claves.
+- Protección contra estampidas: ante un fallo solo un proceso calcula el valor
+  (toma un candado con ``add``); los demás esperan hasta ``ESPERA_MAXIMA``
+  segundos a que aparezca y, si no aparece, lo calculan ellos mismos.
+- ``cache_de_prueba()`` cambia la caché por una ``LocMemCache`` aislada y
+  reinicia los contadores, para tests.
+
+Las versiones de etiqueta arrancan en la hora actual en milisegundos: si la
+clave de versión se pierde de la caché, la nueva nunca coincide con una vieja.
+"""
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+CANDADO_TTL = 30
+ESPERA_MAXIMA = 5
+INTERVALO_ESPERA = 0.05
+
+_FALTA = object()
+_contadores = Counter()
+_bloqueo_contadores = threading.Lock()
+_reemplazo = None
+
+
+def _cache():
+    return _reemplazo if _reemplazo is not None else caches['default']
+
+
+def clave(*partes):
+    """Clave de caché a partir de sus partes: ``clave('venta', 12, 'pdf') == 'venta:12:pdf'``."""
+    return ':'.join(str(p.isoformat() if hasattr(p, 'isoformat') else p) for p in partes)
+
+
+def _contar(espacio, evento):
+    with _bloqueo_contadores:
+        _contadores[(espacio, evento)] += 1
+
+
+# ===========================
+# ETIQUETAS
+# ===========================
+def _clave_etiqueta(etiqueta):
+    return f'etiqueta:{etiqueta}'
+
+
+def _versiones(etiquetas):
+    """Versión vigente de cada etiqueta (una sola lectura a la caché)."""
+    if not etiquetas:
+        return ()
+    cache = _cache()
+    claves = [_clave_etiqueta(e) for e in etiquetas]
+    encontradas = cache.get_many(claves)
+    versiones = []
+    for c in claves:
+        if c not in encontradas:
+            cache.add(c, int(time.time() * 1000), None)
+            encontradas[c] = cache.get(c)
+        versiones.append(encontradas[c])
+    return versiones
+
+
+def _clave_final(partes, etiquetas):
+    base = clave(*partes)
+    if not etiquetas:
+        return base
+    return base + '@' + '.'.join(str(v) for v in _versiones(etiquetas))
+
+
+def invalidar(*etiquetas):
+    """Invalida todas las entradas guardadas con cualquiera de las etiquetas."""
+    cache = _cache()
+    for etiqueta in etiquetas:
+        c = _clave_etiqueta(etiqueta)
+        try:
+            cache.incr(c)
+        except ValueError:
+            cache.add(c, int(time.time() * 1000), None)
+
+
+# ===========================
+# LECTURA / ESCRITURA
+# ===========================
+def obtener(partes, calcular, timeout=300, etiquetas=()):
+    """
+    Valor cacheado para ``partes`` o el resultado de ``calcular()``, que se
+    guarda con ``timeout`` segundos. Solo un proceso calcula a la vez.
+    """
+    cache = _cache()
+    espacio = str(partes[0])
+    k = _clave_final(partes, etiquetas)
+    valor = cache.get(k, _FALTA)
+    if valor is not _FALTA:
+        _contar(espacio, 'aciertos')
+        return valor
+    _contar(espacio, 'fallos')
+
+    candado = f'{k}:candado'
+    token = uuid.uuid4().hex
+    if cache.add(candado, token, CANDADO_TTL):
+        try:
+            # Otro proceso pudo terminar entre la lectura y el candado
+            valor = cache.get(k, _FALTA)
+            if valor is _FALTA:
+                valor = calcular()
+                cache.set(k, valor, timeout)
+        finally:
+            if cache.get(candado) == token:
+                cache.delete(candado)
+        return valor
+
+    # Otro proceso lo está calculando: esperar su resultado
+    limite = time.monotonic() + ESPERA_MAXIMA
+    while time.monotonic() < limite:
+        time.sleep(INTERVALO_ESPERA)
+        valor = cache.get(k, _FALTA)
+        if valor is not _FALTA:
+            _contar(espacio, 'esperas')
+            return valor
+    valor = calcular()
+    cache.set(k, valor, timeout)
+    return valor
+
+
+def guardar(partes, valor, timeout=300, etiquetas=()):
+    _cache().set(_clave_final(partes, etiquetas), valor, timeout)
+
+
+def borrar(partes, etiquetas=()):
+    _cache().delete(_clave_final(partes, etiquetas))
+
+
+# ===========================
+# MÉTRICAS Y TESTS
+# ===========================
+def estadisticas():
+    """Aciertos, fallos y esperas por espacio de nombres, en este proceso."""
+    with _bloqueo_contadores:
+        resultado = {}
+        for (espacio, evento), n in _contadores.items():
+            resultado.setdefault(espacio, {'aciertos': 0, 'fallos': 0, 'esperas': 0})[evento] = n
+        return resultado
+
+
+def reiniciar_estadisticas():
+    with _bloqueo_contadores:
+        _contadores.clear()
+
+
+@contextmanager
+def cache_de_prueba():
+    """Usa una caché en memoria vacía y contadores en cero dentro del bloque."""
+    global _reemplazo
+    anterior = _reemplazo
+    _reemplazo = LocMemCache(f'prueba-{uuid.uuid4().hex}', {'TIMEOUT': 300})
+    reiniciar_estadisticas()
+    try:
+        yield _reemplazo
+    finally:
+        _reemplazo.clear()
+        _reemplazo = anterior
@@ -0,0 +1,40 @@
+"""
+Reutilización de conexiones a la base de datos, elegida con DB_CONEXIONES.
+
+- ``nueva``: una conexión por petición (CONN_MAX_AGE=0), el comportamiento
+  de Django por defecto.
+- ``persistente``: cada worker conserva su conexión hasta ``DB_CONN_MAX_AGE``
+  segundos. Con CONN_HEALTH_CHECKS Django la verifica antes de reutilizarla
+  en una petición nueva y abre otra si el servidor la cerró. Al terminar cada
+  petición se descarta si quedó con errores o con una transacción abierta.
+- ``pool``: pool del driver (psycopg 3 + psycopg_pool, solo PostgreSQL) con
+  ``DB_POOL_MIN``/``DB_POOL_MAX`` conexiones por proceso. Con psycopg2 no hay
+  pool a nivel driver: usar ``persistente`` o un pooler externo (PgBouncer).
+"""
+from importlib.util import find_spec
+
+from django.core.exceptions import ImproperlyConfigured
+
+MODOS = ('nueva', 'persistente', 'pool')
+
+
+def configurar(db, modo, max_age=600, pool_min=2, pool_max=10):
+    """Copia de la configuración `db` (un item de DATABASES) con el modo aplicado."""
+    db = dict(db)
+    if modo == 'nueva':
+        db['CONN_MAX_AGE'] = 0
+        db['CONN_HEALTH_CHECKS'] = False
+    elif modo == 'persistente':
+        db['CONN_MAX_AGE'] = max_age
+        db['CONN_HEALTH_CHECKS'] = True
+    elif modo == 'pool':
+        if db.get('ENGINE') != 'django.db.backends.postgresql':
+            raise ImproperlyConfigured("DB_CONEXIONES=pool solo está disponible con PostgreSQL")
+        if find_spec('psycopg') is None or find_spec('psycopg_pool') is None:
+            raise ImproperlyConfigured("DB_CONEXIONES=pool requiere instalar 'psycopg[pool]' (psycopg 3)")
+        # El pool administra la vida de las conexiones; Django exige CONN_MAX_AGE=0
+        db['CONN_MAX_AGE'] = 0
+        db['OPTIONS'] = {**db.get('OPTIONS', {}), 'pool': {'min_size': pool_min, 'max_size': pool_max}}
+    else:
+        raise ImproperlyConfigured(f"DB_CONEXIONES desconocido: {modo!r} (opciones: {', '.join(MODOS)})")
+    return db
@@ -0,0 +1,8 @@
+from django.utils.functional import SimpleLazyObject
+
+from .accesos import menu_para
+
+
+def menu(request):
+    """Menú lateral del rol; se resuelve solo si la plantilla lo usa."""
+    return {'menu_items': SimpleLazyObject(lambda: menu_para(request.user))}
@@ -0,0 +1,59 @@
+"""
+Rangos de fechas para filtrar columnas DateTimeField.
+
+Los reportes trabajan con días completos (``2025-01-01`` a ``2025-01-31``) en
+la zona horaria de la tienda (``settings.TIME_ZONE``). Filtrar con
+``fecha__date__gte`` obliga a la base de datos a convertir cada fila antes de
+comparar y no puede usar el índice de ``fecha``; estas funciones traducen el
+rango de días a un intervalo semiabierto ``[inicio, fin)`` de datetimes que sí
+usa el índice.
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+
+def hoy():
+    """Fecha actual en la zona horaria de la tienda."""
+    if settings.USE_TZ:
+        return timezone.localdate()
+    return date.today()
+
+
+def parse_fecha(valor):
+    """Convierte 'YYYY-MM-DD' (p. ej. de request.GET) en date; None si viene vacío o es inválido."""
+    try:
+        return date.fromisoformat(valor) if valor else None
+    except ValueError:
+        return None
+
+
+def dia_local(fecha):
+    """Día (en la zona horaria de la tienda) al que pertenece una fecha/hora."""
+    if timezone.is_aware(fecha):
+        return timezone.localtime(fecha).date()
+    return fecha.date()
+
+
+def inicio_dia(dia):
+    """Primer instante del día en la zona horaria de la tienda."""
+    inicio = datetime.combine(dia, time.min)
+    if settings.USE_TZ:
+        return timezone.make_aware(inicio)
+    return inicio
+
+
+def filtro_dias(campo, desde=None, hasta=None):
+    """
+    kwargs de filtro para los días [desde, hasta] sobre el DateTimeField `campo`.
+    Cualquiera de los extremos puede omitirse.
+
+        Venta.objects.filter(**filtro_dias('fecha', inicio, fin))
+    """
+    filtro = {}
+    if desde is not None:
+        filtro[f'{campo}__gte'] = inicio_dia(desde)
+    if hasta is not None:
+        filtro[f'{campo}__lt'] = inicio_dia(hasta + timedelta(days=1))
+    return filtro
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.contrib.sessions.backends.base import SessionBase
+from django.contrib.sessions.middleware import SessionMiddleware
+
+
+class SesionNula(SessionBase):
+    """Sesión vacía que nunca lee ni escribe en el almacenamiento."""
+
+    def load(self):
+        return {}
+
+    def exists(self, session_key):
+        return False
+
+    def create(self):
+        pass
+
+    def save(self, must_create=False):
+        pass
+
+    def delete(self, session_key=None):
+        pass
+
+
+class SesionSalvoApiMiddleware(SessionMiddleware):
+    """
+    SessionMiddleware que deja fuera las rutas bajo API_PREFIX: ahí la
+    autenticación es por JWT, así que no se carga la sesión de la cookie ni
+    se guarda al responder (ni se envía Set-Cookie).
+    """
+
+    def process_request(self, request):
+        if request.path_info.startswith(settings.API_PREFIX):
+            request.session = SesionNula()
+        else:
+            super().process_request(request)
+
+    def process_response(self, request, response):
+        if isinstance(getattr(request, 'session', None), SesionNula):
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,17 @@
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+
+from accounts.sesion import obtener_usuario
+
+
+class UsuarioSesionMiddleware(AuthenticationMiddleware):
+    """
+    Igual que AuthenticationMiddleware, pero request.user sale de la copia
+    guardada en la sesión mientras su versión siga vigente (sin consultar
+    la tabla de usuarios). Con una caché ``locmem`` no hay copias: se comporta
+    igual que AuthenticationMiddleware.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: obtener_usuario(request))
@@ -0,0 +1,80 @@
+"""
+Paginación por clave (keyset) para listados que crecen sin límite.
+
+En lugar de ``OFFSET`` (que obliga a la base de datos a recorrer y descartar
+todas las filas anteriores) cada página continúa desde la última fila vista:
+``WHERE (campo, id) < (valor, último_id) ORDER BY campo DESC, id DESC``.
+Con un índice sobre ``(campo, id)`` el coste de cualquier página es constante.
+
+El cursor que viaja en la URL es opaco: base64 de ``valor|id``.
+``urls_paginacion`` arma los enlaces de página conservando los filtros de la URL.
+"""
+import base64
+import binascii
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+TAMANO_PAGINA = 50
+
+
+def codificar_cursor(valor, pk):
+    if hasattr(valor, 'isoformat'):
+        valor = valor.isoformat()
+    texto = f"{valor}|{pk}"
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, campo):
+    """Devuelve (valor, pk) del cursor, o None si no es válido."""
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        texto = base64.urlsafe_b64decode(cursor + relleno).decode()
+        valor, pk = texto.rsplit('|', 1)
+        return campo.to_python(valor), int(pk)
+    except (ValueError, TypeError, ValidationError, binascii.Error, UnicodeDecodeError):
+        return None
+
+
+def paginar(queryset, cursor=None, campo='fecha', tamano=TAMANO_PAGINA):
+    """
+    Devuelve ``(filas, siguiente_cursor)`` ordenando por ``campo`` e ``id``
+    descendentes. ``siguiente_cursor`` es None en la última página.
+    Un cursor inválido se trata como la primera página.
+    """
+    queryset = queryset.order_by(f'-{campo}', '-pk')
+    if cursor:
+        posicion = decodificar_cursor(cursor, queryset.model._meta.get_field(campo))
+        if posicion is not None:
+            valor, pk = posicion
+            queryset = queryset.filter(
+                Q(**{f'{campo}__lt': valor}) | Q(**{campo: valor, 'pk__lt': pk})
+            )
+
+    filas = list(queryset[:tamano + 1])
+    siguiente = None
+    if len(filas) > tamano:
+        filas = filas[:tamano]
+        ultima = filas[-1]
+        siguiente = codificar_cursor(getattr(ultima, campo), ultima.pk)
+    return filas, siguiente
+
+
+def urls_paginacion(request, siguiente):
+    """
+    ``(siguiente_url, primera_url)`` para la plantilla: la query string actual
+    con el cursor de la página siguiente, y sin cursor para volver al inicio.
+    Cada una es None si no aplica (última página / ya en la primera).
+    """
+    siguiente_url = None
+    if siguiente:
+        params = request.GET.copy()
+        params['cursor'] = siguiente
+        siguiente_url = f'?{params.urlencode()}'
+    primera_url = None
+    if 'cursor' in request.GET:
+        primera = request.GET.copy()
+        primera.pop('cursor')
+        primera_url = f'?{primera.urlencode()}'
+    return siguiente_url, primera_url
@@ -1,6 +1,11 @@
+from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
-from decouple import config  
+from decouple import config, Choices
 import dj_database_url 
+from django.core.exceptions import ImproperlyConfigured
+
+from mytienda import conexiones
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -41,14 +46,14 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    # SessionMiddleware salvo en API_PREFIX (rutas JWT sin sesión)
+    'mytienda.middleware.api_sin_sesion.SesionSalvoApiMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # AuthenticationMiddleware con el usuario cacheado en sesión (accounts/sesion.py)
+    'mytienda.middleware.usuario_sesion.UsuarioSesionMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-   
-    'mytienda.middleware.role_menu.RoleMenuMiddleware',
 ]
 
 ROOT_URLCONF = 'mytienda.urls'
@@ -63,6 +68,8 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                # Menú lateral según el rol (ver mytienda/accesos.py)
+                'mytienda.context_processors.menu',
             ],
             'builtins': [
                 'inventario.templatetags.currency_filter',
@@ -74,8 +81,15 @@ TEMPLATES = [
 WSGI_APPLICATION = 'mytienda.wsgi.application'
 
 # Lee directamente del env
+# Reutilización de conexiones: 'nueva', 'persistente' o 'pool' (ver mytienda/conexiones.py)
 DATABASES = {
-    'default': dj_database_url.parse(config('DATABASE_URL'))
+    'default': conexiones.configurar(
+        dj_database_url.parse(config('DATABASE_URL')),
+        config('DB_CONEXIONES', default='nueva', cast=Choices(list(conexiones.MODOS))),
+        max_age=config('DB_CONN_MAX_AGE', default=600, cast=int),
+        pool_min=config('DB_POOL_MIN', default=2, cast=int),
+        pool_max=config('DB_POOL_MAX', default=10, cast=int),
+    )
 }
 
 # Validadores de contraseña
@@ -87,10 +101,16 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 LANGUAGE_CODE = 'en-us'
-TIME_ZONE = 'UTC'
+# Zona horaria de la tienda: define qué es "un día" en reportes y filtros por fecha
+TIME_ZONE = config('TIME_ZONE', default='UTC')
 USE_I18N = True
 USE_TZ = True
 
+# Reportes en segundo plano (ver reportes/jobs.py y el comando run_report_jobs)
+# Rangos de este número de días o más se encolan en lugar de calcularse en la petición
+REPORTES_ASYNC_DIAS = config('REPORTES_ASYNC_DIAS', default=92, cast=int)
+REPORTES_JOBS_DIR = config('REPORTES_JOBS_DIR', default=str(BASE_DIR / 'report_jobs'))
+
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [BASE_DIR / 'static']
@@ -104,6 +124,51 @@ AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend', # Backend por defecto
 ]
 
+# Caché: 'locmem' (propia de cada proceso), 'file' (compartida entre procesos
+# de la misma máquina) o 'redis' (cualquier servidor compatible; requiere el
+# paquete `redis`). CACHE_LOCATION cambia la ubicación por defecto de cada una.
+# Para helpers de claves versionadas y etiquetas ver mytienda/cacheado.py.
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem', cast=Choices(['locmem', 'file', 'redis']))
+_CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'mytienda'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', '/var/tmp/mytienda-cache'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+if CACHE_BACKEND == 'redis' and find_spec('redis') is None:
+    raise ImproperlyConfigured("CACHE_BACKEND=redis requiere instalar el paquete 'redis'")
+CACHES = {
+    'default': {
+        'BACKEND': _CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': config('CACHE_LOCATION', default=_CACHE_BACKENDS[CACHE_BACKEND][1]),
+        'TIMEOUT': config('CACHE_TIMEOUT', default=300, cast=int),
+        'KEY_PREFIX': 'mytienda',
+    }
+}
+
+# Sesiones: 'db' (tabla django_session) o 'cached_db' (lee de la caché y
+# escribe en la caché y en la BD). Con cached_db y varios procesos la caché
+# debe ser compartida. Las expiradas se borran con `manage.py purgar_sesiones`.
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + config(
+    'SESSION_BACKEND', default='db', cast=Choices(['db', 'cached_db'])
+)
+SESSION_CACHE_ALIAS = 'default'
+
+# Usuario autenticado cacheado en sesión (ver accounts/sesion.py). Solo se usa
+# si la caché es compartida entre procesos (file, redis); con locmem cada
+# petición carga el usuario de la BD.
+AUTH_USER_CACHE = 'default'
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=300, cast=int)
+
+# Límite de intentos de login (ver accounts/limite_login.py): fallos por IP y
+# por cuenta dentro de la ventana antes de bloquear durante LOGIN_BLOQUEO segundos.
+LOGIN_CACHE = 'default'
+LOGIN_VENTANA = config('LOGIN_VENTANA', default=300, cast=int)
+LOGIN_MAX_FALLOS_IP = config('LOGIN_MAX_FALLOS_IP', default=50, cast=int)
+LOGIN_MAX_FALLOS_CUENTA = config('LOGIN_MAX_FALLOS_CUENTA', default=5, cast=int)
+LOGIN_BLOQUEO = config('LOGIN_BLOQUEO', default=900, cast=int)
+# Detrás de un proxy: cabecera con la IP del cliente (p. ej. HTTP_X_REAL_IP)
+LOGIN_IP_HEADER = config('LOGIN_IP_HEADER', default=None)
+
 
 #CORS_ALLOWED_ALL_ORIGINS = True
 CORS_ALLOWED_ORIGINS = [
@@ -117,5 +182,15 @@ REST_FRAMEWORK = {
     )
 }
 
+# Rutas JSON del cliente React: JWT con el rol en el token, sin sesión ni CSRF
+API_PREFIX = '/api/'
+SIMPLE_JWT = {
+    # Corto: el access token no se revoca, un cambio de rol aplica al renovarlo
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=config('JWT_ACCESS_MINUTOS', default=5, cast=int)),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=config('JWT_REFRESH_DIAS', default=1, cast=int)),
+    'TOKEN_OBTAIN_SERIALIZER': 'accounts.serializers.TokenConRolSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.TokenRefreshConRolSerializer',
+}
+
 # Configuración de manejo de errores 
 handler403 = "mi_tienda.views.error_403"
\ No newline at end of file
@@ -3,6 +3,8 @@ from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import RedirectView
 
+from ventas.api import ProductoBusquedaAPI, VentaCrearAPI
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -26,4 +28,10 @@ urlpatterns = [
     path('reportes/', include('reportes.urls', namespace='reportes')),
     # ruta devoluciones
     path('devoluciones/', include('devoluciones.urls')),
+
+    # API JSON (JWT, sin sesión ni CSRF; ver API_PREFIX en settings)
+    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/productos/buscar/', ProductoBusquedaAPI.as_view(), name='api_caja_productos_buscar'),
+    path('api/ventas/', VentaCrearAPI.as_view(), name='api_caja_venta_crear'),
 ]
\ No newline at end of file
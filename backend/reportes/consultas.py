@@ -0,0 +1,172 @@
+"""
+Consultas de los reportes de ventas.
+
+Se comparten entre las vistas (ejecución inmediata) y los jobs de reportes
+(ejecución en segundo plano con ``run_report_jobs``).
+"""
+import csv
+from decimal import Decimal
+
+from django.db.models import Sum, Count, F, Max, DecimalField, ExpressionWrapper
+from django.db.models.functions import Coalesce, TruncDate
+
+from mytienda.fechas import dia_local, filtro_dias
+from ventas.models import Venta, DetalleVenta
+
+
+def datos_ventas_por_periodo(fecha_inicio, fecha_fin):
+    """Contexto del reporte de ventas agrupadas por día."""
+    # ✅ OPTIMIZACIÓN: select_related para usuario evita N+1 queries
+    # Obtener todas las ventas en el período
+    ventas_raw = (
+        Venta.objects
+        .select_related('usuario')
+        .filter(**filtro_dias('fecha', fecha_inicio, fecha_fin))
+        .order_by('fecha')
+    )
+
+    # Procesar datos manualmente para agrupar por día
+    ventas_dict = {}
+    for venta in ventas_raw:
+        dia = dia_local(venta.fecha)
+        if dia not in ventas_dict:
+            ventas_dict[dia] = {
+                'dia': dia,
+                'total_dia': Decimal(0),
+                'num_transacciones': 0,
+                'iva_total': Decimal(0),
+                'descuentos': Decimal(0)
+            }
+        ventas_dict[dia]['total_dia'] += venta.total_final or Decimal(0)
+        ventas_dict[dia]['num_transacciones'] += 1
+        ventas_dict[dia]['iva_total'] += venta.iva_total or Decimal(0)
+        ventas_dict[dia]['descuentos'] += venta.descuento_general or Decimal(0)
+
+    ventas = list(ventas_dict.values())
+
+    total_ventas = sum(v['total_dia'] for v in ventas)
+    total_transacciones = sum(v['num_transacciones'] for v in ventas)
+    total_iva = sum(v['iva_total'] for v in ventas)
+    total_descuentos = sum(v['descuentos'] for v in ventas)
+
+    return {
+        'ventas': ventas,
+        'fecha_inicio': fecha_inicio,
+        'fecha_fin': fecha_fin,
+        'total_ventas': total_ventas,
+        'total_transacciones': total_transacciones,
+        'total_iva': total_iva,
+        'total_descuentos': total_descuentos,
+        'promedio_venta': total_ventas / total_transacciones if total_transacciones > 0 else 0,
+    }
+
+
+def datos_ventas_por_cajero(fecha_inicio, fecha_fin):
+    """Contexto del reporte de ventas agrupadas por usuario/cajero."""
+    ventas_por_usuario = list(
+        Venta.objects
+        .filter(**filtro_dias('fecha', fecha_inicio, fecha_fin))
+        .values('usuario_id', usuario_nombre=F('usuario__username'))
+        .annotate(
+            total_vendido=Coalesce(Sum('total_final', output_field=DecimalField()), Decimal(0)),
+            num_transacciones=Count('id'),
+            ticket_promedio=Coalesce(Sum('total_final', output_field=DecimalField()), Decimal(0)) / Count('id')
+        )
+        .order_by('-total_vendido')
+    )
+
+    return {
+        'ventas_por_usuario': ventas_por_usuario,
+        'fecha_inicio': fecha_inicio,
+        'fecha_fin': fecha_fin,
+        'total_general': sum(v['total_vendido'] for v in ventas_por_usuario),
+    }
+
+
+# Agrupaciones del reporte de margen: agrupar -> (columnas de values, orden)
+AGRUPACIONES_MARGEN = {
+    'dia': ({'dia': TruncDate('venta__fecha')}, 'dia'),
+    'producto': ({'codigo': F('producto_codigo')}, '-margen'),
+    'cajero': ({'usuario': F('venta__usuario_id'), 'usuario_nombre': F('venta__usuario__username')}, '-margen'),
+}
+
+
+def _moneda(expresion):
+    campo = DecimalField(max_digits=17, decimal_places=4)
+    return Coalesce(Sum(ExpressionWrapper(expresion, output_field=campo)), Decimal(0), output_field=campo)
+
+
+def datos_margen(fecha_inicio, fecha_fin, agrupar='dia'):
+    """
+    Margen bruto por día, producto o cajero. Usa solo DetalleVenta y Venta:
+    el costo es el snapshot ``costo_unitario`` de cada línea, así que no se
+    consulta Producto ni Inventario. Las unidades devueltas se descuentan.
+    Los ingresos son el subtotal de las líneas (antes de descuento general e IVA).
+    """
+    if agrupar not in AGRUPACIONES_MARGEN:
+        agrupar = 'dia'
+    columnas, orden = AGRUPACIONES_MARGEN[agrupar]
+    netas = F('cantidad') - F('cantidad_devuelta')
+
+    qs = (
+        DetalleVenta.objects
+        .filter(**filtro_dias('venta__fecha', fecha_inicio, fecha_fin))
+        .values(**columnas)
+        .annotate(
+            unidades=Sum(netas),
+            ingresos=_moneda(F('subtotal') - F('cantidad_devuelta') * F('precio_unitario')),
+            costo=_moneda(netas * F('costo_unitario')),
+            num_ventas=Count('venta', distinct=True),
+        )
+        .annotate(margen=F('ingresos') - F('costo'))
+    )
+    if agrupar == 'producto':
+        qs = qs.annotate(producto_nombre=Max('producto_nombre'))
+    filas = list(qs.order_by(orden, *columnas))
+
+    for fila in filas:
+        fila['porcentaje'] = fila['margen'] * 100 / fila['ingresos'] if fila['ingresos'] else Decimal(0)
+
+    total_ingresos = sum((f['ingresos'] for f in filas), Decimal(0))
+    total_costo = sum((f['costo'] for f in filas), Decimal(0))
+    total_margen = total_ingresos - total_costo
+    return {
+        'filas': filas,
+        'agrupar': agrupar,
+        'fecha_inicio': fecha_inicio,
+        'fecha_fin': fecha_fin,
+        'total_ingresos': total_ingresos,
+        'total_costo': total_costo,
+        'total_margen': total_margen,
+        'porcentaje_total': total_margen * 100 / total_ingresos if total_ingresos else Decimal(0),
+    }
+
+
+def escribir_ventas_csv(archivo, fecha_inicio, fecha_fin):
+    """Escribe en `archivo` (cualquier objeto con write) el detalle de ventas del rango."""
+    ventas = (
+        Venta.objects
+        .filter(**filtro_dias('fecha', fecha_inicio, fecha_fin))
+        .select_related('usuario')
+        .prefetch_related('detalles__producto')
+        .order_by('-fecha')
+    )
+
+    writer = csv.writer(archivo)
+    writer.writerow(['ID Venta', 'Fecha', 'Cajero', 'Producto', 'Cantidad', 'Precio Unitario', 'Subtotal', 'Método Pago', 'IVA', 'Descuento', 'Total Final'])
+
+    for venta in ventas.iterator(chunk_size=2000):
+        for detalle in venta.detalles.all():
+            writer.writerow([
+                venta.id,
+                venta.fecha.strftime('%Y-%m-%d %H:%M:%S'),
+                venta.usuario.username if venta.usuario else 'N/A',
+                detalle.producto.nombre if detalle.producto else detalle.producto_nombre,
+                detalle.cantidad,
+                detalle.precio_unitario,
+                detalle.subtotal,
+                venta.metodo_pago,
+                venta.iva_total,
+                venta.descuento_general,
+                venta.total_final,
+            ])
@@ -0,0 +1,140 @@
+"""
+Jobs de reportes en segundo plano.
+
+Las vistas encolan un ReporteJob con ``encolar``; el comando
+``run_report_jobs`` los reclama y ejecuta con un pool de procesos
+llamando a ``ejecutar``. Cada tipo de job escribe su resultado en un
+archivo dentro de ``settings.REPORTES_JOBS_DIR``.
+"""
+import hashlib
+import json
+import traceback
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction, IntegrityError
+from django.utils import timezone
+
+from .models import ReporteJob
+from . import consultas
+
+
+def _guardar_json(datos, ruta):
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, cls=DjangoJSONEncoder)
+
+
+def _ventas_por_periodo(params, ruta):
+    datos = consultas.datos_ventas_por_periodo(
+        date.fromisoformat(params['fecha_inicio']), date.fromisoformat(params['fecha_fin'])
+    )
+    _guardar_json(datos, ruta)
+
+
+def _ventas_por_cajero(params, ruta):
+    datos = consultas.datos_ventas_por_cajero(
+        date.fromisoformat(params['fecha_inicio']), date.fromisoformat(params['fecha_fin'])
+    )
+    _guardar_json(datos, ruta)
+
+
+def _export_ventas_csv(params, ruta):
+    with open(ruta, 'w', encoding='utf-8', newline='') as f:
+        consultas.escribir_ventas_csv(
+            f, date.fromisoformat(params['fecha_inicio']), date.fromisoformat(params['fecha_fin'])
+        )
+
+
+# tipo -> (función generadora, extensión del archivo resultado)
+GENERADORES = {
+    'ventas_por_periodo': (_ventas_por_periodo, 'json'),
+    'ventas_por_cajero': (_ventas_por_cajero, 'json'),
+    'export_ventas_csv': (_export_ventas_csv, 'csv'),
+}
+
+
+def clave_job(tipo, parametros):
+    """Clave estable para un reporte y sus parámetros."""
+    contenido = json.dumps({'tipo': tipo, 'parametros': parametros}, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def encolar(tipo, parametros, usuario=None):
+    """
+    Crea un job para el reporte o devuelve el que ya está pendiente/en proceso
+    con los mismos parámetros.
+    """
+    if tipo not in GENERADORES:
+        raise ValueError(f"Tipo de reporte desconocido: {tipo}")
+
+    clave = clave_job(tipo, parametros)
+    activo = ReporteJob.objects.filter(clave=clave, estado__in=ReporteJob.ACTIVOS).first()
+    if activo:
+        return activo
+    try:
+        with transaction.atomic():
+            return ReporteJob.objects.create(tipo=tipo, parametros=parametros, clave=clave, usuario=usuario)
+    except IntegrityError:
+        # Otra petición creó el mismo job en paralelo: adjuntarse a él
+        return ReporteJob.objects.filter(clave=clave, estado__in=ReporteJob.ACTIVOS).first()
+
+
+def reclamar(limite):
+    """Marca como EN_PROCESO hasta `limite` jobs pendientes y devuelve sus ids."""
+    reclamados = []
+    pendientes = (
+        ReporteJob.objects
+        .filter(estado='PENDIENTE')
+        .order_by('creado')
+        .values_list('id', flat=True)[:limite]
+    )
+    for job_id in list(pendientes):
+        # Update condicional: si otro worker lo tomó primero no se cuenta
+        tomado = ReporteJob.objects.filter(id=job_id, estado='PENDIENTE').update(
+            estado='EN_PROCESO', iniciado=timezone.now()
+        )
+        if tomado:
+            reclamados.append(job_id)
+    return reclamados
+
+
+def liberar_colgados(minutos):
+    """Devuelve a PENDIENTE los jobs EN_PROCESO abandonados por un worker caído."""
+    limite = timezone.now() - timedelta(minutes=minutos)
+    return ReporteJob.objects.filter(estado='EN_PROCESO', iniciado__lt=limite).update(estado='PENDIENTE')
+
+
+def ejecutar(job_id):
+    """Ejecuta un job ya reclamado. Pensado para correr dentro del pool de procesos."""
+    job = ReporteJob.objects.get(id=job_id)
+    generador, extension = GENERADORES[job.tipo]
+    directorio = Path(settings.REPORTES_JOBS_DIR)
+    directorio.mkdir(parents=True, exist_ok=True)
+    ruta = directorio / f"{job.tipo}_{job.id}.{extension}"
+
+    try:
+        generador(job.parametros, ruta)
+    except Exception:
+        ReporteJob.objects.filter(id=job.id).update(
+            estado='ERROR', error=traceback.format_exc(), terminado=timezone.now()
+        )
+        return job_id, 'ERROR'
+
+    ReporteJob.objects.filter(id=job.id).update(
+        estado='COMPLETADO', archivo=str(ruta), terminado=timezone.now()
+    )
+    return job_id, 'COMPLETADO'
+
+
+def cargar_resultado(job):
+    """Lee el resultado JSON de un job y restaura las fechas para las plantillas."""
+    with open(job.archivo, encoding='utf-8') as f:
+        datos = json.load(f)
+    for campo in ('fecha_inicio', 'fecha_fin'):
+        if datos.get(campo):
+            datos[campo] = date.fromisoformat(datos[campo])
+    for fila in datos.get('ventas', []):
+        fila['dia'] = date.fromisoformat(fila['dia'])
+    return datos
@@ -0,0 +1,26 @@
+"""
+Comando para reconstruir el resumen diario de ventas por producto.
+Uso: python manage.py rebuild_sales_rollup --chunk-size=2000
+"""
+
+from django.core.management.base import BaseCommand
+
+from reportes.models import VentaProductoDia
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el resumen diario de ventas por producto desde DetalleVenta y Devolucion'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Filas leídas/insertadas por lote (default: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        filas = VentaProductoDia.reconstruir(chunk_size=options['chunk_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Resumen reconstruido: {filas} filas producto/día')
+        )
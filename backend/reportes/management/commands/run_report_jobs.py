@@ -0,0 +1,92 @@
+"""
+Worker de reportes en segundo plano.
+Uso: python manage.py run_report_jobs --workers=4
+     python manage.py run_report_jobs --once      (procesa lo pendiente y termina)
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from reportes import jobs
+
+
+def _inicializar_worker():
+    """Cada proceso del pool abre sus propias conexiones a la base de datos."""
+    import django
+    django.setup()
+    connections.close_all()
+
+
+def _ejecutar_en_worker(job_id):
+    try:
+        return jobs.ejecutar(job_id)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta los jobs de reportes pendientes usando un pool de procesos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 2,
+            help='Procesos del pool; 0 ejecuta los jobs en el propio proceso (default: núcleos de CPU)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Procesar los jobs pendientes y terminar'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Segundos de espera cuando no hay jobs pendientes (default: 2)'
+        )
+        parser.add_argument(
+            '--stale-minutes',
+            type=int,
+            default=30,
+            help='Reencolar jobs EN_PROCESO más antiguos de N minutos (default: 30)'
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+
+        liberados = jobs.liberar_colgados(options['stale_minutes'])
+        if liberados:
+            self.stdout.write(self.style.WARNING(f'⚠️  {liberados} jobs colgados devueltos a pendiente'))
+
+        if workers <= 0:
+            self._bucle(None, 1, options)
+            return
+
+        # No heredar conexiones abiertas del proceso padre en los hijos
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker) as pool:
+            self._bucle(pool, workers, options)
+
+    def _bucle(self, pool, workers, options):
+        while True:
+            job_ids = jobs.reclamar(workers)
+            if not job_ids:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            if pool is None:
+                resultados = [jobs.ejecutar(job_id) for job_id in job_ids]
+            else:
+                connections.close_all()
+                resultados = list(pool.map(_ejecutar_en_worker, job_ids))
+
+            for job_id, estado in resultados:
+                estilo = self.style.SUCCESS if estado == 'COMPLETADO' else self.style.ERROR
+                self.stdout.write(estilo(f'Job #{job_id}: {estado}'))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('inventario', '0010_alter_ordencompra_costo_unitario_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaProductoDia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('producto_codigo', models.CharField(blank=True, default='', max_length=50)),
+                ('producto_nombre', models.CharField(blank=True, default='', max_length=200)),
+                ('cantidad', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('transacciones', models.IntegerField(default=0)),
+                ('producto', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventario.producto')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['dia', 'producto_codigo'], name='venta_prod_dia_idx')],
+                'constraints': [models.UniqueConstraint(fields=('producto_codigo', 'dia'), name='uniq_venta_producto_dia')],
+            },
+        ),
+    ]
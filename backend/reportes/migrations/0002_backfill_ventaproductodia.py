@@ -0,0 +1,61 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def _dia_de(fecha):
+    if timezone.is_aware(fecha):
+        return timezone.localtime(fecha).date()
+    return fecha.date()
+
+
+def backfill(apps, schema_editor):
+    """Construye el resumen diario por producto a partir del histórico de ventas."""
+    DetalleVenta = apps.get_model('ventas', 'DetalleVenta')
+    Devolucion = apps.get_model('devoluciones', 'Devolucion')
+    VentaProductoDia = apps.get_model('reportes', 'VentaProductoDia')
+
+    acumulado = {}
+    for d in DetalleVenta.objects.select_related('venta').order_by('pk').iterator(chunk_size=2000):
+        key = (d.producto_codigo, _dia_de(d.venta.fecha))
+        fila = acumulado.setdefault(key, {
+            'producto_id': d.producto_id,
+            'producto_nombre': d.producto_nombre,
+            'cantidad': 0, 'total': Decimal(0), 'transacciones': 0,
+        })
+        fila['cantidad'] += d.cantidad
+        fila['total'] += d.subtotal
+        fila['transacciones'] += 1
+
+    devoluciones = (
+        Devolucion.objects
+        .filter(detalle_venta__isnull=False)
+        .select_related('detalle_venta__venta')
+        .order_by('pk')
+        .iterator(chunk_size=2000)
+    )
+    for dev in devoluciones:
+        d = dev.detalle_venta
+        fila = acumulado.get((d.producto_codigo, _dia_de(d.venta.fecha)))
+        if fila is not None:
+            fila['cantidad'] -= dev.cantidad
+            fila['total'] -= Decimal(dev.cantidad) * d.precio_unitario
+
+    VentaProductoDia.objects.bulk_create(
+        [VentaProductoDia(producto_codigo=codigo, dia=dia, **fila) for (codigo, dia), fila in acumulado.items()],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportes', '0001_initial'),
+        ('ventas', '0005_detalleventa_producto_codigo_and_more'),
+        ('devoluciones', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,209 @@
-from django.db import models
+from decimal import Decimal
 
-# Create your models here.
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+from inventario.models import Producto
+from mytienda.fechas import dia_local
+
+
+# ===========================
+# RESUMEN DIARIO DE VENTAS POR PRODUCTO
+# ===========================
+class VentaProductoDia(models.Model):
+    """
+    Acumulado de ventas por producto y día. Se mantiene al registrar cada
+    DetalleVenta y cada Devolucion, de modo que los reportes de top productos
+    agregan unas pocas filas por día en lugar de recorrer todo el detalle.
+    """
+    dia = models.DateField()
+    producto = models.ForeignKey(Producto, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    # Snapshot igual que en DetalleVenta: la fila sobrevive al borrado del producto
+    producto_codigo = models.CharField(max_length=50, blank=True, default='')
+    producto_nombre = models.CharField(max_length=200, blank=True, default='')
+    cantidad = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    transacciones = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['producto_codigo', 'dia'], name='uniq_venta_producto_dia'),
+        ]
+        indexes = [
+            models.Index(fields=['dia', 'producto_codigo'], name='venta_prod_dia_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.dia} - {self.producto_nombre} x {self.cantidad}"
+
+    @classmethod
+    def registrar(cls, dia, producto_codigo, producto_nombre='', producto_id=None,
+                  cantidad=0, total=Decimal(0), transacciones=0):
+        """Suma (o resta, con valores negativos) al acumulado del producto en el día."""
+        filtro = cls.objects.filter(producto_codigo=producto_codigo, dia=dia)
+        cambios = {
+            'cantidad': F('cantidad') + cantidad,
+            'total': F('total') + total,
+            'transacciones': F('transacciones') + transacciones,
+        }
+        if filtro.update(**cambios):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    dia=dia,
+                    producto_id=producto_id,
+                    producto_codigo=producto_codigo,
+                    producto_nombre=producto_nombre,
+                    cantidad=cantidad,
+                    total=total,
+                    transacciones=transacciones,
+                )
+        except IntegrityError:
+            # Otra transacción creó la fila entre el update y el insert
+            filtro.update(**cambios)
+
+    @classmethod
+    def registrar_detalle(cls, detalle):
+        """Acumula una línea de venta recién creada."""
+        cls.registrar(
+            dia=dia_local(detalle.venta.fecha),
+            producto_codigo=detalle.producto_codigo,
+            producto_nombre=detalle.producto_nombre,
+            producto_id=detalle.producto_id,
+            cantidad=detalle.cantidad,
+            total=detalle.subtotal,
+            transacciones=1,
+        )
+
+    @classmethod
+    def registrar_devolucion(cls, detalle, cantidad):
+        """Descuenta una devolución del día en que se vendió la línea."""
+        cls.registrar(
+            dia=dia_local(detalle.venta.fecha),
+            producto_codigo=detalle.producto_codigo,
+            producto_nombre=detalle.producto_nombre,
+            producto_id=detalle.producto_id,
+            cantidad=-cantidad,
+            total=-(Decimal(cantidad) * detalle.precio_unitario),
+        )
+
+    @classmethod
+    def top(cls, desde, hasta=None, limite=20):
+        """Top de productos por unidades vendidas en el rango de días [desde, hasta]."""
+        qs = cls.objects.filter(dia__gte=desde)
+        if hasta is not None:
+            qs = qs.filter(dia__lte=hasta)
+        return (
+            qs.values('producto_codigo')
+            .annotate(
+                prod_id=models.Max('producto_id'),
+                prod_name=models.Max('producto_nombre'),
+                cantidad_vendida=models.Sum('cantidad'),
+                total_generado=models.Sum('total'),
+                num_transacciones=models.Sum('transacciones'),
+            )
+            .order_by('-cantidad_vendida', 'producto_codigo')[:limite]
+        )
+
+    @classmethod
+    def reconstruir(cls, chunk_size=2000):
+        """Recalcula todo el resumen desde DetalleVenta y Devolucion."""
+        from ventas.models import DetalleVenta
+        from devoluciones.models import Devolucion
+
+        with transaction.atomic():
+            cls.objects.all().delete()
+            acumulado = {}
+            detalles = (
+                DetalleVenta.objects
+                .select_related('venta')
+                .order_by('pk')
+                .iterator(chunk_size=chunk_size)
+            )
+            for d in detalles:
+                key = (d.producto_codigo, dia_local(d.venta.fecha))
+                fila = acumulado.setdefault(key, {
+                    'producto_id': d.producto_id,
+                    'producto_nombre': d.producto_nombre,
+                    'cantidad': 0, 'total': Decimal(0), 'transacciones': 0,
+                })
+                fila['cantidad'] += d.cantidad
+                fila['total'] += d.subtotal
+                fila['transacciones'] += 1
+
+            devoluciones = (
+                Devolucion.objects
+                .filter(detalle_venta__isnull=False)
+                .select_related('detalle_venta__venta')
+                .order_by('pk')
+                .iterator(chunk_size=chunk_size)
+            )
+            for dev in devoluciones:
+                d = dev.detalle_venta
+                fila = acumulado.get((d.producto_codigo, dia_local(d.venta.fecha)))
+                if fila is not None:
+                    fila['cantidad'] -= dev.cantidad
+                    fila['total'] -= Decimal(dev.cantidad) * d.precio_unitario
+
+            cls.objects.bulk_create(
+                [cls(producto_codigo=codigo, dia=dia, **fila) for (codigo, dia), fila in acumulado.items()],
+                batch_size=chunk_size,
+            )
+        return len(acumulado)
+
+
+# ===========================
+# JOBS DE REPORTES
+# ===========================
+class ReporteJob(models.Model):
+    """
+    Reporte pesado ejecutado en segundo plano por ``run_report_jobs``.
+    El resultado se guarda como archivo en REPORTES_JOBS_DIR.
+    """
+    ESTADOS = (
+        ('PENDIENTE', 'Pendiente'),
+        ('EN_PROCESO', 'En proceso'),
+        ('COMPLETADO', 'Completado'),
+        ('ERROR', 'Error'),
+    )
+    ACTIVOS = ('PENDIENTE', 'EN_PROCESO')
+
+    TIPOS = (
+        ('ventas_por_periodo', 'Ventas por período'),
+        ('ventas_por_cajero', 'Ventas por cajero'),
+        ('export_ventas_csv', 'Exportación de ventas CSV'),
+    )
+
+    tipo = models.CharField(max_length=40, choices=TIPOS)
+    parametros = models.JSONField(default=dict)
+    # Hash de tipo + parámetros para reutilizar jobs idénticos en curso
+    clave = models.CharField(max_length=64, db_index=True)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='PENDIENTE')
+    usuario = models.ForeignKey('accounts.User', on_delete=models.SET_NULL, null=True, blank=True)
+    archivo = models.CharField(max_length=255, blank=True, default='')
+    error = models.TextField(blank=True, default='')
+    creado = models.DateTimeField(default=timezone.now)
+    iniciado = models.DateTimeField(null=True, blank=True)
+    terminado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # Solo puede haber un job activo por reporte/parámetros
+            models.UniqueConstraint(
+                fields=['clave'],
+                condition=models.Q(estado__in=('PENDIENTE', 'EN_PROCESO')),
+                name='uniq_reporte_job_activo',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['estado', 'creado'], name='reporte_job_estado_idx'),
+        ]
+
+    def __str__(self):
+        return f"Job #{self.id} - {self.tipo} ({self.estado})"
+
+    @property
+    def listo(self):
+        return self.estado == 'COMPLETADO'
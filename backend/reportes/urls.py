@@ -5,9 +5,14 @@ app_name = "reportes"
 
 urlpatterns = [
     path('', views.dashboard, name='dashboard'),
+    path('widgets/<slug:widget>/', views.dashboard_widget, name='dashboard_widget'),
     path('ventas-periodo/', views.ventas_por_periodo, name='ventas_por_periodo'),
     path('top-productos/', views.top_productos, name='top_productos'),
     path('bajo-stock/', views.productos_bajo_stock, name='productos_bajo_stock'),
     path('ventas-por-cajero/', views.ventas_por_cajero, name='ventas_por_cajero'),
+    path('margen/', views.margen_bruto, name='margen_bruto'),
     path('export/ventas-csv/', views.export_ventas_csv, name='export_ventas_csv'),
+    path('jobs/<int:job_id>/', views.job_detalle, name='job_detalle'),
+    path('jobs/<int:job_id>/estado/', views.job_estado, name='job_estado'),
+    path('jobs/<int:job_id>/descargar/', views.job_descargar, name='job_descargar'),
 ]
@@ -1,33 +1,63 @@
-from django.shortcuts import render
+from django.shortcuts import render, redirect, get_object_or_404
 from django.db.models import Sum, Count, F, DecimalField
 from django.db.models.functions import TruncDay, Coalesce
-from django.http import HttpResponse
-from django.contrib.auth.decorators import login_required, user_passes_test # Se añade user_passes_test
+from django.http import HttpResponse, JsonResponse, FileResponse, Http404
+from django.conf import settings
+from django.urls import reverse
 from datetime import date, timedelta
 from decimal import Decimal
-import json
-import csv
+import os
 
-# Importación de la función de chequeo de Admin
-from accounts.views import es_admin 
+from mytienda import cacheado, fechas
+from mytienda.accesos import requiere
 
 from ventas.models import Venta, DetalleVenta
 from inventario.models import Producto, Inventario
+from .models import VentaProductoDia, ReporteJob
+from . import consultas, jobs
 
 
 # ==================== DASHBOARD & GRÁFICAS ====================
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO: Usando nombre de ruta 'login'
-def dashboard(request):
-    """Dashboard principal con KPIs y gráficas"""
-    hoy = date.today()
+# TTL (segundos) de la caché de cada widget del dashboard
+DASHBOARD_WIDGETS_TTL = {
+    'kpis': 60,
+    'ventas_7d': 300,
+    'movimientos_7d': 300,
+    'top_productos': 600,
+}
+
 
-    # Ventas últimos 7 días (por fecha)
+def _ultimos_7_dias(hoy):
     inicio_7 = hoy - timedelta(days=6)
+    return inicio_7, [(inicio_7 + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(7)]
+
+
+def _widget_kpis(hoy):
+    """KPIs de las tarjetas superiores"""
+    productos = Producto.objects.filter(activo=True)
+    stock = productos.aggregate(
+        total_productos=Count('id'),
+        stock_total=Coalesce(Sum('stock'), 0),
+    )
+    ventas_hoy = Venta.objects.filter(**fechas.filtro_dias('fecha', hoy, hoy)).aggregate(
+        total=Coalesce(Sum('total_final', output_field=DecimalField()), Decimal(0))
+    )['total'] or Decimal(0)
+
+    return {
+        'total_productos': stock['total_productos'],
+        'stock_total': stock['stock_total'] or 0,
+        'ventas_hoy': float(ventas_hoy),
+        'bajo_stock': productos.filter(stock__lte=5).count(),
+    }
+
+
+def _widget_ventas_7d(hoy):
+    """Total vendido y transacciones por día en los últimos 7 días"""
+    inicio_7, dias = _ultimos_7_dias(hoy)
     ventas_7_qs = (
         Venta.objects
-        .filter(fecha__date__gte=inicio_7)
+        .filter(**fechas.filtro_dias('fecha', inicio_7))
         .annotate(dia=TruncDay('fecha'))
         .values('dia')
         .annotate(
@@ -36,160 +66,131 @@ def dashboard(request):
         )
         .order_by('dia')
     )
+    por_dia = {v['dia'].strftime('%Y-%m-%d'): v for v in ventas_7_qs}
 
-    dias = [v['dia'].strftime('%Y-%m-%d') for v in ventas_7_qs]
-    totales_7 = [float(v['total']) for v in ventas_7_qs]
+    return {
+        'dias': dias,
+        'totales': [float(por_dia[d]['total']) if d in por_dia else 0 for d in dias],
+        'transacciones': [por_dia[d]['transacciones'] if d in por_dia else 0 for d in dias],
+    }
 
-    # Movimientos (Entradas y Salidas) últimos 7 días
-    try:
-        mov_qs = (
-            Inventario.objects
-            .filter(fecha__date__gte=inicio_7)
-            .annotate(dia=TruncDay('fecha'))
-            .values('dia', 'tipo')
-            .annotate(total_cant=Coalesce(Sum('cantidad'), 0, output_field=DecimalField()))
-            .order_by('dia')
-        )
 
-        # Construir diccionarios por día
-        dias_mov = sorted(list({m['dia'].strftime('%Y-%m-%d') for m in mov_qs}))
-        entradas_map = {d: 0 for d in dias_mov}
-        salidas_map = {d: 0 for d in dias_mov}
-        for m in mov_qs:
-            d = m['dia'].strftime('%Y-%m-%d')
-            if m['tipo'] == 'ENTRADA':
-                entradas_map[d] += int(m['total_cant'])
-            else:
-                salidas_map[d] += int(m['total_cant'])
-
-        # Asegurar consistencia con días de ventas
-        if len(dias) == 7:
-            dias_mov_final = dias
-        else:
-            dias_mov_final = [(inicio_7 + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(7)]
-
-        entradas = [entradas_map.get(d, 0) for d in dias_mov_final]
-        salidas = [salidas_map.get(d, 0) for d in dias_mov_final]
-
-    except Exception as e:
-        dias_mov_final = dias or [(inicio_7 + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(7)]
-        entradas = [0 for _ in dias_mov_final]
-        salidas = [0 for _ in dias_mov_final]
-
-    # Top productos últimos 30 días
-    inicio_30 = hoy - timedelta(days=30)
-    # Usar nombre histórico si el producto fue eliminado (snapshot en DetalleVenta)
-    top_qs = (
-        DetalleVenta.objects
-        .filter(venta__fecha__date__gte=inicio_30)
-        .annotate(prod_name=Coalesce(F('producto__nombre'), F('producto_nombre')))
-        .values('prod_name')
-        .annotate(cantidad_vendida=Coalesce(Sum('cantidad'), Decimal(0), output_field=DecimalField()))
-        .order_by('-cantidad_vendida')[:10]
+def _widget_movimientos_7d(hoy):
+    """Entradas y salidas de inventario por día en los últimos 7 días"""
+    inicio_7, dias = _ultimos_7_dias(hoy)
+    mov_qs = (
+        Inventario.objects
+        .filter(**fechas.filtro_dias('fecha', inicio_7))
+        .annotate(dia=TruncDay('fecha'))
+        .values('dia', 'tipo')
+        .annotate(total_cant=Coalesce(Sum('cantidad'), 0))
+        .order_by('dia')
     )
 
-    nombres_mas_vendidos = [t['prod_name'] for t in top_qs]
-    cantidades_mas_vendidas = [int(t['cantidad_vendida']) for t in top_qs]
+    entradas_map = {d: 0 for d in dias}
+    salidas_map = {d: 0 for d in dias}
+    for m in mov_qs:
+        d = m['dia'].strftime('%Y-%m-%d')
+        destino = entradas_map if m['tipo'] == 'ENTRADA' else salidas_map
+        if d in destino:
+            destino[d] += int(m['total_cant'])
 
-    # Insights simples
-    producto_top = Producto.objects.filter(activo=True).order_by('-stock').first()
-    producto_mas_vendido = top_qs[0]['prod_name'] if top_qs else 'N/A'
-    bajo_stock_count = Producto.objects.filter(stock__lte=5, activo=True).count()
-    ventas_hoy = Venta.objects.filter(fecha__date=hoy).aggregate(
-        total=Coalesce(Sum('total_final', output_field=DecimalField()), Decimal(0))
-    )['total'] or Decimal(0)
+    return {
+        'dias': dias,
+        'entradas': [entradas_map[d] for d in dias],
+        'salidas': [salidas_map[d] for d in dias],
+    }
 
-    # KPIs
-    total_productos = Producto.objects.filter(activo=True).count()
-    stock_total = Producto.objects.filter(activo=True).aggregate(
-        total_stock=Coalesce(Sum('stock'), 0)
-    )['total_stock'] or 0
-    movimientos = Inventario.objects.all().order_by('-fecha')[:50]
 
-    context = {
-        'total_productos': total_productos,
-        'stock_total': stock_total,
-        'movimientos': movimientos,
-        'producto_top': producto_top,
-        'producto_mas_vendido': producto_mas_vendido,
-        'bajo_stock': bajo_stock_count,
-        'ventas_hoy': float(ventas_hoy),
-        'nombres_mas_vendidos_json': json.dumps(nombres_mas_vendidos),
-        'cantidades_mas_vendidas_json': json.dumps(cantidades_mas_vendidas),
-        'dias_json': json.dumps(dias),
-        'entradas_json': json.dumps(entradas),
-        'salidas_json': json.dumps(salidas),
-        'variacion_productos': 0,
+def _widget_top_productos(hoy):
+    """Top 10 productos de los últimos 30 días (desde el resumen diario por producto)"""
+    top_qs = list(VentaProductoDia.top(hoy - timedelta(days=30), limite=10))
+    return {
+        'nombres': [t['prod_name'] for t in top_qs],
+        'cantidades': [int(t['cantidad_vendida']) for t in top_qs],
     }
 
-    return render(request, 'reportes/dashboard.html', context)
+
+DASHBOARD_WIDGETS = {
+    'kpis': _widget_kpis,
+    'ventas_7d': _widget_ventas_7d,
+    'movimientos_7d': _widget_movimientos_7d,
+    'top_productos': _widget_top_productos,
+}
+
+
+def datos_widget(nombre):
+    """Datos de un widget, cacheados por día con el TTL propio del widget."""
+    hoy = fechas.hoy()
+    # Un solo proceso recalcula un widget vencido; los demás esperan su resultado
+    return cacheado.obtener(
+        ('dashboard', nombre, hoy), lambda: DASHBOARD_WIDGETS[nombre](hoy), DASHBOARD_WIDGETS_TTL[nombre]
+    )
+
+
+@requiere('gestion')
+def dashboard(request):
+    """Dashboard principal: solo la estructura, cada widget se carga por separado vía JSON"""
+    widgets_urls = {
+        nombre: reverse('reportes:dashboard_widget', args=[nombre]) for nombre in DASHBOARD_WIDGETS
+    }
+    return render(request, 'reportes/dashboard.html', {'widgets_urls': widgets_urls})
+
+
+@requiere('gestion')
+def dashboard_widget(request, widget):
+    """GET /reportes/widgets/<widget>/ -> JSON con los datos de un widget del dashboard"""
+    if widget not in DASHBOARD_WIDGETS:
+        raise Http404("Widget desconocido")
+    return JsonResponse(datos_widget(widget))
 
 
 # ==================== REPORTES ESPECÍFICOS ====================
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO: Usando nombre de ruta 'login'
-def ventas_por_periodo(request):
-    """Reporte de ventas por período (fecha inicial y final)"""
-    fecha_inicio = request.GET.get('fecha_inicio', (date.today() - timedelta(days=30)).strftime('%Y-%m-%d'))
-    fecha_fin = request.GET.get('fecha_fin', date.today().strftime('%Y-%m-%d'))
+def _rango_fechas(request):
+    """Lee fecha_inicio/fecha_fin del GET (por defecto los últimos 30 días)."""
+    hoy = fechas.hoy()
+    fecha_inicio = request.GET.get('fecha_inicio', (hoy - timedelta(days=30)).strftime('%Y-%m-%d'))
+    fecha_fin = request.GET.get('fecha_fin', hoy.strftime('%Y-%m-%d'))
 
     try:
         fecha_inicio = date.fromisoformat(fecha_inicio)
         fecha_fin = date.fromisoformat(fecha_fin)
     except:
-        fecha_inicio = date.today() - timedelta(days=30)
-        fecha_fin = date.today()
-
-    # ✅ OPTIMIZACIÓN: select_related para usuario evita N+1 queries
-    # Obtener todas las ventas en el período
-    ventas_raw = (
-        Venta.objects
-        .select_related('usuario')
-        .filter(fecha__date__gte=fecha_inicio, fecha__date__lte=fecha_fin)
-        .order_by('fecha')
+        fecha_inicio = hoy - timedelta(days=30)
+        fecha_fin = hoy
+    return fecha_inicio, fecha_fin
+
+
+def _encolar_si_grande(request, tipo, fecha_inicio, fecha_fin):
+    """
+    Si el rango supera REPORTES_ASYNC_DIAS, encola el reporte como job y
+    devuelve la redirección a la página de espera; si no, devuelve None.
+    """
+    if (fecha_fin - fecha_inicio).days < settings.REPORTES_ASYNC_DIAS:
+        return None
+    job = jobs.encolar(
+        tipo,
+        {'fecha_inicio': fecha_inicio.isoformat(), 'fecha_fin': fecha_fin.isoformat()},
+        usuario=request.user,
     )
+    return redirect('reportes:job_detalle', job_id=job.id)
 
-    # Procesar datos manualmente para agrupar por día
-    ventas_dict = {}
-    for venta in ventas_raw:
-        dia = venta.fecha.date()
-        if dia not in ventas_dict:
-            ventas_dict[dia] = {
-                'dia': dia,
-                'total_dia': Decimal(0),
-                'num_transacciones': 0,
-                'iva_total': Decimal(0),
-                'descuentos': Decimal(0)
-            }
-        ventas_dict[dia]['total_dia'] += venta.total_final or Decimal(0)
-        ventas_dict[dia]['num_transacciones'] += 1
-        ventas_dict[dia]['iva_total'] += venta.iva_total or Decimal(0)
-        ventas_dict[dia]['descuentos'] += venta.descuento_general or Decimal(0)
-
-    ventas = list(ventas_dict.values())
-
-    total_ventas = sum(v['total_dia'] for v in ventas)
-    total_transacciones = sum(v['num_transacciones'] for v in ventas)
-    total_iva = sum(v['iva_total'] for v in ventas)
-    total_descuentos = sum(v['descuentos'] for v in ventas)
 
-    context = {
-        'ventas': ventas,
-        'fecha_inicio': fecha_inicio,
-        'fecha_fin': fecha_fin,
-        'total_ventas': total_ventas,
-        'total_transacciones': total_transacciones,
-        'total_iva': total_iva,
-        'total_descuentos': total_descuentos,
-        'promedio_venta': total_ventas / total_transacciones if total_transacciones > 0 else 0,
-    }
+@requiere('gestion')
+def ventas_por_periodo(request):
+    """Reporte de ventas por período (fecha inicial y final)"""
+    fecha_inicio, fecha_fin = _rango_fechas(request)
+
+    encolado = _encolar_si_grande(request, 'ventas_por_periodo', fecha_inicio, fecha_fin)
+    if encolado:
+        return encolado
 
+    context = consultas.datos_ventas_por_periodo(fecha_inicio, fecha_fin)
     return render(request, 'reportes/ventas_periodo.html', context)
 
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO: Usando nombre de ruta 'login'
+@requiere('gestion')
 def top_productos(request):
     """Reporte de top 20 productos más vendidos"""
     dias = request.GET.get('dias', 30)
@@ -198,22 +199,10 @@ def top_productos(request):
     except:
         dias = 30
 
-    fecha_inicio = date.today() - timedelta(days=dias)
+    fecha_inicio = fechas.hoy() - timedelta(days=dias)
 
-    # Usar nombre histórico si producto fue eliminado
-    top = (
-        DetalleVenta.objects
-        .filter(venta__fecha__date__gte=fecha_inicio)
-        .annotate(prod_id=Coalesce(F('producto__id'), F('producto_id')),
-                  prod_name=Coalesce(F('producto__nombre'), F('producto_nombre')))
-        .values('prod_id', 'prod_name')
-        .annotate(
-            cantidad_vendida=Coalesce(Sum('cantidad'), Decimal(0), output_field=DecimalField()),
-            total_generado=Coalesce(Sum('subtotal', output_field=DecimalField()), Decimal(0)),
-            num_transacciones=Count('venta', distinct=True)
-        )
-        .order_by('-cantidad_vendida')[:20]
-    )
+    # Agregación sobre el resumen diario por producto (una fila por producto y día)
+    top = VentaProductoDia.top(fecha_inicio, limite=20)
 
     context = {
         'top': top,
@@ -224,8 +213,7 @@ def top_productos(request):
     return render(request, 'reportes/top_productos.html', context)
 
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO: Usando nombre de ruta 'login'
+@requiere('gestion')
 def productos_bajo_stock(request):
     """Reporte de productos con bajo stock"""
     threshold = request.GET.get('threshold', 5)
@@ -250,87 +238,87 @@ def productos_bajo_stock(request):
     return render(request, 'reportes/bajo_stock.html', context)
 
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO: Usando nombre de ruta 'login'
+@requiere('gestion')
 def ventas_por_cajero(request):
     """Reporte de ventas por usuario/cajero"""
-    fecha_inicio = request.GET.get('fecha_inicio', (date.today() - timedelta(days=30)).strftime('%Y-%m-%d'))
-    fecha_fin = request.GET.get('fecha_fin', date.today().strftime('%Y-%m-%d'))
+    fecha_inicio, fecha_fin = _rango_fechas(request)
 
-    try:
-        fecha_inicio = date.fromisoformat(fecha_inicio)
-        fecha_fin = date.fromisoformat(fecha_fin)
-    except:
-        fecha_inicio = date.today() - timedelta(days=30)
-        fecha_fin = date.today()
+    encolado = _encolar_si_grande(request, 'ventas_por_cajero', fecha_inicio, fecha_fin)
+    if encolado:
+        return encolado
 
-    ventas_por_usuario = (
-        Venta.objects
-        .filter(fecha__date__gte=fecha_inicio, fecha__date__lte=fecha_fin)
-        .values(usuario_id=F('usuario__id'), usuario_nombre=F('usuario__username'))
-        .annotate(
-            total_vendido=Coalesce(Sum('total_final', output_field=DecimalField()), Decimal(0)),
-            num_transacciones=Count('id'),
-            ticket_promedio=Coalesce(Sum('total_final', output_field=DecimalField()), Decimal(0)) / Count('id')
-        )
-        .order_by('-total_vendido')
-    )
+    context = consultas.datos_ventas_por_cajero(fecha_inicio, fecha_fin)
+    return render(request, 'reportes/ventas_por_cajero.html', context)
 
-    context = {
-        'ventas_por_usuario': ventas_por_usuario,
-        'fecha_inicio': fecha_inicio,
-        'fecha_fin': fecha_fin,
-        'total_general': sum(v['total_vendido'] for v in ventas_por_usuario),
-    }
 
-    return render(request, 'reportes/ventas_por_cajero.html', context)
+@requiere('gestion')
+def margen_bruto(request):
+    """Margen bruto por día, producto o cajero (?agrupar=dia|producto|cajero)"""
+    fecha_inicio, fecha_fin = _rango_fechas(request)
+    context = consultas.datos_margen(fecha_inicio, fecha_fin, request.GET.get('agrupar', 'dia'))
+    return render(request, 'reportes/margen.html', context)
 
 
 # ==================== EXPORTACIÓN ====================
 
-@login_required(login_url='login')
-@user_passes_test(es_admin, login_url='login') # CORREGIDO: Usando nombre de ruta 'login'
+@requiere('gestion')
 def export_ventas_csv(request):
     """Exportar ventas a CSV"""
-    fecha_inicio = request.GET.get('fecha_inicio', (date.today() - timedelta(days=30)).strftime('%Y-%m-%d'))
-    fecha_fin = request.GET.get('fecha_fin', date.today().strftime('%Y-%m-%d'))
+    fecha_inicio, fecha_fin = _rango_fechas(request)
 
-    try:
-        fecha_inicio = date.fromisoformat(fecha_inicio)
-        fecha_fin = date.fromisoformat(fecha_fin)
-    except:
-        fecha_inicio = date.today() - timedelta(days=30)
-        fecha_fin = date.today()
-
-    ventas = (
-        Venta.objects
-        .filter(fecha__date__gte=fecha_inicio, fecha__date__lte=fecha_fin)
-        .select_related('usuario')
-        .prefetch_related('detalles')
-        .order_by('-fecha')
-    )
+    encolado = _encolar_si_grande(request, 'export_ventas_csv', fecha_inicio, fecha_fin)
+    if encolado:
+        return encolado
 
     # Crear respuesta CSV
     response = HttpResponse(content_type='text/csv')
     response['Content-Disposition'] = f'attachment; filename="ventas_{fecha_inicio}_{fecha_fin}.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(['ID Venta', 'Fecha', 'Cajero', 'Producto', 'Cantidad', 'Precio Unitario', 'Subtotal', 'Método Pago', 'IVA', 'Descuento', 'Total Final'])
-
-    for venta in ventas:
-        for detalle in venta.detalles.all():
-            writer.writerow([
-                venta.id,
-                venta.fecha.strftime('%Y-%m-%d %H:%M:%S'),
-                venta.usuario.username if venta.usuario else 'N/A',
-                detalle.producto.nombre if detalle.producto else detalle.producto_nombre,
-                detalle.cantidad,
-                detalle.precio_unitario,
-                detalle.subtotal,
-                venta.metodo_pago,
-                venta.iva_total,
-                venta.descuento_general,
-                venta.total_final,
-            ])
-
-    return response
\ No newline at end of file
+    consultas.escribir_ventas_csv(response, fecha_inicio, fecha_fin)
+    return response
+
+
+# ==================== JOBS EN SEGUNDO PLANO ====================
+
+# Plantilla con la que se muestra el resultado de cada tipo de job HTML
+PLANTILLAS_JOB = {
+    'ventas_por_periodo': 'reportes/ventas_periodo.html',
+    'ventas_por_cajero': 'reportes/ventas_por_cajero.html',
+}
+
+
+@requiere('gestion')
+def job_detalle(request, job_id):
+    """Página de espera de un job; cuando termina muestra el reporte o la descarga."""
+    job = get_object_or_404(ReporteJob, id=job_id)
+
+    if job.listo and job.tipo in PLANTILLAS_JOB:
+        return render(request, PLANTILLAS_JOB[job.tipo], jobs.cargar_resultado(job))
+
+    return render(request, 'reportes/job_estado.html', {'job': job})
+
+
+@requiere('gestion')
+def job_estado(request, job_id):
+    """JSON con el estado del job, consultado periódicamente por la página de espera."""
+    job = get_object_or_404(ReporteJob, id=job_id)
+    return JsonResponse({
+        'id': job.id,
+        'estado': job.estado,
+        'listo': job.listo,
+        'error': job.estado == 'ERROR',
+    })
+
+
+@requiere('gestion')
+def job_descargar(request, job_id):
+    """Descarga el archivo resultado de un job completado."""
+    job = get_object_or_404(ReporteJob, id=job_id, estado='COMPLETADO')
+    if not job.archivo or not os.path.exists(job.archivo):
+        raise Http404("El resultado del reporte ya no está disponible")
+    p = job.parametros
+    extension = os.path.splitext(job.archivo)[1]
+    return FileResponse(
+        open(job.archivo, 'rb'),
+        as_attachment=True,
+        filename=f"{job.tipo}_{p.get('fecha_inicio')}_{p.get('fecha_fin')}{extension}",
+    )
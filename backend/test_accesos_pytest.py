@@ -0,0 +1,69 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import reverse
+
+from accounts.models import User
+from mytienda import accesos, context_processors
+
+
+@pytest.fixture
+def cajero(db):
+    return User.objects.create_user(username='acc_caj', email='acc_caj@test.com', password='p', rol='CAJERO')
+
+
+def test_menu_compilado_por_rol():
+    admin = User(rol='ADMIN')
+    cajero = User(rol='CAJERO')
+    otro = User(rol='SUPERVISOR')
+
+    assert [n for n, _ in accesos.menu_para(cajero)] == ['Venta', 'Mis Ventas', 'Caja', 'Devoluciones']
+    assert [n for n, _ in accesos.menu_para(admin)][:3] == ['Home', 'Usuarios', 'Inventario']
+    assert 'Reportes' in dict(accesos.menu_para(admin))
+    assert 'Usuarios' not in dict(accesos.menu_para(otro))
+    assert accesos.menu_para(admin) is accesos.menu_para(User(rol='ADMIN'))
+
+
+def test_area_desconocida_falla_al_declarar():
+    with pytest.raises(ImproperlyConfigured):
+        accesos.requiere('inexistente')
+
+
+def test_vistas_registradas():
+    assert accesos.RUTAS['reportes.views.dashboard'] == 'gestion'
+    assert accesos.RUTAS['accounts.views.usuarios_lista'] == 'gestion'
+    assert accesos.RUTAS['ventas.views.venta_crear'] == 'caja'
+    assert accesos.RUTAS['devoluciones.views.devoluciones_list'] == 'caja'
+
+
+@pytest.mark.django_db
+def test_cajero_fuera_de_gestion(client, cajero):
+    client.force_login(cajero)
+    for nombre in ('reportes:dashboard', 'usuarios_lista', 'compra_lista', 'producto_lista'):
+        resp = client.get(reverse(nombre))
+        assert resp.status_code == 302
+        assert resp['Location'].startswith(reverse('login'))
+
+    resp = client.get(reverse('devoluciones_list'))
+    assert resp.status_code == 200
+    assert [n for n, _ in resp.context['menu_items']] == ['Venta', 'Mis Ventas', 'Caja', 'Devoluciones']
+
+
+@pytest.mark.django_db
+def test_sin_sesion_redirige_con_next(client):
+    resp = client.get(reverse('devoluciones_list'))
+    assert resp.status_code == 302
+    assert resp['Location'] == reverse('login') + '?next=' + reverse('devoluciones_list')
+
+
+@pytest.mark.django_db
+def test_json_no_arma_el_menu(client, cajero, monkeypatch):
+    llamadas = []
+    monkeypatch.setattr(context_processors, 'menu_para', lambda user: llamadas.append(user) or ())
+    client.force_login(cajero)
+
+    resp = client.get(reverse('ventas_productos_search'), {'q': 'x'})
+    assert resp.status_code == 200
+    assert llamadas == []
+
+    client.get(reverse('devoluciones_list'))
+    assert len(llamadas) == 1
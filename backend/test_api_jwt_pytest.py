@@ -0,0 +1,127 @@
+import pytest
+from decimal import Decimal
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from inventario.models import Producto
+from ventas.models import Venta
+
+
+@pytest.fixture
+def api():
+    # CSRF activo como en producción: las rutas /api/ no deben depender de él
+    return Client(enforce_csrf_checks=True)
+
+
+@pytest.fixture
+def cajero(db):
+    return User.objects.create_user(username='jwt_caj', email='jwt_caj@test.com', password='clave', rol='CAJERO')
+
+
+def _tokens(api, email, password='clave'):
+    resp = api.post(reverse('token_obtain_pair'), {'email': email, 'password': password}, content_type='application/json')
+    assert resp.status_code == 200, resp.content
+    return resp.json()
+
+
+@pytest.mark.django_db
+def test_token_lleva_el_rol(api, cajero):
+    tokens = _tokens(api, 'JWT_CAJ@test.com')
+    access = AccessToken(tokens['access'])
+    assert access['rol'] == 'CAJERO'
+    assert access['email'] == 'jwt_caj@test.com'
+
+
+@pytest.mark.django_db
+def test_busqueda_sin_sesion_ni_usuarios(api, cajero):
+    Producto.objects.create(codigo=4401, nombre='Jabón', stock=5, precio_compra=Decimal('1'), precio_venta=Decimal('2'))
+    access = _tokens(api, 'jwt_caj@test.com')['access']
+
+    with CaptureQueriesContext(connection) as ctx:
+        resp = api.get(reverse('api_caja_productos_buscar'), {'q': 'jab'}, HTTP_AUTHORIZATION=f'Bearer {access}')
+    assert resp.status_code == 200
+    assert [p['nombre'] for p in resp.json()] == ['Jabón']
+    assert 'sessionid' not in resp.cookies
+    sqls = [q['sql'] for q in ctx.captured_queries]
+    assert not any('django_session' in sql or 'accounts_user' in sql for sql in sqls)
+    assert len(sqls) == 1
+
+
+@pytest.mark.django_db
+def test_checkout_api(api, cajero):
+    p = Producto.objects.create(codigo=4402, nombre='Arroz', stock=10, precio_compra=Decimal('1'), precio_venta=Decimal('10'))
+    access = _tokens(api, 'jwt_caj@test.com')['access']
+
+    resp = api.post(
+        reverse('api_caja_venta_crear'),
+        {'items': [{'producto_id': p.id, 'cantidad': 3}], 'metodo_pago': 'EFECTIVO', 'monto_recibido': '50'},
+        content_type='application/json',
+        HTTP_AUTHORIZATION=f'Bearer {access}',
+    )
+    assert resp.status_code == 201, resp.content
+    venta = Venta.objects.get(pk=resp.json()['id'])
+    assert venta.usuario_id == cajero.id
+    assert venta.total_final == Decimal('35.70')
+    assert resp.json()['cambio'] == '14.30'
+    p.refresh_from_db()
+    assert p.stock == 7
+
+    # Stock insuficiente: 400 y nada escrito
+    resp = api.post(
+        reverse('api_caja_venta_crear'),
+        {'items': [{'producto_id': p.id, 'cantidad': 99}], 'metodo_pago': 'TARJETA'},
+        content_type='application/json',
+        HTTP_AUTHORIZATION=f'Bearer {access}',
+    )
+    assert resp.status_code == 400
+    assert 'Stock insuficiente' in resp.json()['error']
+    assert Venta.objects.count() == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('campo', ['descuento_general', 'monto_recibido'])
+def test_checkout_api_rechaza_montos_negativos(api, cajero, campo):
+    p = Producto.objects.create(codigo=4403, nombre='Sal', stock=10, precio_compra=Decimal('1'), precio_venta=Decimal('10'))
+    access = _tokens(api, 'jwt_caj@test.com')['access']
+
+    resp = api.post(
+        reverse('api_caja_venta_crear'),
+        {'items': [{'producto_id': p.id, 'cantidad': 1}], 'metodo_pago': 'TARJETA', campo: '-5'},
+        content_type='application/json',
+        HTTP_AUTHORIZATION=f'Bearer {access}',
+    )
+    assert resp.status_code == 400
+    assert campo in resp.json()
+    assert Venta.objects.count() == 0
+    p.refresh_from_db()
+    assert p.stock == 10
+
+
+@pytest.mark.django_db
+def test_sin_token_o_sin_rol(api):
+    assert api.get(reverse('api_caja_productos_buscar')).status_code == 401
+
+    User.objects.create_user(username='jwt_otro', email='jwt_otro@test.com', password='clave', rol='SUPERVISOR')
+    access = _tokens(api, 'jwt_otro@test.com')['access']
+    resp = api.get(reverse('api_caja_productos_buscar'), HTTP_AUTHORIZATION=f'Bearer {access}')
+    assert resp.status_code == 403
+
+
+@pytest.mark.django_db
+def test_refresh_toma_rol_actual_y_rechaza_inactivos(api, cajero):
+    refresh = _tokens(api, 'jwt_caj@test.com')['refresh']
+
+    cajero.rol = 'ADMIN'
+    cajero.save()
+    resp = api.post(reverse('token_refresh'), {'refresh': refresh}, content_type='application/json')
+    assert resp.status_code == 200
+    assert AccessToken(resp.json()['access'])['rol'] == 'ADMIN'
+
+    cajero.is_active = False
+    cajero.save()
+    resp = api.post(reverse('token_refresh'), {'refresh': refresh}, content_type='application/json')
+    assert resp.status_code == 401
@@ -0,0 +1,97 @@
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+
+from accounts.models import User
+from inventario.models import Producto
+from mytienda import cacheado
+from ventas.models import Venta, DetalleVenta
+
+
+@pytest.fixture
+def prueba():
+    with cacheado.cache_de_prueba() as cache:
+        yield cache
+
+
+def test_aciertos_fallos_y_etiquetas(prueba):
+    llamadas = []
+    calcular = lambda: llamadas.append(1) or len(llamadas)
+
+    assert cacheado.obtener(('catalogo', 'lista'), calcular, etiquetas=('catalogo',)) == 1
+    assert cacheado.obtener(('catalogo', 'lista'), calcular, etiquetas=('catalogo',)) == 1
+    cacheado.invalidar('catalogo')
+    assert cacheado.obtener(('catalogo', 'lista'), calcular, etiquetas=('catalogo',)) == 2
+    # Otra etiqueta no se ve afectada
+    assert cacheado.obtener(('otro',), calcular, etiquetas=('ventas',)) == 3
+    cacheado.invalidar('catalogo')
+    assert cacheado.obtener(('otro',), calcular, etiquetas=('ventas',)) == 3
+
+    assert cacheado.estadisticas()['catalogo'] == {'aciertos': 1, 'fallos': 2, 'esperas': 0}
+
+
+def test_version_perdida_no_revive_valores_viejos(prueba):
+    cacheado.guardar(('x',), 'viejo', etiquetas=('t',))
+    prueba.delete('etiqueta:t')
+    time.sleep(0.01)
+    assert cacheado.obtener(('x',), lambda: 'nuevo', etiquetas=('t',)) == 'nuevo'
+
+
+def test_un_solo_calculo_ante_estampida(prueba, monkeypatch):
+    monkeypatch.setattr(cacheado, 'INTERVALO_ESPERA', 0.01)
+    empezo, seguir = threading.Event(), threading.Event()
+    llamadas = []
+
+    def lento():
+        llamadas.append(1)
+        empezo.set()
+        seguir.wait(2)
+        return 'valor'
+
+    resultados = []
+    hilos = [threading.Thread(target=lambda: resultados.append(cacheado.obtener(('lento',), lento)))]
+    hilos[0].start()
+    empezo.wait(2)
+    hilos += [threading.Thread(target=lambda: resultados.append(cacheado.obtener(('lento',), lento))) for _ in range(4)]
+    for h in hilos[1:]:
+        h.start()
+    time.sleep(0.2)
+    seguir.set()
+    for h in hilos:
+        h.join(5)
+
+    assert resultados == ['valor'] * 5
+    assert len(llamadas) == 1
+    assert cacheado.estadisticas()['lento']['esperas'] == 4
+
+
+@pytest.mark.django_db
+def test_factura_cacheada_e_invalidada_por_catalogo(client, prueba, monkeypatch):
+    cajero = User.objects.create_user(username='cch_caj', email='cch_caj@test.com', password='p', rol='CAJERO')
+    producto = Producto.objects.create(codigo=4901, nombre='Té', stock=5, precio_compra=Decimal('1'), precio_venta=Decimal('2'))
+    venta = Venta.objects.create(usuario=cajero, metodo_pago='TARJETA')
+    DetalleVenta.objects.create(venta=venta, producto=producto, cantidad=1, precio_unitario=2, subtotal=2)
+
+    from ventas import views
+    generadas = []
+    original = views.generar_pdf_factura
+    monkeypatch.setattr(views, 'generar_pdf_factura', lambda v: generadas.append(v.id) or original(v))
+
+    client.force_login(cajero)
+    url = reverse('venta_factura_pdf', args=[venta.id])
+    assert client.get(url).status_code == 200
+    assert client.get(url).status_code == 200
+    assert generadas == [venta.id]
+
+    # Un movimiento de stock no invalida; renombrar el producto sí
+    producto.stock = 4
+    producto.save(update_fields=Producto.CAMPOS_STOCK)
+    client.get(url)
+    assert generadas == [venta.id]
+    producto.nombre = 'Té verde'
+    producto.save()
+    client.get(url)
+    assert generadas == [venta.id, venta.id]
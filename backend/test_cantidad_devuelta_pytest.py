@@ -0,0 +1,50 @@
+import pytest
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import User
+from inventario.models import Producto
+from ventas.models import Venta, DetalleVenta
+from devoluciones.models import Devolucion
+
+
+def _venta_con_lineas(usuario, n):
+    venta = Venta.objects.create(usuario=usuario, metodo_pago='EFECTIVO')
+    for i in range(n):
+        p = Producto.objects.create(codigo=3100 + 10 * n + i, nombre=f'P{n}-{i}', stock=10,
+                                    precio_compra=Decimal('1'), precio_venta=Decimal('2'))
+        DetalleVenta.objects.create(venta=venta, producto=p, cantidad=3,
+                                    precio_unitario=Decimal('2'), subtotal=Decimal('6'))
+    return venta
+
+
+@pytest.mark.django_db
+def test_devolucion_updates_counter():
+    u = User.objects.create_user(username='dv1', email='dv1@test.com', password='p', rol='CAJERO')
+    venta = _venta_con_lineas(u, 1)
+    detalle = venta.detalles.get()
+    Devolucion.objects.create(venta=venta, detalle_venta=detalle, cantidad=1, usuario=u)
+    Devolucion.objects.create(venta=venta, detalle_venta=detalle, cantidad=1, usuario=u)
+    detalle.refresh_from_db()
+    assert detalle.cantidad_devuelta == 2
+    assert detalle.max_devolvible == 1
+
+
+@pytest.mark.django_db
+def test_return_screens_query_count_independent_of_lines(client):
+    u = User.objects.create_user(username='dv2', email='dv2@test.com', password='p', rol='ADMIN')
+    client.force_login(u)
+    chica = _venta_con_lineas(u, 1)
+    grande = _venta_con_lineas(u, 8)
+
+    conteos = []
+    for venta in (chica, grande):
+        with CaptureQueriesContext(connection) as api:
+            data = client.get(reverse('venta_detalles_api', args=[venta.id])).json()
+        with CaptureQueriesContext(connection) as pagina:
+            client.get(reverse('devolver_desde_venta', args=[venta.id]))
+        conteos.append((len(api), len(pagina)))
+    assert conteos[0] == conteos[1]
+    assert data['detalles'][0]['max_returnable'] == 3
@@ -0,0 +1,49 @@
+import pytest
+from datetime import timedelta
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.utils import timezone
+
+from accounts.models import User
+
+
+def _inactivo(n, dias=30):
+    u = User.objects.create_user(username=f'inac{n}', email=f'inac{n}@test.com', password='p', is_active=False)
+    User.objects.filter(pk=u.pk).update(date_joined=timezone.now() - timedelta(days=dias))
+    return u
+
+
+@pytest.mark.django_db
+def test_dry_run_no_borra(capsys):
+    _inactivo(1)
+    call_command('cleanup_inactive_users', '--dry-run')
+    assert User.objects.count() == 1
+    assert 'Simulación' in capsys.readouterr().out
+
+
+@pytest.mark.django_db
+def test_noinput_borra_por_lotes_y_purga_sesiones(capsys, monkeypatch, client):
+    monkeypatch.setattr('builtins.input', lambda *a: pytest.fail('no debe pedir confirmación'))
+    for n in range(5):
+        _inactivo(n)
+    reciente = _inactivo(10, dias=1)
+    activo = User.objects.create_user(username='activo', email='activo@test.com', password='p')
+
+    client.force_login(activo)
+    Session.objects.create(session_key='expirada', session_data='x', expire_date=timezone.now() - timedelta(days=1))
+
+    call_command('cleanup_inactive_users', '--noinput', '--batch-size=2', '--days=7')
+
+    assert set(User.objects.values_list('pk', flat=True)) == {reciente.pk, activo.pk}
+    salida = capsys.readouterr().out
+    assert '2/5 eliminados' in salida and '4/5 eliminados' in salida and '5/5 eliminados' in salida
+    assert not Session.objects.filter(session_key='expirada').exists()
+    assert Session.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_interactivo_cancelado(monkeypatch):
+    _inactivo(1)
+    monkeypatch.setattr('builtins.input', lambda *a: 'n')
+    call_command('cleanup_inactive_users')
+    assert User.objects.count() == 1
@@ -0,0 +1,86 @@
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.html import escape
+
+from accounts.models import User
+from inventario.models import Producto, Proveedor
+from compras.models import Compra
+
+
+def _compra(proveedor, productos, cantidad=2):
+    lineas = [{'producto_id': p.id, 'cantidad': cantidad, 'precio': Decimal('1')} for p in productos]
+    return Compra.registrar(proveedor.id, lineas)
+
+
+@pytest.fixture
+def datos():
+    prov_a = Proveedor.objects.create(nombre='A', telefono='t', direccion='d', correo='cla@test.com')
+    prov_b = Proveedor.objects.create(nombre='B', telefono='t', direccion='d', correo='clb@test.com')
+    productos = [
+        Producto.objects.create(codigo=5300 + i, nombre=f'P{i}', stock=0,
+                                precio_compra=Decimal('1'), precio_venta=Decimal('2'))
+        for i in range(12)
+    ]
+    return prov_a, prov_b, productos
+
+
+@pytest.mark.django_db
+def test_lista_anota_lineas_y_unidades_y_filtra(client, datos):
+    prov_a, prov_b, productos = datos
+    admin = User.objects.create_user(username='cl2', email='cl2@test.com', password='p', rol='ADMIN')
+    client.force_login(admin)
+    ca = _compra(prov_a, productos[:3], cantidad=4)
+    cb = _compra(prov_b, productos[:1])
+    Compra.objects.filter(pk=cb.pk).update(fecha=datetime(2024, 1, 10, 9, 0))
+
+    resp = client.get(reverse('compra_lista'))
+    filas = {c.id: c for c in resp.context['compras']}
+    assert (filas[ca.id].num_lineas, filas[ca.id].unidades) == (3, 12)
+    assert (filas[cb.id].num_lineas, filas[cb.id].unidades) == (1, 2)
+
+    resp = client.get(reverse('compra_lista'), {'proveedor': prov_b.id})
+    assert [c.id for c in resp.context['compras']] == [cb.id]
+    resp = client.get(reverse('compra_lista'), {'fecha_inicio': '2024-01-10', 'fecha_fin': '2024-01-10'})
+    assert [c.id for c in resp.context['compras']] == [cb.id]
+
+
+@pytest.mark.django_db
+def test_lista_paginada_con_consultas_constantes(client, datos, django_assert_max_num_queries):
+    prov_a, _, productos = datos
+    admin = User.objects.create_user(username='cl3', email='cl3@test.com', password='p', rol='ADMIN')
+    client.force_login(admin)
+    for _ in range(55):
+        _compra(prov_a, productos[:2])
+
+    resp = client.get(reverse('compra_lista'), {'proveedor': prov_a.id})
+    assert len(resp.context['compras']) == 50
+    html = resp.content.decode()
+    assert f'href="{escape(resp.context["siguiente_url"])}"' in html
+    assert 'Más recientes' not in html
+    with django_assert_max_num_queries(6):
+        resp = client.get(reverse('compra_lista') + resp.context['siguiente_url'])
+    assert len(resp.context['compras']) == 5
+    html = resp.content.decode()
+    assert f'href="{escape(resp.context["primera_url"])}"' in html
+    assert 'Más antiguas' not in html
+
+
+@pytest.mark.django_db
+def test_detalle_consultas_fijas(client, datos):
+    prov_a, _, productos = datos
+    admin = User.objects.create_user(username='cl4', email='cl4@test.com', password='p', rol='ADMIN')
+    client.force_login(admin)
+    chica = _compra(prov_a, productos[:1])
+    grande = _compra(prov_a, productos)
+
+    conteos = []
+    for compra in (chica, grande):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = client.get(reverse('compra_detalle', args=[compra.id]))
+        assert resp.status_code == 200
+        conteos.append(len(ctx))
+    assert conteos[0] == conteos[1]
@@ -0,0 +1,66 @@
+import pytest
+from decimal import Decimal
+from django.urls import reverse
+
+from accounts.models import User
+from inventario.models import Producto, Proveedor, Inventario
+from compras.models import Compra, DetalleCompra
+
+
+def _proveedor():
+    return Proveedor.objects.create(nombre='ProvLote', telefono='t', direccion='d', correo='provlote@test.com')
+
+
+@pytest.mark.django_db
+def test_compra_resuelve_ids_y_codigos_y_crea_faltantes(client):
+    admin = User.objects.create_user(username='cl1', email='cl1@test.com', password='p', rol='ADMIN')
+    client.force_login(admin)
+    prov = _proveedor()
+    a = Producto.objects.create(codigo=5101, nombre='A', stock=1, precio_compra=Decimal('1'), precio_venta=Decimal('2'))
+    b = Producto.objects.create(codigo=5102, nombre='B', stock=0, precio_compra=Decimal('1'), precio_venta=Decimal('2'))
+
+    resp = client.post(reverse('compra_crear'), data={
+        'proveedor': str(prov.id),
+        'producto_id[]': [str(a.id), '', '', str(a.id)],
+        'producto_codigo[]': ['', '5102', '5199', ''],
+        'producto_nombre[]': ['', '', 'Nuevo', ''],
+        'cantidad[]': ['2', '3', '4', '1'],
+        'precio_unitario[]': ['1.00', '2.00', '3.00', '1.00'],
+    })
+    assert resp.status_code == 302
+
+    compra = Compra.objects.get()
+    assert compra.total == Decimal('21.00')
+    assert compra.detalles.count() == 4
+    nuevo = Producto.objects.get(codigo=5199)
+    assert nuevo.nombre == 'Nuevo' and nuevo.stock == 4
+    a.refresh_from_db()
+    b.refresh_from_db()
+    assert (a.stock, b.stock) == (4, 3)
+    # Un movimiento por producto aunque aparezca en dos líneas
+    assert Inventario.objects.filter(numero_referencia=f'COMPRA-{compra.id}-{a.id}').get().cantidad == 3
+    assert DetalleCompra.objects.filter(producto=nuevo, producto_codigo=5199).exists()
+
+
+@pytest.mark.django_db
+def test_compra_grande_usa_consultas_constantes(django_assert_max_num_queries):
+    prov = _proveedor()
+    productos = Producto.objects.bulk_create([
+        Producto(codigo=60000 + i, nombre=f'P{i}', stock=0, precio_compra=Decimal('1'), precio_venta=Decimal('2'))
+        for i in range(60)
+    ])
+    lineas = [{'producto_id': p.id, 'cantidad': 1, 'precio': Decimal('1')} for p in Producto.objects.all()]
+    lineas += [{'codigo': 70000 + i, 'cantidad': 1, 'precio': Decimal('1')} for i in range(20)]
+
+    with django_assert_max_num_queries(12):
+        compra = Compra.registrar(prov.id, lineas)
+
+    assert compra.detalles.count() == 80
+    assert set(Producto.objects.values_list('stock', flat=True)) == {1}
+
+
+@pytest.mark.django_db
+def test_compra_sin_lineas_validas_no_se_registra():
+    prov = _proveedor()
+    assert Compra.registrar(prov.id, [{'producto_id': 999, 'cantidad': 1, 'precio': Decimal('1')}]) is None
+    assert not Compra.objects.exists()
@@ -0,0 +1,97 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.utils import load_backend
+
+from mytienda import conexiones
+
+
+@pytest.fixture
+def conexion(db, tmp_path):
+    """Factory de conexiones SQLite en archivo con el modo indicado (la de los tests es en memoria)."""
+    abiertas = []
+
+    def crear(modo, **kwargs):
+        datos = conexiones.configurar(
+            {**connection.settings_dict, 'NAME': str(tmp_path / 'conexiones.sqlite3')}, modo, **kwargs
+        )
+        wrapper = load_backend(datos['ENGINE']).DatabaseWrapper(datos, alias='conexiones_prueba')
+        abiertas.append(wrapper)
+        return wrapper
+
+    yield crear
+    for wrapper in abiertas:
+        wrapper.close()
+
+
+def _peticion(wrapper):
+    """Lo que hace Django alrededor de cada petición (request_started / request_finished)."""
+    wrapper.close_if_unusable_or_obsolete()
+    with wrapper.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    wrapper.close_if_unusable_or_obsolete()
+
+
+def test_modos():
+    base = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': 'x'}
+    assert conexiones.configurar(base, 'nueva')['CONN_MAX_AGE'] == 0
+    persistente = conexiones.configurar(base, 'persistente', max_age=120)
+    assert persistente['CONN_MAX_AGE'] == 120 and persistente['CONN_HEALTH_CHECKS'] is True
+    with pytest.raises(ImproperlyConfigured):
+        conexiones.configurar(base, 'pool')
+    with pytest.raises(ImproperlyConfigured):
+        conexiones.configurar(base, 'otro')
+
+
+def test_nueva_cierra_al_terminar(conexion):
+    wrapper = conexion('nueva')
+    _peticion(wrapper)
+    assert wrapper.connection is None
+
+
+def test_persistente_reutiliza(conexion):
+    wrapper = conexion('persistente')
+    _peticion(wrapper)
+    cruda = wrapper.connection
+    _peticion(wrapper)
+    assert cruda is not None and wrapper.connection is cruda
+
+
+def test_persistente_descarta_conexion_caida(conexion, monkeypatch):
+    wrapper = conexion('persistente')
+    _peticion(wrapper)
+    cruda = wrapper.connection
+
+    # El servidor cerró la conexión: el chequeo antes de la primera consulta
+    # de la petición la descarta y abre otra
+    monkeypatch.setattr(wrapper, 'is_usable', lambda: False)
+    wrapper.close_if_unusable_or_obsolete()
+    with wrapper.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    assert wrapper.connection is not None and wrapper.connection is not cruda
+
+
+def test_persistente_no_reutiliza_transaccion_abierta_ni_vencida(conexion):
+    wrapper = conexion('persistente')
+    _peticion(wrapper)
+    wrapper.set_autocommit(False)
+    wrapper.close_if_unusable_or_obsolete()
+    assert wrapper.connection is None
+
+    _peticion(wrapper)
+    wrapper.close_at = 0  # pasó DB_CONN_MAX_AGE
+    wrapper.close_if_unusable_or_obsolete()
+    assert wrapper.connection is None
+
+
+def test_persistente_con_errores_se_valida(conexion, monkeypatch):
+    wrapper = conexion('persistente')
+    _peticion(wrapper)
+    with pytest.raises(Exception):
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT * FROM tabla_inexistente')
+    assert wrapper.errors_occurred
+
+    monkeypatch.setattr(wrapper, 'is_usable', lambda: False)
+    wrapper.close_if_unusable_or_obsolete()
+    assert wrapper.connection is None
@@ -0,0 +1,72 @@
+import pytest
+from decimal import Decimal
+from django.core.management import call_command
+from django.urls import reverse
+
+from accounts.models import User
+from inventario.models import Producto, Proveedor, Inventario
+from compras.models import Compra
+from ventas.models import Venta, DetalleVenta
+from devoluciones.models import Devolucion
+
+
+def _estado(producto):
+    producto.refresh_from_db()
+    return producto.stock, producto.costo_promedio, producto.valor_inventario
+
+
+@pytest.mark.django_db
+def test_promedio_ponderado_con_compras_ventas_y_devoluciones():
+    u = User.objects.create_user(username='cp1', email='cp1@test.com', password='p', rol='CAJERO')
+    prov = Proveedor.objects.create(nombre='P', telefono='t', direccion='d', correo='cp@test.com')
+    p = Producto.objects.create(codigo=5501, nombre='Cafe', stock=0,
+                                precio_compra=Decimal('9'), precio_venta=Decimal('20'))
+
+    Compra.registrar(prov.id, [{'producto_id': p.id, 'cantidad': 10, 'precio': Decimal('10')}])
+    Compra.registrar(prov.id, [{'producto_id': p.id, 'cantidad': 10, 'precio': Decimal('13')}])
+    assert _estado(p) == (20, Decimal('11.5000'), Decimal('230.00'))
+
+    venta = Venta.objects.create(usuario=u, metodo_pago='EFECTIVO')
+    detalle = DetalleVenta.objects.create(venta=venta, producto=p, cantidad=5,
+                                          precio_unitario=Decimal('20'), subtotal=Decimal('100'))
+    Inventario.objects.create(producto=p, tipo='SALIDA', cantidad=5, numero_referencia=f'VENTA-{venta.id}-{p.id}')
+    assert _estado(p) == (15, Decimal('11.5000'), Decimal('172.50'))
+
+    Devolucion.registrar_lote(venta, {detalle.id: 2}, usuario=u)
+    assert _estado(p) == (17, Decimal('11.5000'), Decimal('195.50'))
+
+    # Una compra más barata baja el promedio en proporción al stock
+    Compra.registrar(prov.id, [{'producto_id': p.id, 'cantidad': 3, 'precio': Decimal('5.5')}])
+    assert _estado(p) == (20, Decimal('10.6000'), Decimal('212.00'))
+
+
+@pytest.mark.django_db
+def test_reconstruir_reproduce_el_libro():
+    prov = Proveedor.objects.create(nombre='P2', telefono='t', direccion='d', correo='cp2@test.com')
+    p = Producto.objects.create(codigo=5502, nombre='Te', stock=4,
+                                precio_compra=Decimal('2'), precio_venta=Decimal('5'))
+    Compra.registrar(prov.id, [{'producto_id': p.id, 'cantidad': 6, 'precio': Decimal('4')}])
+    Inventario.objects.create(producto=p, tipo='SALIDA', cantidad=3)
+    Compra.registrar(prov.id, [{'producto_id': p.id, 'cantidad': 3, 'precio': Decimal('6')}])
+    esperado = _estado(p)
+
+    Producto.objects.filter(pk=p.pk).update(costo_promedio=0, valor_inventario=0)
+    call_command('rebuild_costo_promedio', '--chunk-size=2', verbosity=0)
+    assert _estado(p) == esperado
+
+
+@pytest.mark.django_db
+def test_editar_producto_no_pisa_stock_ni_costos(client):
+    admin = User.objects.create_user(username='cp3', email='cp3@test.com', password='p', rol='ADMIN')
+    client.force_login(admin)
+    prov = Proveedor.objects.create(nombre='P3', telefono='t', direccion='d', correo='cp3@test.com')
+    p = Producto.objects.create(codigo=5503, nombre='Azucar', stock=0,
+                                precio_compra=Decimal('2'), precio_venta=Decimal('5'))
+    Compra.registrar(prov.id, [{'producto_id': p.id, 'cantidad': 5, 'precio': Decimal('3')}])
+
+    client.post(reverse('producto_editar', args=[p.id]), {
+        'nombre': 'Azucar fina', 'precio_compra': '2.5', 'precio_venta': '6',
+    })
+    p.refresh_from_db()
+    assert p.nombre == 'Azucar fina'
+    assert (p.stock, p.costo_promedio) == (5, Decimal('3.0000'))
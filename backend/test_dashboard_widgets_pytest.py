@@ -0,0 +1,52 @@
+import pytest
+from decimal import Decimal
+from django.core.cache import cache
+from django.urls import reverse
+
+from accounts.models import User
+from inventario.models import Producto, Inventario
+from ventas.models import Venta
+from reportes.views import DASHBOARD_WIDGETS, datos_widget
+
+
+@pytest.fixture(autouse=True)
+def limpiar_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_dashboard_shell_renders_without_widget_queries(client, django_assert_max_num_queries):
+    admin = User.objects.create_user(username='dash1', email='dash1@test.com', password='p', rol='ADMIN')
+    client.force_login(admin)
+    # Solo sesión + usuario: ningún KPI ni serie se calcula al servir la página
+    with django_assert_max_num_queries(2):
+        resp = client.get(reverse('reportes:dashboard'))
+    assert resp.status_code == 200
+    for nombre in DASHBOARD_WIDGETS:
+        assert reverse('reportes:dashboard_widget', args=[nombre]) in resp.content.decode('utf-8')
+
+
+@pytest.mark.django_db
+def test_widget_endpoints_return_json_and_are_cached(client, django_assert_num_queries):
+    admin = User.objects.create_user(username='dash2', email='dash2@test.com', password='p', rol='ADMIN')
+    p = Producto.objects.create(codigo=3001, nombre='ProdDash', stock=3, precio_compra=Decimal('1'), precio_venta=Decimal('2'))
+    Inventario.objects.create(producto=p, tipo='ENTRADA', cantidad=4)
+    Venta.objects.create(usuario=admin, total_final=Decimal('20.00'))
+    client.force_login(admin)
+
+    kpis = client.get(reverse('reportes:dashboard_widget', args=['kpis'])).json()
+    assert kpis == {'total_productos': 1, 'stock_total': 7, 'ventas_hoy': 20.0, 'bajo_stock': 0}
+
+    mov = client.get(reverse('reportes:dashboard_widget', args=['movimientos_7d'])).json()
+    assert len(mov['dias']) == 7 and mov['entradas'][-1] == 4
+
+    ventas = client.get(reverse('reportes:dashboard_widget', args=['ventas_7d'])).json()
+    assert ventas['totales'][-1] == 20.0
+
+    assert client.get(reverse('reportes:dashboard_widget', args=['nope'])).status_code == 404
+
+    # Segunda lectura servida desde la caché
+    with django_assert_num_queries(0):
+        assert datos_widget('kpis') == kpis
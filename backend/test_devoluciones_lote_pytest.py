@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.db import connection, OperationalError
+from django.urls import reverse
+
+from accounts.models import User
+from inventario.models import Producto, Inventario
+from ventas.models import Venta, DetalleVenta
+from devoluciones.models import Devolucion
+
+
+def _venta(usuario, cantidades, base=4100):
+    venta = Venta.objects.create(usuario=usuario, metodo_pago='EFECTIVO')
+    for i, cantidad in enumerate(cantidades):
+        p = Producto.objects.create(codigo=base + i, nombre=f'L{i}', stock=20,
+                                    precio_compra=Decimal('1'), precio_venta=Decimal('2'))
+        DetalleVenta.objects.create(venta=venta, producto=p, cantidad=cantidad,
+                                    precio_unitario=Decimal('2'), subtotal=Decimal(2 * cantidad))
+    return venta
+
+
+@pytest.mark.django_db
+def test_lote_aplica_stock_contador_y_movimientos(client):
+    u = User.objects.create_user(username='lt1', email='lt1@test.com', password='p', rol='ADMIN')
+    client.force_login(u)
+    venta = _venta(u, [3, 2])
+    d1, d2 = venta.detalles.order_by('id')
+    stock_inicial = {d.producto_id: d.producto.stock for d in (d1, d2)}
+
+    resp = client.post(reverse('devolver_desde_venta', args=[venta.id]), {
+        f'detalle_{d1.id}': '2', f'detalle_{d2.id}': '1', 'motivo': 'cambio',
+    })
+    assert resp.status_code == 302
+
+    d1.refresh_from_db()
+    d2.refresh_from_db()
+    assert (d1.cantidad_devuelta, d2.cantidad_devuelta) == (2, 1)
+    assert Devolucion.objects.filter(venta=venta).count() == 2
+    for d, n in ((d1, 2), (d2, 1)):
+        assert Producto.objects.get(id=d.producto_id).stock == stock_inicial[d.producto_id] + n
+    devs = Devolucion.objects.filter(venta=venta)
+    refs = set(Inventario.objects.filter(tipo='ENTRADA').values_list('numero_referencia', flat=True))
+    assert refs == {d.referencia_inventario for d in devs}
+
+
+@pytest.mark.django_db
+def test_lote_todo_o_nada():
+    u = User.objects.create_user(username='lt2', email='lt2@test.com', password='p', rol='ADMIN')
+    venta = _venta(u, [3, 2])
+    d1, d2 = venta.detalles.order_by('id')
+
+    with pytest.raises(ValidationError):
+        Devolucion.registrar_lote(venta, {d1.id: 1, d2.id: 5}, usuario=u)
+
+    d1.refresh_from_db()
+    assert d1.cantidad_devuelta == 0
+    assert not Devolucion.objects.exists()
+    assert not Inventario.objects.filter(tipo='ENTRADA').exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_devoluciones_simultaneas_no_superan_lo_vendido():
+    u = User.objects.create_user(username='lt3', email='lt3@test.com', password='p', rol='ADMIN')
+    venta = _venta(u, [3])
+    detalle = venta.detalles.get()
+    barrera = threading.Barrier(2)
+    resultados = []
+
+    def devolver():
+        try:
+            barrera.wait()
+            Devolucion.registrar_lote(venta, {detalle.id: 2}, usuario=u)
+            resultados.append('ok')
+        except (ValidationError, OperationalError):
+            resultados.append('rechazada')
+        finally:
+            connection.close()
+
+    hilos = [threading.Thread(target=devolver) for _ in range(2)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    detalle.refresh_from_db()
+    devuelto = sum(Devolucion.objects.filter(detalle_venta=detalle).values_list('cantidad', flat=True))
+    assert sorted(resultados) == ['ok', 'rechazada'], resultados
+    assert devuelto == detalle.cantidad_devuelta == 2
+
+
+@pytest.mark.django_db
+def test_devolucion_individual_todo_o_nada(monkeypatch):
+    from reportes.models import VentaProductoDia
+    u = User.objects.create_user(username='lt4', email='lt4@test.com', password='p', rol='ADMIN')
+    venta = _venta(u, [3], base=4200)
+    detalle = venta.detalles.get()
+
+    def falla(*args, **kwargs):
+        raise RuntimeError('resumen no disponible')
+    monkeypatch.setattr(VentaProductoDia, 'registrar_devolucion', falla)
+
+    with pytest.raises(RuntimeError):
+        Devolucion.objects.create(venta=venta, detalle_venta=detalle, cantidad=1)
+
+    detalle.refresh_from_db()
+    assert detalle.cantidad_devuelta == 0
+    assert Producto.objects.get(pk=detalle.producto_id).stock == 20
+    assert not Devolucion.objects.exists()
+    assert not Inventario.objects.filter(tipo='ENTRADA').exists()
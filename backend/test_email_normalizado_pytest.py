@@ -0,0 +1,62 @@
+import pytest
+from django.contrib.auth import authenticate
+from django.db import connection, transaction, IntegrityError
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import User
+from inventario.models import Proveedor
+
+
+def _sin_upper(ctx):
+    return not any('UPPER(' in q['sql'].upper() for q in ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_login_con_mayusculas_usa_igualdad():
+    User.objects.create_user(username='norm1', email='  Norm1@Test.COM ', password='p', rol='CAJERO')
+    assert User.objects.filter(email='norm1@test.com').exists()
+
+    with CaptureQueriesContext(connection) as ctx:
+        user = authenticate(None, email='NORM1@test.com', password='p')
+    assert user is not None and user.username == 'norm1'
+    assert _sin_upper(ctx)
+
+    # El backend por defecto (login del admin) también normaliza
+    assert authenticate(None, username='Norm1@TEST.com', password='p') is not None
+
+
+@pytest.mark.django_db
+def test_email_unico_sin_distinguir_mayusculas():
+    User.objects.create_user(username='norm2', email='norm2@test.com', password='p')
+    otro = User.objects.create_user(username='norm3', email='norm3@test.com', password='p')
+
+    # Aunque se escriba sin pasar por save(), el índice sobre lower(email) lo impide
+    with pytest.raises(IntegrityError):
+        with transaction.atomic():
+            User.objects.filter(pk=otro.pk).update(email='NORM2@test.com')
+
+
+@pytest.mark.django_db
+def test_registro_detecta_email_existente_con_otras_mayusculas(client):
+    User.objects.create_user(username='norm4', email='norm4@test.com', password='p')
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.post(reverse('register'), {
+            'email': 'NORM4@Test.com', 'username': 'otro', 'password': 'secreta1', 'password_confirm': 'secreta1',
+        })
+    assert resp.status_code == 200
+    assert User.objects.count() == 1
+    assert _sin_upper(ctx)
+
+
+@pytest.mark.django_db
+def test_verificar_correo_proveedor(client):
+    admin = User.objects.create_user(username='norm5', email='norm5@test.com', password='p', rol='ADMIN')
+    Proveedor.objects.create(nombre='Prov', correo='Ventas@Prov.com', telefono='1', direccion='X')
+    assert Proveedor.objects.get().correo == 'ventas@prov.com'
+    client.force_login(admin)
+
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get(reverse('verificar_correo_proveedor'), {'correo': 'VENTAS@prov.com'})
+    assert resp.json() == {'existe': True}
+    assert _sin_upper(ctx)
@@ -0,0 +1,63 @@
+import pytest
+from datetime import date, datetime
+from decimal import Decimal
+from django.db import connection
+from django.utils import timezone
+
+from inventario.models import Producto, Inventario
+from ventas.models import Venta
+from devoluciones.models import Devolucion
+from mytienda.fechas import filtro_dias, inicio_dia, dia_local, parse_fecha
+
+
+def test_parse_fecha():
+    assert parse_fecha('2025-01-31') == date(2025, 1, 31)
+    assert parse_fecha('2025-02-30') is None
+    assert parse_fecha('') is None and parse_fecha(None) is None
+
+
+def test_filtro_dias_is_half_open(settings):
+    settings.USE_TZ = False
+    filtro = filtro_dias('fecha', date(2025, 1, 1), date(2025, 1, 31))
+    assert filtro == {
+        'fecha__gte': datetime(2025, 1, 1),
+        'fecha__lt': datetime(2025, 2, 1),
+    }
+    assert filtro_dias('fecha') == {}
+
+
+@pytest.mark.django_db
+def test_rango_uses_store_timezone(settings):
+    settings.USE_TZ = True
+    settings.TIME_ZONE = 'America/Bogota'
+    timezone.activate('America/Bogota')
+    try:
+        inicio = inicio_dia(date(2025, 3, 10))
+        assert inicio.utcoffset().total_seconds() == -5 * 3600
+
+        # 23:30 en Bogotá es ya el día siguiente en UTC, pero cuenta para el 10
+        tarde = timezone.make_aware(datetime(2025, 3, 10, 23, 30))
+        medianoche = timezone.make_aware(datetime(2025, 3, 11, 0, 0))
+        v1 = Venta.objects.create(total_final=Decimal('1'))
+        v2 = Venta.objects.create(total_final=Decimal('2'))
+        Venta.objects.filter(id=v1.id).update(fecha=tarde)
+        Venta.objects.filter(id=v2.id).update(fecha=medianoche)
+
+        del_dia = Venta.objects.filter(**filtro_dias('fecha', date(2025, 3, 10), date(2025, 3, 10)))
+        assert list(del_dia.values_list('id', flat=True)) == [v1.id]
+        assert dia_local(tarde) == date(2025, 3, 10)
+    finally:
+        timezone.deactivate()
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(connection.vendor != 'sqlite', reason='Plan de consulta específico de SQLite')
+@pytest.mark.parametrize('model', [Venta, Inventario, Devolucion])
+def test_date_range_queries_use_fecha_index(model):
+    hoy = date.today()
+    plan = model.objects.filter(**filtro_dias('fecha', hoy, hoy)).explain()
+    assert 'USING INDEX' in plan and 'fecha' in plan
+
+    # El filtro con __date envuelve la columna y no puede usar el índice
+    plan_cast = model.objects.filter(fecha__date=hoy).explain()
+    assert 'USING INDEX' not in plan_cast
@@ -0,0 +1,124 @@
+import json
+
+import pytest
+from datetime import datetime, date
+from decimal import Decimal
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from accounts.models import User
+from inventario.models import Producto, Inventario
+from ventas.models import Venta, DetalleVenta
+from reportes.models import VentaProductoDia
+
+
+@pytest.fixture
+def productos():
+    return [
+        Producto.objects.create(codigo=5700 + i, nombre=f'Imp{i}', stock=100,
+                                precio_compra=Decimal('1'), precio_venta=Decimal('2'))
+        for i in range(2)
+    ]
+
+
+@pytest.mark.django_db
+def test_importa_csv_con_fecha_original_e_inventario(tmp_path, productos):
+    User.objects.create_user(username='imp', email='caja@tienda.com', password='p', rol='CAJERO')
+    archivo = tmp_path / 'ventas.csv'
+    archivo.write_text(
+        'ticket,fecha,cajero,metodo_pago,producto_codigo,producto_nombre,cantidad,precio_unitario\n'
+        'A1,2021-05-03T10:15:00,caja@tienda.com,TARJETA,5700,,2,3.00\n'
+        'A1,2021-05-03T10:15:00,caja@tienda.com,TARJETA,5701,,1,4.00\n'
+        'A2,2021-05-04T18:00:00,,EFECTIVO,5700,,5,3.00\n'
+        'A3,2021-05-04T19:00:00,,EFECTIVO,99999,Viejo,1,7.00\n',
+        encoding='utf-8',
+    )
+
+    call_command('importar_ventas', str(archivo), '--chunk-size=2', '--con-inventario', verbosity=0)
+
+    assert Venta.objects.count() == 3
+    a1 = Venta.objects.get(fecha=datetime(2021, 5, 3, 10, 15))
+    assert a1.metodo_pago == 'TARJETA' and a1.usuario.email == 'caja@tienda.com'
+    assert a1.monto_recibido == 0
+    assert Venta.objects.get(fecha=datetime(2021, 5, 4, 18)).monto_recibido == Decimal('17.85')
+    assert a1.total == Decimal('10.00') and a1.detalles.count() == 2
+    assert DetalleVenta.objects.filter(producto__isnull=True, producto_nombre='Viejo').exists()
+
+    productos[0].refresh_from_db()
+    assert productos[0].stock == 93
+    assert Inventario.objects.filter(tipo='SALIDA').count() == 3
+    # El resumen diario se reconstruye al final
+    fila = VentaProductoDia.objects.get(producto_codigo='5700', dia=date(2021, 5, 4))
+    assert fila.cantidad == 5
+
+
+@pytest.mark.django_db
+def test_importa_jsonl_sin_inventario(tmp_path, productos):
+    archivo = tmp_path / 'ventas.jsonl'
+    ventas = [
+        {'ticket': str(i), 'fecha': f'2020-01-{i + 1:02d}T09:00:00', 'iva_porcentaje': '0',
+         'lineas': [{'codigo': 5701, 'cantidad': 1, 'precio_unitario': '2.50'}]}
+        for i in range(7)
+    ]
+    archivo.write_text('\n'.join(json.dumps(v) for v in ventas), encoding='utf-8')
+
+    call_command('importar_ventas', str(archivo), '--chunk-size=3', verbosity=0)
+
+    assert Venta.objects.count() == 7
+    assert Venta.objects.order_by('fecha').first().fecha == datetime(2020, 1, 1, 9, 0)
+    assert Venta.objects.first().total_final == Decimal('2.50')
+    assert not Inventario.objects.exists()
+    productos[1].refresh_from_db()
+    assert productos[1].stock == 100
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('campo, valor, mensaje', [
+    ('metodo_pago', 'CHEQUE', 'método de pago desconocido'),
+    ('cantidad', '0', 'no es positiva'),
+    ('cantidad', '-2', 'no es positiva'),
+])
+def test_rechaza_metodo_desconocido_y_cantidad_no_positiva(tmp_path, productos, campo, valor, mensaje):
+    fila = {'metodo_pago': 'EFECTIVO', 'cantidad': '1', campo: valor}
+    archivo = tmp_path / 'ventas.csv'
+    archivo.write_text(
+        'ticket,fecha,metodo_pago,producto_codigo,cantidad,precio_unitario\n'
+        f"B1,2021-05-03T10:15:00,{fila['metodo_pago']},5700,{fila['cantidad']},3.00\n",
+        encoding='utf-8',
+    )
+
+    with pytest.raises(CommandError, match=f'Ticket B1: .*{mensaje}'):
+        call_command('importar_ventas', str(archivo), verbosity=0)
+    assert not Venta.objects.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('fecha', ['2024-13-01T10:00', '2024-02-30T10:00'])
+def test_fecha_imposible_es_error_de_importacion(tmp_path, productos, fecha):
+    archivo = tmp_path / 'ventas.csv'
+    archivo.write_text(
+        'ticket,fecha,producto_codigo,cantidad,precio_unitario\n'
+        f'C1,{fecha},5700,1,3.00\n',
+        encoding='utf-8',
+    )
+
+    with pytest.raises(CommandError, match='Ticket C1: fecha inválida'):
+        call_command('importar_ventas', str(archivo), verbosity=0)
+    assert not Venta.objects.exists()
+
+
+@pytest.mark.django_db
+def test_reimportar_tras_error_omite_tickets_ya_importados(tmp_path, productos):
+    filas = [f'D{i},2021-06-0{i + 1}T10:00:00,5700,1,3.00' for i in range(4)]
+    archivo = tmp_path / 'ventas.csv'
+    encabezado = 'ticket,fecha,producto_codigo,cantidad,precio_unitario\n'
+    archivo.write_text(encabezado + '\n'.join(filas[:3] + ['D3,2021-06-04T10:00:00,5700,x,3.00']) + '\n', encoding='utf-8')
+
+    with pytest.raises(CommandError, match='Se conservaron las 2 ventas'):
+        call_command('importar_ventas', str(archivo), '--chunk-size=2', verbosity=0)
+    assert set(Venta.objects.values_list('ticket_origen', flat=True)) == {'D0', 'D1'}
+
+    archivo.write_text(encabezado + '\n'.join(filas) + '\n', encoding='utf-8')
+    call_command('importar_ventas', str(archivo), '--chunk-size=2', verbosity=0)
+    assert sorted(Venta.objects.values_list('ticket_origen', flat=True)) == ['D0', 'D1', 'D2', 'D3']
+    assert DetalleVenta.objects.count() == 4
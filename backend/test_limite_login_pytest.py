@@ -0,0 +1,116 @@
+import time
+
+import pytest
+from django.contrib.auth.hashers import MD5PasswordHasher
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts import limite_login
+from accounts.models import User
+
+
+@pytest.fixture(autouse=True)
+def cache_limpia():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def hashes(monkeypatch):
+    """Cuenta los cálculos de hash de contraseñas (verify también pasa por encode)."""
+    llamadas = []
+    encode = MD5PasswordHasher.encode
+    monkeypatch.setattr(MD5PasswordHasher, 'encode', lambda self, *a: llamadas.append('encode') or encode(self, *a))
+    return llamadas
+
+
+@pytest.fixture
+def cajero(db):
+    return User.objects.create_user(username='lim_caj', email='lim_caj@test.com', password='clave', rol='CAJERO')
+
+
+def _login(client, email, password, ip='10.0.0.1'):
+    return client.post(reverse('login'), {'email': email, 'password': password}, REMOTE_ADDR=ip)
+
+
+@pytest.mark.django_db
+def test_un_solo_hash_por_intento_fallido(client, cajero, hashes):
+    _login(client, 'lim_caj@test.com', 'mala')
+    assert hashes == ['encode']
+
+    # Correo inexistente: mismo costo que una contraseña incorrecta
+    hashes.clear()
+    _login(client, 'nadie@test.com', 'mala')
+    assert hashes == ['encode']
+
+
+@pytest.mark.django_db
+def test_bloqueo_por_cuenta_sin_hash_ni_bd(client, cajero, hashes, settings):
+    settings.LOGIN_MAX_FALLOS_CUENTA = 3
+    for _ in range(3):
+        assert _login(client, 'lim_caj@test.com', 'mala').status_code == 200
+
+    hashes.clear()
+    with CaptureQueriesContext(connection) as ctx:
+        resp = _login(client, 'LIM_CAJ@test.com', 'clave')
+    assert resp.status_code == 429
+    assert int(resp['Retry-After']) > 0
+    assert hashes == []
+    assert not any('accounts_user' in q['sql'] for q in ctx.captured_queries)
+
+    # Otra cuenta desde la misma IP sigue entrando
+    User.objects.create_user(username='lim_otro', email='lim_otro@test.com', password='clave')
+    assert _login(client, 'lim_otro@test.com', 'clave').status_code == 302
+
+    m = limite_login.metricas()
+    assert m['fallos'] == 3 and m['bloqueos_cuenta'] == 1 and m['rechazados'] == 1
+
+
+@pytest.mark.django_db
+def test_bloqueo_por_ip(client, cajero, settings):
+    settings.LOGIN_MAX_FALLOS_IP = 4
+    for i in range(4):
+        _login(client, f'cuenta{i}@test.com', 'x', ip='10.0.0.9')
+
+    assert _login(client, 'lim_caj@test.com', 'clave', ip='10.0.0.9').status_code == 429
+    assert _login(client, 'lim_caj@test.com', 'clave', ip='10.0.0.10').status_code == 302
+    assert limite_login.metricas()['bloqueos_ip'] == 1
+
+
+@pytest.mark.django_db
+def test_exito_reinicia_la_cuenta_y_el_bloqueo_expira(client, cajero, settings, monkeypatch):
+    settings.LOGIN_MAX_FALLOS_CUENTA = 3
+    for _ in range(2):
+        _login(client, 'lim_caj@test.com', 'mala')
+    assert _login(client, 'lim_caj@test.com', 'clave').status_code == 302
+    client.logout()
+    for _ in range(2):
+        _login(client, 'lim_caj@test.com', 'mala')
+    assert _login(client, 'lim_caj@test.com', 'clave').status_code == 302
+    client.logout()
+
+    for _ in range(3):
+        _login(client, 'lim_caj@test.com', 'mala')
+    assert _login(client, 'lim_caj@test.com', 'clave').status_code == 429
+
+    ahora = time.time()
+    monkeypatch.setattr(time, 'time', lambda: ahora + settings.LOGIN_BLOQUEO + 1)
+    assert _login(client, 'lim_caj@test.com', 'clave').status_code == 302
+
+
+@pytest.mark.django_db
+def test_token_jwt_bloqueado_responde_429(client, cajero, settings, hashes):
+    settings.LOGIN_MAX_FALLOS_CUENTA = 2
+    url = reverse('token_obtain_pair')
+    for _ in range(2):
+        resp = client.post(url, {'email': 'lim_caj@test.com', 'password': 'mala'}, content_type='application/json')
+        assert resp.status_code == 401
+
+    hashes.clear()
+    resp = client.post(url, {'email': 'lim_caj@test.com', 'password': 'clave'}, content_type='application/json')
+    assert resp.status_code == 429
+    assert 'Retry-After' in resp
+    assert hashes == []
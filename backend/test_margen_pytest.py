@@ -0,0 +1,81 @@
+import pytest
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import User
+from inventario.models import Producto
+from ventas.models import Venta, DetalleVenta
+from devoluciones.models import Devolucion
+from reportes import consultas
+from mytienda import fechas
+
+
+def _vender(usuario, producto, cantidad):
+    venta = Venta.objects.create(usuario=usuario, metodo_pago='EFECTIVO')
+    return DetalleVenta.objects.create(
+        venta=venta, producto=producto, cantidad=cantidad,
+        precio_unitario=producto.precio_venta, subtotal=producto.precio_venta * cantidad,
+    )
+
+
+@pytest.mark.django_db
+def test_costo_snapshot_no_cambia_con_el_producto():
+    u = User.objects.create_user(username='mg1', email='mg1@test.com', password='p', rol='CAJERO')
+    p = Producto.objects.create(codigo=4001, nombre='Snap', stock=10, precio_compra=Decimal('2.00'), precio_venta=Decimal('5.00'))
+
+    detalle = _vender(u, p, 2)
+    assert detalle.costo_unitario == Decimal('2.00')
+
+    Producto.objects.filter(pk=p.pk).update(precio_compra=Decimal('4.00'))
+    detalle.refresh_from_db()
+    assert detalle.costo_unitario == Decimal('2.0000')
+    assert detalle.margen == Decimal('6.0000')
+
+
+@pytest.mark.django_db
+def test_margen_por_producto_cajero_y_dia_descuenta_devoluciones():
+    ana = User.objects.create_user(username='mg_ana', email='mg2@test.com', password='p', rol='CAJERO')
+    beto = User.objects.create_user(username='mg_beto', email='mg3@test.com', password='p', rol='CAJERO')
+    a = Producto.objects.create(codigo=4002, nombre='MgA', stock=50, precio_compra=Decimal('1.00'), precio_venta=Decimal('3.00'))
+    b = Producto.objects.create(codigo=4003, nombre='MgB', stock=50, precio_compra=Decimal('4.00'), precio_venta=Decimal('5.00'))
+
+    detalle = _vender(ana, a, 4)   # ingresos 12, costo 4
+    _vender(beto, b, 2)            # ingresos 10, costo 8
+    Devolucion.objects.create(venta=detalle.venta, detalle_venta=detalle, cantidad=1, usuario=ana)
+
+    hoy = fechas.hoy()
+    por_producto = consultas.datos_margen(hoy, hoy, 'producto')
+    filas = {f['codigo']: f for f in por_producto['filas']}
+    assert filas['4002']['unidades'] == 3
+    assert filas['4002']['ingresos'] == Decimal('9')
+    assert filas['4002']['costo'] == Decimal('3')
+    assert filas['4002']['margen'] == Decimal('6')
+    assert filas['4002']['producto_nombre'] == 'MgA'
+    assert filas['4003']['margen'] == Decimal('2')
+    assert por_producto['total_margen'] == Decimal('8')
+
+    por_cajero = consultas.datos_margen(hoy, hoy, 'cajero')
+    assert [f['usuario_nombre'] for f in por_cajero['filas']] == ['mg_ana', 'mg_beto']
+
+    por_dia = consultas.datos_margen(hoy, hoy, 'dia')
+    assert len(por_dia['filas']) == 1
+    assert por_dia['filas'][0]['num_ventas'] == 2
+    assert por_dia['total_ingresos'] == Decimal('19')
+
+
+@pytest.mark.django_db
+def test_margen_view_no_consulta_productos(client):
+    admin = User.objects.create_user(username='mg_admin', email='mg4@test.com', password='p', rol='ADMIN')
+    p = Producto.objects.create(codigo=4004, nombre='MgView', stock=50, precio_compra=Decimal('1.00'), precio_venta=Decimal('2.00'))
+    for _ in range(3):
+        _vender(admin, p, 1)
+    client.force_login(admin)
+
+    for agrupar in ('dia', 'producto', 'cajero'):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = client.get(reverse('reportes:margen_bruto') + f'?agrupar={agrupar}')
+        assert resp.status_code == 200
+        assert resp.context['total_margen'] == Decimal('3')
+        assert not any('inventario_' in q['sql'] for q in ctx.captured_queries)
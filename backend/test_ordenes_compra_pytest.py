@@ -0,0 +1,98 @@
+import pytest
+from decimal import Decimal
+from django.urls import reverse
+
+from accounts.models import User
+from inventario.models import Producto, Proveedor, OrdenCompra, Inventario
+from compras.models import UltimoCostoProveedor
+
+
+@pytest.fixture
+def admin_client(client):
+    admin = User.objects.create_user(username='oc1', email='oc1@test.com', password='p', rol='ADMIN')
+    client.force_login(admin)
+    return client
+
+
+def _ordenes(n_por_producto=3):
+    prov = Proveedor.objects.create(nombre='ProvOC', telefono='t', direccion='d', correo='provoc@test.com')
+    productos = [
+        Producto.objects.create(codigo=5600 + i, nombre=f'OC{i}', stock=1,
+                                precio_compra=Decimal('1'), precio_venta=Decimal('2'))
+        for i in range(2)
+    ]
+    ordenes = [
+        OrdenCompra.objects.create(proveedor=prov, producto=p, cantidad=5, costo_unitario=Decimal('2'),
+                                   subtotal=Decimal('10'))
+        for p in productos for _ in range(n_por_producto)
+    ]
+    return productos, ordenes
+
+
+@pytest.mark.django_db
+def test_recibir_lote_agrupa_stock_y_es_reintentable(admin_client, django_assert_max_num_queries):
+    productos, ordenes = _ordenes()
+    ids = [str(o.id) for o in ordenes]
+    url = reverse('orden_recibir_lote')
+
+    admin_client.post(url, {'ordenes': ids})
+    for p in productos:
+        p.refresh_from_db()
+        assert p.stock == 16
+    assert set(OrdenCompra.objects.values_list('estado', flat=True)) == {'RECIBIDA'}
+    assert Inventario.objects.filter(numero_referencia__startswith='OC-').count() == len(ordenes)
+
+    # Reintentar la misma entrega no vuelve a sumar stock
+    with django_assert_max_num_queries(8):
+        admin_client.post(url, {'ordenes': ids})
+    productos[0].refresh_from_db()
+    assert productos[0].stock == 16
+
+
+@pytest.mark.django_db
+def test_recibir_lote_actualiza_ultimo_costo(admin_client):
+    productos, ordenes = _ordenes(n_por_producto=2)
+    prov = ordenes[0].proveedor
+    UltimoCostoProveedor.objects.create(proveedor=prov, producto=productos[0], costo=Decimal('1.50'),
+                                        fecha=ordenes[0].fecha_creacion)
+    OrdenCompra.objects.filter(pk=ordenes[1].pk).update(costo_unitario=Decimal('2.75'))
+
+    OrdenCompra.recibir_lote([o.id for o in ordenes])
+
+    costos = dict(UltimoCostoProveedor.objects.filter(proveedor=prov).values_list('producto_id', 'costo'))
+    assert costos == {productos[0].id: Decimal('2.75'), productos[1].id: Decimal('2.00')}
+    resp = admin_client.get(reverse('compras_api_productos'), {'proveedor': prov.id, 'con_costo': '1'})
+    assert {p['ultimo_costo'] for p in resp.json()} == {'2.75', '2.00'}
+
+
+@pytest.mark.django_db
+def test_recibir_lote_ignora_canceladas(admin_client):
+    productos, ordenes = _ordenes(n_por_producto=1)
+    admin_client.post(reverse('orden_cancelar', args=[ordenes[0].id]))
+    recibidas = OrdenCompra.recibir_lote([o.id for o in ordenes])
+    assert [o.id for o in recibidas] == [ordenes[1].id]
+    productos[0].refresh_from_db()
+    assert productos[0].stock == 1
+
+
+@pytest.mark.django_db
+def test_crud_de_ordenes(admin_client):
+    productos, _ = _ordenes(n_por_producto=0)
+    prov = Proveedor.objects.get()
+    admin_client.post(reverse('orden_crear'), {
+        'proveedor': prov.id, 'producto': productos[0].id, 'cantidad': '4', 'costo_unitario': '2.50',
+    })
+    orden = OrdenCompra.objects.get()
+    assert orden.subtotal == Decimal('10.000')
+
+    admin_client.post(reverse('orden_editar', args=[orden.id]), {
+        'proveedor': prov.id, 'producto': productos[0].id, 'cantidad': '6', 'costo_unitario': '2.50',
+    })
+    orden.refresh_from_db()
+    assert orden.cantidad == 6
+
+    assert admin_client.get(reverse('orden_lista')).status_code == 200
+    assert admin_client.get(reverse('orden_detalle', args=[orden.id])).status_code == 200
+    admin_client.post(reverse('orden_recibir', args=[orden.id]))
+    orden.refresh_from_db()
+    assert orden.estado == 'RECIBIDA' and orden.fecha_recepcion is not None
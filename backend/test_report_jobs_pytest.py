@@ -0,0 +1,102 @@
+import pytest
+from decimal import Decimal
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+
+from accounts.models import User
+from ventas.models import Venta
+from reportes.models import ReporteJob
+from reportes import jobs
+
+
+@pytest.fixture
+def admin_client(client, settings, tmp_path):
+    settings.REPORTES_JOBS_DIR = str(tmp_path)
+    settings.REPORTES_ASYNC_DIAS = 60
+    admin = User.objects.create_user(username='job1', email='job1@test.com', password='p', rol='ADMIN')
+    client.force_login(admin)
+    return client
+
+
+@pytest.mark.django_db
+def test_large_range_enqueues_and_duplicates_attach(admin_client):
+    params = '?fecha_inicio=2024-01-01&fecha_fin=2024-12-31'
+    resp = admin_client.get(reverse('reportes:ventas_por_periodo') + params)
+    assert resp.status_code == 302
+    resp2 = admin_client.get(reverse('reportes:ventas_por_periodo') + params)
+    assert resp2.url == resp.url
+    assert ReporteJob.objects.count() == 1
+
+    # Otro reporte con los mismos parámetros es un job distinto
+    admin_client.get(reverse('reportes:ventas_por_cajero') + params)
+    assert ReporteJob.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_worker_runs_jobs_and_results_are_served(admin_client):
+    Venta.objects.create(metodo_pago='EFECTIVO', total_final=Decimal('15.00'))
+    hoy = Venta.objects.get().fecha.date()
+    desde = hoy.replace(year=hoy.year - 1).isoformat()
+    params = {'fecha_inicio': desde, 'fecha_fin': hoy.isoformat()}
+
+    periodo = jobs.encolar('ventas_por_periodo', params)
+    cajero = jobs.encolar('ventas_por_cajero', params)
+    csv_job = jobs.encolar('export_ventas_csv', params)
+    call_command('run_report_jobs', workers=0, once=True)
+
+    periodo.refresh_from_db()
+    assert periodo.estado == 'COMPLETADO'
+    resp = admin_client.get(reverse('reportes:job_detalle', args=[periodo.id]))
+    assert resp.status_code == 200
+    assert resp.context['total_transacciones'] == 1
+
+    cajero.refresh_from_db()
+    assert cajero.estado == 'COMPLETADO', cajero.error
+
+    estado = admin_client.get(reverse('reportes:job_estado', args=[csv_job.id])).json()
+    assert estado['listo'] is True
+    descarga = admin_client.get(reverse('reportes:job_descargar', args=[csv_job.id]))
+    assert descarga.status_code == 200
+    assert b'ID Venta' in b''.join(descarga.streaming_content)
+
+    # Un job completado ya no absorbe peticiones nuevas
+    assert jobs.encolar('ventas_por_periodo', params).id != periodo.id
+
+
+@pytest.fixture
+def bd_en_archivo(transactional_db, tmp_path):
+    """
+    Los procesos del pool abren su propia conexión: con la BD de tests en
+    memoria no verían los datos, así que se usa un SQLite en archivo.
+    """
+    if not connection.is_in_memory_db():
+        yield
+        return
+    # La conexión en memoria se aparta sin cerrarla: cerrarla borraría la BD de tests
+    original, en_memoria = dict(connection.settings_dict), connection.connection
+    connection.settings_dict['NAME'] = str(tmp_path / 'jobs.sqlite3')
+    connection.connection = None
+    try:
+        call_command('migrate', run_syncdb=True, verbosity=0)
+        yield
+    finally:
+        connection.close()
+        connection.settings_dict.update(original)
+        connection.connection = en_memoria
+
+
+def test_worker_con_pool_de_procesos(bd_en_archivo, settings, tmp_path):
+    settings.REPORTES_JOBS_DIR = str(tmp_path)
+    Venta.objects.create(metodo_pago='EFECTIVO', total_final=Decimal('15.00'))
+    hoy = Venta.objects.get().fecha.date()
+    params = {'fecha_inicio': hoy.replace(year=hoy.year - 1).isoformat(), 'fecha_fin': hoy.isoformat()}
+    periodo = jobs.encolar('ventas_por_periodo', params)
+    csv_job = jobs.encolar('export_ventas_csv', params)
+
+    call_command('run_report_jobs', workers=1, once=True, verbosity=0)
+
+    for job in (periodo, csv_job):
+        job.refresh_from_db()
+        assert job.estado == 'COMPLETADO', job.error
+    assert b'ID Venta' in open(csv_job.archivo, 'rb').read()
@@ -0,0 +1,44 @@
+import pytest
+from datetime import timedelta
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from accounts.sesion import purgar_expiradas
+
+
+@pytest.mark.django_db
+def test_purgar_sesiones_solo_expiradas(capsys):
+    ahora = timezone.now()
+    for i in range(5):
+        Session.objects.create(session_key=f'vieja{i}', session_data='x', expire_date=ahora - timedelta(hours=1))
+    Session.objects.create(session_key='vigente', session_data='x', expire_date=ahora + timedelta(hours=1))
+
+    call_command('purgar_sesiones', '--batch-size=2')
+
+    assert list(Session.objects.values_list('session_key', flat=True)) == ['vigente']
+    assert '5 sesiones expiradas' in capsys.readouterr().out
+
+
+@pytest.mark.django_db
+def test_cached_db_no_lee_la_tabla_y_escribe_en_ella(client, settings):
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    cajero = User.objects.create_user(username='ses_caj', email='ses_caj@test.com', password='p', rol='CAJERO')
+    client.force_login(cajero)
+    # Escritura también en la BD: sobrevive aunque se pierda la caché
+    assert Session.objects.filter(session_key=client.session.session_key).exists()
+
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get(reverse('devoluciones_list'))
+    assert resp.status_code == 200
+    assert not any('django_session' in q['sql'] for q in ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_purgar_con_motor_sin_tabla(settings):
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
+    assert purgar_expiradas() is None
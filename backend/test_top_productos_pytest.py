@@ -0,0 +1,57 @@
+import pytest
+from decimal import Decimal
+from django.urls import reverse
+
+from accounts.models import User
+from inventario.models import Producto
+from ventas.models import Venta, DetalleVenta
+from devoluciones.models import Devolucion
+from reportes.models import VentaProductoDia
+
+
+def _vender(usuario, producto, cantidad):
+    venta = Venta.objects.create(usuario=usuario, metodo_pago='EFECTIVO')
+    return DetalleVenta.objects.create(
+        venta=venta, producto=producto, cantidad=cantidad,
+        precio_unitario=producto.precio_venta, subtotal=producto.precio_venta * cantidad,
+    )
+
+
+@pytest.mark.django_db
+def test_rollup_maintained_by_sales_and_returns():
+    u = User.objects.create_user(username='top1', email='top1@test.com', password='p', rol='CAJERO')
+    a = Producto.objects.create(codigo=2601, nombre='ProdA', stock=50, precio_compra=Decimal('1.00'), precio_venta=Decimal('3.00'))
+    b = Producto.objects.create(codigo=2602, nombre='ProdB', stock=50, precio_compra=Decimal('1.00'), precio_venta=Decimal('2.00'))
+
+    _vender(u, a, 2)
+    detalle = _vender(u, a, 3)
+    _vender(u, b, 4)
+    Devolucion.objects.create(venta=detalle.venta, detalle_venta=detalle, cantidad=1, usuario=u)
+
+    fila = VentaProductoDia.objects.get(producto_codigo='2601')
+    assert fila.cantidad == 4
+    assert fila.total == Decimal('12.00')
+    assert fila.transacciones == 2
+
+    dia = fila.dia
+    top = list(VentaProductoDia.top(dia))
+    assert [t['prod_name'] for t in top] == ['ProdA', 'ProdB']
+
+    # Reconstruir desde cero da el mismo resultado
+    VentaProductoDia.reconstruir()
+    assert VentaProductoDia.objects.get(producto_codigo='2601').cantidad == 4
+
+
+@pytest.mark.django_db
+def test_top_productos_view_uses_rollup(client, django_assert_max_num_queries):
+    admin = User.objects.create_user(username='top2', email='top2@test.com', password='p', rol='ADMIN')
+    p = Producto.objects.create(codigo=2603, nombre='ProdTop', stock=50, precio_compra=Decimal('1.00'), precio_venta=Decimal('5.00'))
+    for _ in range(5):
+        _vender(admin, p, 1)
+    client.force_login(admin)
+
+    with django_assert_max_num_queries(5):
+        resp = client.get(reverse('reportes:top_productos') + '?dias=7')
+    assert resp.status_code == 200
+    assert 'ProdTop' in resp.content.decode('utf-8')
+    assert resp.context['top'][0]['num_transacciones'] == 5
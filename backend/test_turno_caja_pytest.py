@@ -0,0 +1,81 @@
+import pytest
+from decimal import Decimal
+from django.contrib.messages import get_messages
+from django.urls import reverse
+
+from accounts.models import User
+from ventas.models import Venta, TurnoCaja
+
+
+@pytest.mark.django_db
+def test_turno_accumulates_sales_and_closing_report(client):
+    cajero = User.objects.create_user(username='caja1', email='caja1@test.com', password='p', rol='CAJERO')
+    client.force_login(cajero)
+
+    resp = client.post(reverse('turno_caja'), {'monto_inicial': '100'})
+    assert resp.status_code == 302
+    turno = TurnoCaja.objects.get(usuario=cajero, estado='ABIERTO')
+
+    Venta.objects.create(usuario=cajero, metodo_pago='EFECTIVO', total_final=Decimal('30.00'),
+                         monto_recibido=Decimal('50.00'), cambio=Decimal('20.00'))
+    Venta.objects.create(usuario=cajero, metodo_pago='TARJETA', total_final=Decimal('45.00'))
+    Venta.objects.create(usuario=cajero, metodo_pago='TRANSFERENCIA', total_final=Decimal('5.00'))
+
+    turno.refresh_from_db()
+    assert turno.num_ventas == 3
+    assert turno.total_efectivo == Decimal('30.00')
+    assert turno.total_tarjeta == Decimal('45.00')
+    assert turno.total_transferencia == Decimal('5.00')
+    assert turno.efectivo_esperado == Decimal('130.00')
+    assert Venta.objects.filter(turno=turno).count() == 3
+
+    resp = client.post(reverse('turno_cerrar'), {'efectivo_contado': '125'})
+    assert resp.status_code == 302
+    turno.refresh_from_db()
+    assert turno.estado == 'CERRADO'
+    assert turno.diferencia == Decimal('-5.00')
+
+    # El reporte de cierre lee la fila del turno, sin recorrer las ventas
+    resp = client.get(reverse('turno_detalle', args=[turno.id]))
+    assert resp.status_code == 200
+    assert 'faltante' in resp.content.decode('utf-8')
+
+    # Las ventas posteriores al cierre no se asignan al turno cerrado
+    venta = Venta.objects.create(usuario=cajero, metodo_pago='EFECTIVO', total_final=Decimal('1.00'))
+    assert venta.turno_id is None
+
+
+@pytest.mark.django_db
+def test_only_one_open_turno_per_user(client):
+    cajero = User.objects.create_user(username='caja2', email='caja2@test.com', password='p', rol='CAJERO')
+    client.force_login(cajero)
+    client.post(reverse('turno_caja'), {'monto_inicial': '0'})
+    client.post(reverse('turno_caja'), {'monto_inicial': '0'})
+    assert TurnoCaja.objects.filter(usuario=cajero, estado='ABIERTO').count() == 1
+
+    otro = User.objects.create_user(username='caja3', email='caja3@test.com', password='p', rol='CAJERO')
+    client.force_login(otro)
+    turno = TurnoCaja.objects.get(usuario=cajero)
+    resp = client.get(reverse('turno_detalle', args=[turno.id]))
+    assert resp.status_code == 302
+
+
+@pytest.mark.django_db
+def test_doble_envio_al_abrir_turno_no_falla(client, monkeypatch):
+    cajero = User.objects.create_user(username='caja4', email='caja4@test.com', password='p', rol='CAJERO')
+    client.force_login(cajero)
+    abierto = TurnoCaja.objects.create(usuario=cajero, monto_inicial=Decimal('0'))
+
+    # La otra pestaña abrió el turno después de la comprobación de la vista
+    original = TurnoCaja.abierto_de.__func__
+    llamadas = []
+
+    def abierto_de(cls, usuario):
+        llamadas.append(usuario)
+        return None if len(llamadas) == 1 else original(cls, usuario)
+    monkeypatch.setattr(TurnoCaja, 'abierto_de', classmethod(abierto_de))
+
+    resp = client.post(reverse('turno_caja'), {'monto_inicial': '10'})
+    assert resp.status_code == 302
+    assert [str(m) for m in get_messages(resp.wsgi_request)] == [f'Ya tienes abierto el turno #{abierto.id}.']
+    assert TurnoCaja.objects.filter(usuario=cajero, estado='ABIERTO').count() == 1
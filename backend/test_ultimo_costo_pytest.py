@@ -0,0 +1,37 @@
+import pytest
+from decimal import Decimal
+from django.urls import reverse
+
+from accounts.models import User
+from inventario.models import Producto, Proveedor
+from compras.models import Compra, UltimoCostoProveedor
+
+
+@pytest.mark.django_db
+def test_ultimo_costo_se_actualiza_por_proveedor(client, django_assert_max_num_queries):
+    admin = User.objects.create_user(username='uc1', email='uc1@test.com', password='p', rol='ADMIN')
+    client.force_login(admin)
+    prov_a = Proveedor.objects.create(nombre='A', telefono='t', direccion='d', correo='uca@test.com')
+    prov_b = Proveedor.objects.create(nombre='B', telefono='t', direccion='d', correo='ucb@test.com')
+    p = Producto.objects.create(codigo=5401, nombre='Harina', stock=0, precio_compra=Decimal('1'), precio_venta=Decimal('2'))
+    otro = Producto.objects.create(codigo=5402, nombre='Sal', stock=0, precio_compra=Decimal('1'), precio_venta=Decimal('2'))
+
+    Compra.registrar(prov_a.id, [{'producto_id': p.id, 'cantidad': 1, 'precio': Decimal('3.00')}])
+    ultima = Compra.registrar(prov_a.id, [{'producto_id': p.id, 'cantidad': 1, 'precio': Decimal('3.50')}])
+    Compra.registrar(prov_b.id, [{'producto_id': p.id, 'cantidad': 1, 'precio': Decimal('9.00')}])
+
+    fila = UltimoCostoProveedor.objects.get(proveedor=prov_a, producto=p)
+    assert fila.costo == Decimal('3.50') and fila.compra_id == ultima.id
+    assert UltimoCostoProveedor.objects.count() == 2
+
+    url = reverse('compras_api_productos')
+    with django_assert_max_num_queries(4):
+        data = client.get(url, {'proveedor': prov_a.id, 'q': 'harina'}).json()
+    assert data[0]['ultimo_costo'] == '3.50'
+
+    data = client.get(url, {'proveedor': prov_a.id, 'con_costo': '1'}).json()
+    assert [d['id'] for d in data] == [p.id]
+    sin_costo = client.get(url, {'proveedor': prov_b.id, 'q': 'sal'}).json()
+    assert sin_costo[0]['id'] == otro.id and sin_costo[0]['ultimo_costo'] is None
+    # Sin proveedor la respuesta conserva su forma original
+    assert 'ultimo_costo' not in client.get(url).json()[0]
@@ -0,0 +1,121 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import User
+from accounts import sesion
+
+
+def _consultas_usuario(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get(url)
+    return resp, [q['sql'] for q in ctx.captured_queries if 'accounts_user' in q['sql']]
+
+
+@pytest.fixture(autouse=True)
+def cache_compartida(settings, tmp_path):
+    # Las copias en sesión solo se usan con una caché compartida entre procesos
+    settings.CACHES = {
+        **settings.CACHES,
+        'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': str(tmp_path)},
+    }
+
+
+@pytest.fixture
+def cajero(client):
+    cache.clear()
+    user = User.objects.create_user(username='ses_caj', email='ses_caj@test.com', password='p', rol='CAJERO')
+    client.force_login(user)
+    return user
+
+
+@pytest.mark.django_db
+def test_peticiones_autenticadas_no_consultan_usuarios(client, cajero):
+    # La copia se guarda al iniciar sesión
+    assert client.session[sesion.CLAVE_SESION]['rol'] == 'CAJERO'
+
+    for _ in range(2):
+        resp, consultas = _consultas_usuario(client, reverse('home'))
+        assert resp['Location'] == '/ventas/crear/'
+        assert consultas == []
+
+
+@pytest.mark.django_db
+def test_usuario_desactivado_rechazado_de_inmediato(client, cajero):
+    client.get(reverse('home'))
+
+    cajero.is_active = False
+    cajero.save()
+
+    resp = client.get(reverse('home'))
+    assert resp.status_code == 302
+    assert resp['Location'].startswith(reverse('login'))
+
+
+@pytest.mark.django_db
+def test_cambio_de_rol_aplica_de_inmediato(client):
+    cache.clear()
+    admin = User.objects.create_user(username='ses_adm', email='ses_adm@test.com', password='p', rol='ADMIN')
+    client.force_login(admin)
+    assert client.get(reverse('usuarios_lista')).status_code == 200
+
+    admin.rol = 'CAJERO'
+    admin.save(update_fields=['rol'])
+
+    resp = client.get(reverse('usuarios_lista'))
+    assert resp.status_code == 302
+    assert client.get(reverse('home'))['Location'] == '/ventas/crear/'
+
+
+@pytest.mark.django_db
+def test_usuario_borrado_y_cambio_de_password_cierran_sesion(client, cajero):
+    client.get(reverse('home'))
+    cajero.set_password('nueva')
+    cajero.save()
+    assert client.get(reverse('home'))['Location'].startswith(reverse('login'))
+
+    client.force_login(cajero)
+    client.get(reverse('home'))
+    User.objects.filter(pk=cajero.pk).delete()
+    assert client.get(reverse('home'))['Location'].startswith(reverse('login'))
+
+
+@pytest.mark.django_db
+def test_sin_version_en_cache_vuelve_a_la_bd(client, cajero):
+    client.get(reverse('home'))
+    copia = client.session[sesion.CLAVE_SESION]
+
+    cache.clear()
+    resp, consultas = _consultas_usuario(client, reverse('home'))
+    assert resp['Location'] == '/ventas/crear/'
+    assert len(consultas) == 1
+    assert client.session[sesion.CLAVE_SESION]['version'] != copia['version']
+
+    # El último login no invalida la copia
+    User.objects.get(pk=cajero.pk).save(update_fields=['last_login'])
+    _, consultas = _consultas_usuario(client, reverse('home'))
+    assert consultas == []
+
+
+@pytest.mark.django_db
+def test_con_locmem_no_usa_copias(client, settings):
+    settings.CACHES = {
+        **settings.CACHES,
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'ses-locmem'},
+    }
+    assert not sesion.compartida()
+    user = User.objects.create_user(username='ses_loc', email='ses_loc@test.com', password='p', rol='CAJERO')
+    client.force_login(user)
+    assert sesion.CLAVE_SESION not in client.session
+
+    resp, consultas = _consultas_usuario(client, reverse('home'))
+    assert resp['Location'] == '/ventas/crear/'
+    assert len(consultas) == 1
+    assert sesion.CLAVE_SESION not in client.session
+
+    # Otro worker desactiva al usuario: sin versión compartida que invalidar,
+    # el rechazo llega porque cada petición lee la BD
+    User.objects.filter(pk=user.pk).update(is_active=False)
+    assert client.get(reverse('home'))['Location'].startswith(reverse('login'))
@@ -0,0 +1,77 @@
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from ventas.models import Venta
+
+
+@pytest.fixture
+def admin(db):
+    return User.objects.create_user(username='ul_admin', email='ul_admin@test.com', password='p', rol='ADMIN')
+
+
+def _venta(usuario, total, dias=0):
+    venta = Venta.objects.create(usuario=usuario, metodo_pago='TARJETA', total_final=Decimal(total))
+    if dias:
+        Venta.objects.filter(pk=venta.pk).update(fecha=timezone.now() - timedelta(days=dias))
+    return venta
+
+
+@pytest.mark.django_db
+def test_actividad_sin_n_mas_1(client, admin, django_assert_max_num_queries):
+    cajeros = [
+        User.objects.create_user(username=f'ul_caj{i}', email=f'ul_caj{i}@test.com', password='p', rol='CAJERO')
+        for i in range(5)
+    ]
+    _venta(cajeros[0], '10.00')
+    _venta(cajeros[0], '5.50', dias=3)
+    _venta(cajeros[0], '100.00', dias=45)
+    ultima_vieja = _venta(cajeros[1], '7.00', dias=60)
+
+    client.force_login(admin)
+    with django_assert_max_num_queries(4):
+        resp = client.get(reverse('usuarios_lista'))
+    assert resp.status_code == 200
+
+    filas = {u.username: u for u in resp.context['usuarios']}
+    assert filas['ul_caj0'].ventas_30d == 2
+    assert filas['ul_caj0'].total_30d == Decimal('15.50')
+    assert filas['ul_caj1'].ventas_30d == 0
+    assert filas['ul_caj1'].total_30d == 0
+    assert abs(filas['ul_caj1'].ultima_venta - Venta.objects.get(pk=ultima_vieja.pk).fecha) < timedelta(seconds=1)
+    assert filas['ul_caj2'].ultima_venta is None
+
+
+@pytest.mark.django_db
+def test_busqueda_y_rol(client, admin):
+    User.objects.create_user(username='maria', email='maria@tienda.com', password='p', rol='CAJERO')
+    User.objects.create_user(username='pedro', email='pedro@otra.com', password='p', rol='CAJERO')
+    client.force_login(admin)
+
+    resp = client.get(reverse('usuarios_lista'), {'q': 'TIENDA'})
+    assert [u.username for u in resp.context['usuarios']] == ['maria']
+
+    resp = client.get(reverse('usuarios_lista'), {'rol': 'ADMIN'})
+    assert [u.username for u in resp.context['usuarios']] == ['ul_admin']
+
+
+@pytest.mark.django_db
+def test_paginacion_por_clave(client, admin):
+    User.objects.bulk_create([
+        User(username=f'ul_bulk{i}', email=f'ul_bulk{i}@test.com', rol='CAJERO') for i in range(60)
+    ])
+    client.force_login(admin)
+
+    resp = client.get(reverse('usuarios_lista'), {'rol': 'CAJERO'})
+    primera = resp.context['usuarios']
+    assert len(primera) == 50
+    assert resp.context['siguiente_url']
+
+    resp = client.get(reverse('usuarios_lista') + resp.context['siguiente_url'])
+    segunda = resp.context['usuarios']
+    assert len(segunda) == 10
+    assert resp.context['siguiente_url'] is None
+    assert {u.pk for u in primera}.isdisjoint(u.pk for u in segunda)
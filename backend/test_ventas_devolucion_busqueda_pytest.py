@@ -0,0 +1,95 @@
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.test import RequestFactory
+from django.urls import reverse
+
+from accounts.models import User
+from inventario.models import Producto
+from ventas.models import Venta, DetalleVenta
+from mytienda.paginacion import paginar, codificar_cursor, urls_paginacion
+
+
+def _ventas(usuario, n, email=None):
+    base = datetime(2025, 3, 1, 12, 0)
+    ventas = []
+    for i in range(n):
+        v = Venta.objects.create(usuario=usuario, metodo_pago='EFECTIVO', email_cliente=email)
+        # Varias ventas comparten fecha para probar el desempate por id
+        Venta.objects.filter(pk=v.pk).update(fecha=base + timedelta(hours=i // 3))
+        ventas.append(v)
+    return ventas
+
+
+@pytest.mark.django_db
+def test_paginar_recorre_todo_sin_repetir():
+    u = User.objects.create_user(username='bk1', email='bk1@test.com', password='p', rol='ADMIN')
+    _ventas(u, 23)
+    vistos, cursor = [], None
+    while True:
+        filas, cursor = paginar(Venta.objects.all(), cursor, tamano=5)
+        vistos.extend(v.id for v in filas)
+        if not cursor:
+            break
+    esperado = list(Venta.objects.order_by('-fecha', '-id').values_list('id', flat=True))
+    assert vistos == esperado
+
+
+@pytest.mark.django_db
+def test_cursor_invalido_es_primera_pagina():
+    u = User.objects.create_user(username='bk2', email='bk2@test.com', password='p', rol='ADMIN')
+    _ventas(u, 3)
+    filas, _ = paginar(Venta.objects.all(), 'no-es-un-cursor', tamano=5)
+    assert len(filas) == 3
+
+
+def test_urls_paginacion_conservan_filtros():
+    inicio = RequestFactory().get('/x/', {'email': 'a@b.com'})
+    assert urls_paginacion(inicio, 'abc') == ('?email=a%40b.com&cursor=abc', None)
+
+    medio = RequestFactory().get('/x/', {'email': 'a@b.com', 'cursor': 'abc'})
+    assert urls_paginacion(medio, None) == (None, '?email=a%40b.com')
+
+
+@pytest.mark.django_db
+def test_busqueda_por_email_codigo_e_id(client):
+    u = User.objects.create_user(username='bk3', email='bk3@test.com', password='p', rol='ADMIN')
+    client.force_login(u)
+    _ventas(u, 4)
+    [con_email] = _ventas(u, 1, email='Cliente@Correo.com')
+    p = Producto.objects.create(codigo=9911, nombre='Buscado', stock=5,
+                                precio_compra=Decimal('1'), precio_venta=Decimal('2'))
+    DetalleVenta.objects.create(venta=con_email, producto=p, cantidad=1,
+                                precio_unitario=Decimal('2'), subtotal=Decimal('2'))
+    url = reverse('ventas_for_devoluciones')
+
+    for params in ({'email': 'cliente@correo.COM'}, {'codigo': '9911'}, {'venta_id': str(con_email.id)}):
+        resp = client.get(url, params)
+        assert [v.id for v in resp.context['ventas']] == [con_email.id]
+
+    assert list(client.get(url, {'venta_id': 'abc'}).context['ventas']) == []
+
+
+@pytest.mark.django_db
+def test_cajero_solo_ve_sus_ventas_y_pagina_por_cursor(client, django_assert_max_num_queries):
+    cajero = User.objects.create_user(username='bk4', email='bk4@test.com', password='p', rol='CAJERO')
+    otro = User.objects.create_user(username='bk5', email='bk5@test.com', password='p', rol='CAJERO')
+    propias = _ventas(cajero, 60)
+    _ventas(otro, 5)
+    client.force_login(cajero)
+    url = reverse('ventas_for_devoluciones')
+
+    resp = client.get(url)
+    primera = [v.id for v in resp.context['ventas']]
+    assert len(primera) == 50
+    assert resp.context['siguiente_url']
+
+    with django_assert_max_num_queries(6):
+        resp = client.get(url + resp.context['siguiente_url'])
+    segunda = [v.id for v in resp.context['ventas']]
+    assert len(segunda) == 10 and resp.context['siguiente_url'] is None
+    assert set(primera + segunda) == {v.id for v in propias}
+
+    ultima = Venta.objects.get(pk=propias[0].pk)
+    resp = client.get(url, {'cursor': codificar_cursor(ultima.fecha, ultima.pk)})
+    assert list(resp.context['ventas']) == []
@@ -0,0 +1,65 @@
+"""
+API JSON del punto de venta bajo /api/ para el cliente React.
+
+Autentica con el JWT sin consultar la tabla de usuarios (el rol viaja como
+claim, ver accounts.serializers.TokenConRolSerializer) y, al estar bajo
+API_PREFIX, no carga ni guarda sesión. Las vistas de DRF no aplican CSRF
+con autenticación por token.
+"""
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+
+from mytienda.accesos import permiso_area
+from .models import Venta
+from .serializers import VentaCajaSerializer
+from .views import buscar_productos, enviar_factura_email
+
+CENTAVO = Decimal('0.01')
+
+
+class CajaAPIView(APIView):
+    authentication_classes = [JWTStatelessUserAuthentication]
+    permission_classes = [permiso_area('caja')]
+
+
+class ProductoBusquedaAPI(CajaAPIView):
+    """GET /api/productos/buscar/?q=..."""
+
+    def get(self, request):
+        return Response(buscar_productos(request.query_params.get('q', '')))
+
+
+class VentaCrearAPI(CajaAPIView):
+    """POST /api/ventas/ con {items: [{producto_id, cantidad}], metodo_pago, monto_recibido, ...}"""
+
+    def post(self, request):
+        serializer = VentaCajaSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+        try:
+            venta = Venta.registrar(
+                request.user.id,
+                [(item['producto_id'], item['cantidad']) for item in datos['items']],
+                descuento=datos['descuento_general'],
+                metodo_pago=datos['metodo_pago'],
+                monto_recibido=datos['monto_recibido'],
+                email_cliente=datos.get('email_cliente'),
+            )
+        except ValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+        enviar_factura_email(venta)
+        return Response(
+            {
+                'id': venta.id,
+                # Con los mismos 2 decimales que se guardan en la BD
+                'total_final': str(venta.total_final.quantize(CENTAVO)),
+                'cambio': str(venta.cambio.quantize(CENTAVO)),
+            },
+            status=status.HTTP_201_CREATED,
+        )
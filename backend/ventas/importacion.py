@@ -0,0 +1,271 @@
+"""
+Importación masiva de ventas históricas (migración desde otro POS).
+
+Formatos aceptados:
+
+- CSV: una fila por línea de venta, con encabezado. Las filas de un mismo
+  ticket deben ir seguidas. Columnas: ``ticket, fecha, producto_codigo,
+  cantidad, precio_unitario`` y opcionales ``producto_nombre, cajero,
+  metodo_pago, email_cliente, descuento_general, iva_porcentaje``.
+- JSONL: un objeto por venta con ``ticket, fecha, lineas`` (lista de
+  ``{codigo, nombre, cantidad, precio_unitario}``) y los mismos opcionales.
+
+``fecha`` va en ISO 8601. ``cajero`` es el email del usuario. Las ventas se
+insertan con bulk_create por lotes; los contadores derivados (resumen diario,
+costos) se reconstruyen una sola vez al final.
+
+El ``ticket`` se guarda en ``Venta.ticket_origen`` y los tickets que ya están
+en la base se omiten: si un lote falla, los anteriores quedan guardados y basta
+con corregir el archivo y volver a importarlo completo.
+"""
+import csv
+import json
+import time
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import User
+from inventario.models import Producto, Inventario
+from .models import Venta, DetalleVenta
+
+METODOS = {m for m, _ in Venta.METODOS_PAGO}
+
+
+class ErrorImportacion(ValueError):
+    """Fila o venta inválida; el mensaje indica el ticket."""
+
+
+def leer_csv(archivo):
+    """Agrupa las filas consecutivas de cada ticket en una venta."""
+    actual = None
+    for fila in csv.DictReader(archivo):
+        ticket = (fila.get('ticket') or '').strip()
+        if actual is None or ticket != actual['ticket']:
+            if actual is not None:
+                yield actual
+            actual = {
+                'ticket': ticket,
+                'fecha': fila.get('fecha'),
+                'cajero': fila.get('cajero'),
+                'metodo_pago': fila.get('metodo_pago'),
+                'email_cliente': fila.get('email_cliente'),
+                'descuento_general': fila.get('descuento_general'),
+                'iva_porcentaje': fila.get('iva_porcentaje'),
+                'lineas': [],
+            }
+        actual['lineas'].append({
+            'codigo': fila.get('producto_codigo'),
+            'nombre': fila.get('producto_nombre'),
+            'cantidad': fila.get('cantidad'),
+            'precio_unitario': fila.get('precio_unitario'),
+        })
+    if actual is not None:
+        yield actual
+
+
+def leer_jsonl(archivo):
+    for numero, linea in enumerate(archivo, start=1):
+        if linea.strip():
+            try:
+                yield json.loads(linea)
+            except json.JSONDecodeError as e:
+                raise ErrorImportacion(f"Línea {numero}: JSON inválido ({e})")
+
+
+def _decimal(valor, defecto='0'):
+    texto = str(valor).strip() if valor not in (None, '') else defecto
+    return Decimal(texto)
+
+
+def _ticket(datos):
+    return str(datos.get('ticket') or '').strip()[:50]
+
+
+def _fecha(valor, ticket):
+    try:
+        # None si el formato no es ISO; ValueError si la fecha no existe (mes 13, día 32)
+        fecha = parse_datetime(str(valor or '').strip())
+    except ValueError:
+        fecha = None
+    if fecha is None:
+        raise ErrorImportacion(f"Ticket {ticket}: fecha inválida {valor!r}")
+    if timezone.is_naive(fecha) and timezone.is_aware(timezone.now()):
+        fecha = timezone.make_aware(fecha)
+    elif timezone.is_aware(fecha) and timezone.is_naive(timezone.now()):
+        fecha = timezone.make_naive(fecha)
+    return fecha
+
+
+class Importador:
+    """
+    Inserta ventas por lotes. Mantiene en memoria los productos y cajeros ya
+    resueltos, así cada lote hace solo las consultas de lo que no ha visto.
+    """
+
+    def __init__(self, chunk_size=1000, con_inventario=False, progreso=None):
+        self.chunk_size = chunk_size
+        self.con_inventario = con_inventario
+        self.progreso = progreso
+        self.productos = {}
+        self.cajeros = {}
+        self.ventas = 0
+        self.lineas = 0
+        self.omitidas = 0
+        self.segundos = 0.0
+
+    @property
+    def ventas_por_segundo(self):
+        return self.ventas / self.segundos if self.segundos else 0.0
+
+    def importar(self, ventas):
+        inicio = time.perf_counter()
+        lote = []
+        for venta in ventas:
+            lote.append(venta)
+            if len(lote) >= self.chunk_size:
+                self._insertar(lote)
+                lote = []
+        if lote:
+            self._insertar(lote)
+        self.segundos = time.perf_counter() - inicio
+        return self.ventas
+
+    def reconstruir_derivados(self):
+        """Recalcula lo que bulk_create no mantiene: resumen diario y costos."""
+        from reportes.models import VentaProductoDia
+        VentaProductoDia.reconstruir()
+        if self.con_inventario:
+            Producto.reconstruir_costos()
+
+    def _resolver(self, lote):
+        codigos = {
+            int(l['codigo'])
+            for v in lote for l in v.get('lineas') or []
+            if str(l.get('codigo') or '').strip().isdigit()
+        } - self.productos.keys()
+        if codigos:
+            self.productos.update(Producto.objects.in_bulk(codigos, field_name='codigo'))
+        emails = {(v.get('cajero') or '').strip().lower() for v in lote} - {''} - self.cajeros.keys()
+        if emails:
+            encontrados = {
+                email.lower(): pk
+                for pk, email in User.objects.filter(email__in=emails).values_list('id', 'email')
+            }
+            for email in emails:
+                self.cajeros[email] = encontrados.get(email)
+
+    def _preparar(self, datos):
+        ticket = datos.get('ticket', '?')
+        lineas = datos.get('lineas') or []
+        if not lineas:
+            raise ErrorImportacion(f"Ticket {ticket}: sin líneas")
+        try:
+            detalles = []
+            total = Decimal('0')
+            for l in lineas:
+                cantidad = int(l['cantidad'])
+                if cantidad <= 0:
+                    raise ValueError(f"cantidad {cantidad} no es positiva")
+                precio = _decimal(l['precio_unitario'])
+                codigo = str(l.get('codigo') or '').strip()
+                producto = self.productos.get(int(codigo)) if codigo.isdigit() else None
+                subtotal = precio * cantidad
+                total += subtotal
+                detalles.append(DetalleVenta(
+                    producto=producto,
+                    producto_codigo=codigo,
+                    producto_nombre=(l.get('nombre') or (producto.nombre if producto else ''))[:200],
+                    cantidad=cantidad,
+                    precio_unitario=precio,
+                    subtotal=subtotal,
+                    costo_unitario=producto.costo_vigente if producto else 0,
+                ))
+            descuento = _decimal(datos.get('descuento_general'))
+            iva_porcentaje = _decimal(datos.get('iva_porcentaje'), '19')
+        except (KeyError, TypeError, ValueError, ArithmeticError) as e:
+            raise ErrorImportacion(f"Ticket {ticket}: línea inválida ({e})")
+
+        metodo = (datos.get('metodo_pago') or 'EFECTIVO').strip().upper()
+        if metodo not in METODOS:
+            raise ErrorImportacion(f"Ticket {ticket}: método de pago desconocido {metodo!r}")
+        iva_total = (total - descuento) * iva_porcentaje / 100
+        total_final = total - descuento + iva_total
+        venta = Venta(
+            fecha=_fecha(datos.get('fecha'), ticket),
+            total=total,
+            descuento_general=descuento,
+            iva_porcentaje=iva_porcentaje,
+            iva_total=iva_total,
+            total_final=total_final,
+            metodo_pago=metodo,
+            # Solo el efectivo trae monto recibido; tarjeta/transferencia no cuentan como caja
+            monto_recibido=total_final if metodo == 'EFECTIVO' else Decimal('0'),
+            usuario_id=self.cajeros.get((datos.get('cajero') or '').strip().lower()),
+            email_cliente=(datos.get('email_cliente') or None),
+            ticket_origen=_ticket(datos),
+        )
+        return venta, detalles
+
+    def _pendientes(self, lote):
+        """Ventas del lote cuyo ticket no está en la base ni repetido antes en el lote."""
+        tickets = {_ticket(datos) for datos in lote} - {''}
+        vistos = set(
+            Venta.objects.filter(ticket_origen__in=tickets).values_list('ticket_origen', flat=True)
+        ) if tickets else set()
+        pendientes = []
+        for datos in lote:
+            ticket = _ticket(datos)
+            if ticket in vistos:
+                self.omitidas += 1
+                continue
+            if ticket:
+                vistos.add(ticket)
+            pendientes.append(datos)
+        return pendientes
+
+    def _insertar(self, lote):
+        lote = self._pendientes(lote)
+        if not lote:
+            return
+        self._resolver(lote)
+        preparadas = [self._preparar(datos) for datos in lote]
+
+        with transaction.atomic():
+            ventas = Venta.objects.bulk_create([venta for venta, _ in preparadas], batch_size=self.chunk_size)
+            detalles = []
+            for venta, lineas in preparadas:
+                for d in lineas:
+                    d.venta = venta
+                    detalles.append(d)
+            DetalleVenta.objects.bulk_create(detalles, batch_size=self.chunk_size)
+
+            if self.con_inventario:
+                fechas = {venta.id: venta.fecha for venta in ventas}
+                movimientos = {}
+                for venta, lineas in preparadas:
+                    for d in lineas:
+                        if d.producto_id:
+                            clave = (venta.id, d.producto_id)
+                            movimientos[clave] = movimientos.get(clave, 0) + d.cantidad
+                Inventario.objects.bulk_create(
+                    [
+                        Inventario(
+                            producto_id=producto_id,
+                            tipo='SALIDA',
+                            cantidad=cantidad,
+                            numero_referencia=f"IMP-{venta_id}-{producto_id}",
+                            fecha=fechas[venta_id],
+                        )
+                        for (venta_id, producto_id), cantidad in movimientos.items()
+                    ],
+                    batch_size=self.chunk_size,
+                )
+                Producto.aplicar_salidas([(pid, cantidad) for (_, pid), cantidad in movimientos.items()])
+
+        self.ventas += len(ventas)
+        self.lineas += len(detalles)
+        if self.progreso:
+            self.progreso(self)
@@ -0,0 +1,79 @@
+"""
+Benchmark del costo por petición de la búsqueda y el cobro del punto de venta:
+rutas con sesión (/ventas/...) contra las rutas /api/ con JWT sin sesión.
+Todo corre dentro de una transacción que se revierte al final, así que el
+comando no deja datos en la base.
+Uso: python manage.py bench_api --peticiones=200
+"""
+
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import User
+from accounts.serializers import TokenConRolSerializer
+from inventario.models import Producto
+
+
+class Command(BaseCommand):
+    help = 'Compara ms y consultas por petición entre las rutas con sesión y las rutas /api/ con JWT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=200, help='Peticiones por escenario (default: 200)')
+
+    def _medir(self, n, peticion):
+        tiempos, consultas = [], []
+        for _ in range(n):
+            with CaptureQueriesContext(connection) as ctx:
+                inicio = time.perf_counter()
+                resp = peticion()
+                tiempos.append(time.perf_counter() - inicio)
+            assert resp.status_code < 400, (resp.status_code, resp.content[:300])
+            consultas.append(len(ctx))
+        tiempos.sort()
+        return tiempos[len(tiempos) // 2] * 1000, sum(consultas) / len(consultas)
+
+    # La factura por correo es parte del cobro, pero sin salir a un SMTP real
+    @override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    def handle(self, *args, **options):
+        n = options['peticiones']
+        base = 910_000_000
+
+        with transaction.atomic():
+            cajero = User.objects.create_user(
+                username='bench_api', email='bench-api@example.com', password='-', rol='CAJERO'
+            )
+            Producto.objects.bulk_create([
+                Producto(codigo=base + i, nombre=f'Bench API {i}', stock=n * 10,
+                         precio_compra=Decimal('1'), precio_venta=Decimal('2'))
+                for i in range(50)
+            ])
+            producto = Producto.objects.get(codigo=base)
+
+            sesion = Client()
+            sesion.force_login(cajero)
+            api = Client(HTTP_AUTHORIZATION=f'Bearer {TokenConRolSerializer.get_token(cajero).access_token}')
+
+            escenarios = [
+                ('búsqueda  sesión', lambda: sesion.get(reverse('ventas_productos_search'), {'q': 'bench'})),
+                ('búsqueda  JWT   ', lambda: api.get(reverse('api_caja_productos_buscar'), {'q': 'bench'})),
+                ('cobro     sesión', lambda: sesion.post(reverse('venta_crear'), {
+                    f'prod_{producto.id}': '1', 'metodo_pago': 'TARJETA',
+                })),
+                ('cobro     JWT   ', lambda: api.post(reverse('api_caja_venta_crear'), {
+                    'items': [{'producto_id': producto.id, 'cantidad': 1}], 'metodo_pago': 'TARJETA',
+                }, content_type='application/json')),
+            ]
+            resultados = [(nombre, *self._medir(n, peticion)) for nombre, peticion in escenarios]
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'{n} peticiones por escenario en {connection.vendor}')
+        for nombre, mediana, consultas in resultados:
+            self.stdout.write(f'  {nombre}  mediana: {mediana:.2f} ms   consultas/petición: {consultas:.1f}')
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark terminado'))
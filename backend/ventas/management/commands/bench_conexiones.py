@@ -0,0 +1,81 @@
+"""
+Benchmark de peticiones por segundo en la búsqueda de productos de caja con
+una conexión nueva por petición y con conexiones persistentes (y con el pool
+del driver si DB_CONEXIONES=pool). Las peticiones pasan por el WSGIHandler
+real, así que al terminar cada una Django cierra o reutiliza la conexión
+igual que en producción. Solo lee: no escribe nada en la base.
+Medirlo contra PostgreSQL; con SQLite abrir una conexión casi no cuesta.
+Uso: python manage.py bench_conexiones --peticiones=500 --q=arroz
+"""
+
+import time
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+from django.urls import reverse
+
+from accounts.models import User
+from accounts.serializers import TokenConRolSerializer
+from mytienda import conexiones
+
+
+class Command(BaseCommand):
+    help = 'Compara peticiones/s de la búsqueda de caja con y sin reutilizar conexiones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=500, help='Peticiones por modo (default: 500)')
+        parser.add_argument('--q', default='a', help='Texto a buscar (default: a)')
+
+    def _medir(self, handler, environ, n):
+        abiertas = []
+        contar = lambda **kwargs: abiertas.append(1)
+        connection_created.connect(contar)
+        try:
+            inicio = time.perf_counter()
+            for _ in range(n):
+                respuesta = handler(dict(environ), lambda status, headers: None)
+                b''.join(respuesta)
+                # close() dispara request_finished: ahí Django cierra o conserva la conexión
+                respuesta.close()
+                assert respuesta.status_code == 200, respuesta.status_code
+            duracion = time.perf_counter() - inicio
+        finally:
+            connection_created.disconnect(contar)
+        return n / duracion, len(abiertas)
+
+    def handle(self, *args, **options):
+        n = options['peticiones']
+        # El token de caja no consulta usuarios: basta un usuario sin guardar
+        cajero = User(id=0, username='bench', email='bench@example.com', rol='CAJERO')
+        token = TokenConRolSerializer.get_token(cajero).access_token
+        environ = RequestFactory().get(
+            reverse('api_caja_productos_buscar'), {'q': options['q']},
+            HTTP_AUTHORIZATION=f'Bearer {token}',
+        ).environ
+        handler = WSGIHandler()
+
+        original = dict(connection.settings_dict)
+        modos = ['nueva', 'persistente']
+        if original.get('OPTIONS', {}).get('pool'):
+            modos.append('pool')
+
+        resultados = []
+        try:
+            for modo in modos:
+                connection.close()
+                if modo != 'pool':
+                    connection.settings_dict.update(conexiones.configurar(original, modo))
+                self._medir(handler, environ, min(n, 20))  # calentar
+                resultados.append((modo, *self._medir(handler, environ, n)))
+        finally:
+            connection.close()
+            connection.settings_dict.clear()
+            connection.settings_dict.update(original)
+
+        self.stdout.write(f'{n} búsquedas por modo en {connection.vendor}')
+        for modo, rps, abiertas in resultados:
+            self.stdout.write(f'  {modo:<12} {rps:8.1f} peticiones/s   conexiones abiertas: {abiertas}')
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark terminado'))
@@ -0,0 +1,96 @@
+"""
+Benchmark del costo de sesión por cobro en caja con los motores de sesión
+'db' y 'cached_db'. Por cada motor registra N ventas con el formulario de
+venta y cuenta las consultas a django_session (lecturas y escrituras), y
+mide aparte una escritura de sesión (lo que cuesta un login o un mensaje
+que no cabe en la cookie).
+Todo corre dentro de una transacción que se revierte al final, así que el
+comando no deja datos en la base.
+Uso: python manage.py bench_sesiones --ventas=200
+"""
+
+import time
+from decimal import Decimal
+from importlib import import_module
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import User
+from inventario.models import Producto
+
+MOTORES = ('db', 'cached_db')
+
+
+class Command(BaseCommand):
+    help = 'Compara el costo de sesión por venta entre SESSION_ENGINE db y cached_db'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ventas', type=int, default=200, help='Ventas por motor (default: 200)')
+
+    def _medir(self, motor, n, cajero, producto):
+        with override_settings(SESSION_ENGINE=f'django.contrib.sessions.backends.{motor}'):
+            # Client nuevo: el middleware toma el motor al cargarse
+            client = Client()
+            client.force_login(cajero)
+            tiempos, lecturas, escrituras = [], 0, 0
+            for _ in range(n):
+                with CaptureQueriesContext(connection) as ctx:
+                    inicio = time.perf_counter()
+                    resp = client.post(reverse('venta_crear'), {
+                        f'prod_{producto.id}': '1', 'metodo_pago': 'TARJETA',
+                    })
+                    tiempos.append(time.perf_counter() - inicio)
+                assert resp.status_code == 302, resp.status_code
+                for q in ctx.captured_queries:
+                    sql = q['sql']
+                    if 'django_session' in sql:
+                        if sql.lstrip().upper().startswith('SELECT'):
+                            lecturas += 1
+                        else:
+                            escrituras += 1
+            tiempos.sort()
+            cobro = tiempos[len(tiempos) // 2] * 1000
+
+            store = import_module(f'django.contrib.sessions.backends.{motor}').SessionStore
+            sesion = store(client.session.session_key)
+            tiempos = []
+            for i in range(n):
+                sesion['_bench'] = i
+                inicio = time.perf_counter()
+                sesion.save()
+                tiempos.append(time.perf_counter() - inicio)
+            tiempos.sort()
+            escritura = tiempos[len(tiempos) // 2] * 1000
+            # La fila se revierte con la transacción; la copia en caché de cached_db no
+            sesion.delete()
+        return cobro, lecturas / n, escrituras / n, escritura
+
+    # La factura por correo es parte del cobro, pero sin salir a un SMTP real
+    @override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    def handle(self, *args, **options):
+        n = options['ventas']
+        resultados = []
+
+        with transaction.atomic():
+            cajero = User.objects.create_user(
+                username='bench_sesiones', email='bench-sesiones@example.com', password='-', rol='CAJERO'
+            )
+            producto = Producto.objects.create(
+                codigo=920_000_000, nombre='Bench sesiones', stock=n * len(MOTORES) + 1,
+                precio_compra=Decimal('1'), precio_venta=Decimal('2'),
+            )
+            for motor in MOTORES:
+                resultados.append((motor, *self._medir(motor, n, cajero, producto)))
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'{n} ventas por motor en {connection.vendor}')
+        for motor, mediana, lecturas, escrituras, escritura in resultados:
+            self.stdout.write(f'  {motor:<10} venta mediana: {mediana:.2f} ms   '
+                              f'django_session por venta: {lecturas:.2f} lecturas, {escrituras:.2f} escrituras   '
+                              f'escritura de sesión: {escritura:.3f} ms')
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark terminado'))
@@ -0,0 +1,72 @@
+"""
+Comando para importar ventas históricas desde otro POS (CSV o JSONL).
+Ver el formato de columnas en ventas/importacion.py.
+Uso: python manage.py importar_ventas ventas.csv --chunk-size=1000 --con-inventario
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ventas.importacion import Importador, ErrorImportacion, leer_csv, leer_jsonl
+
+
+class Command(BaseCommand):
+    help = 'Importa ventas históricas con su fecha original usando inserciones por lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo .csv o .jsonl')
+        parser.add_argument(
+            '--formato',
+            choices=['csv', 'jsonl'],
+            help='Formato del archivo (por defecto se deduce de la extensión)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Ventas insertadas por lote/transacción (default: 1000)'
+        )
+        parser.add_argument(
+            '--con-inventario',
+            action='store_true',
+            help='Generar movimientos SALIDA y descontar stock por cada venta importada'
+        )
+        parser.add_argument(
+            '--sin-reconstruir',
+            action='store_true',
+            help='No recalcular resumen diario ni costos al terminar (útil al importar varios archivos seguidos)'
+        )
+
+    def handle(self, *args, **options):
+        ruta = options['archivo']
+        formato = options['formato'] or ('jsonl' if ruta.endswith(('.jsonl', '.ndjson')) else 'csv')
+        lector = leer_jsonl if formato == 'jsonl' else leer_csv
+
+        def progreso(imp):
+            self.stdout.write(f'  {imp.ventas} ventas / {imp.lineas} líneas importadas...')
+
+        importador = Importador(
+            chunk_size=options['chunk_size'],
+            con_inventario=options['con_inventario'],
+            progreso=progreso if options['verbosity'] > 1 else None,
+        )
+        try:
+            with open(ruta, newline='', encoding='utf-8') as archivo:
+                importador.importar(lector(archivo))
+        except OSError as e:
+            raise CommandError(f'No se pudo leer {ruta}: {e}')
+        except ErrorImportacion as e:
+            raise CommandError(
+                f'{e}. Se conservaron las {importador.ventas} ventas de los lotes anteriores; '
+                'corregir el archivo y volver a importarlo: los tickets ya importados se omiten.'
+            )
+
+        self.stdout.write(
+            f'{importador.ventas} ventas ({importador.lineas} líneas) en {importador.segundos:.1f} s '
+            f'→ {importador.ventas_por_segundo:.0f} ventas/s'
+        )
+        if importador.omitidas:
+            self.stdout.write(f'{importador.omitidas} tickets ya importados omitidos')
+        if not options['sin_reconstruir']:
+            importador.reconstruir_derivados()
+            self.stdout.write('Resumen diario' + (' y costos' if options['con_inventario'] else '') + ' reconstruidos')
+        self.stdout.write(self.style.SUCCESS('✅ Importación terminada'))
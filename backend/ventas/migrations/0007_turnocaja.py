@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0006_fecha_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TurnoCaja',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('ABIERTO', 'Abierto'), ('CERRADO', 'Cerrado')], default='ABIERTO', max_length=10)),
+                ('fecha_apertura', models.DateTimeField(default=django.utils.timezone.now)),
+                ('fecha_cierre', models.DateTimeField(blank=True, null=True)),
+                ('monto_inicial', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('num_ventas', models.IntegerField(default=0)),
+                ('total_efectivo', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('total_tarjeta', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('total_transferencia', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('efectivo_recibido', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('cambio_entregado', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('efectivo_contado', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('observaciones', models.CharField(blank=True, max_length=250)),
+                ('usuario', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='turnos', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='venta',
+            name='turno',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ventas', to='ventas.turnocaja'),
+        ),
+        migrations.AddConstraint(
+            model_name='turnocaja',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado', 'ABIERTO')), fields=('usuario',), name='uniq_turno_abierto_por_usuario'),
+        ),
+    ]
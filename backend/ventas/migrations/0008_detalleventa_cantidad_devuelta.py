@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:39
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_cantidad_devuelta(apps, schema_editor):
+    """Inicializa el contador con la suma de las devoluciones existentes."""
+    DetalleVenta = apps.get_model('ventas', 'DetalleVenta')
+    Devolucion = apps.get_model('devoluciones', 'Devolucion')
+
+    totales = (
+        Devolucion.objects
+        .filter(detalle_venta__isnull=False)
+        .values('detalle_venta_id')
+        .annotate(total=Sum('cantidad'))
+        .order_by('detalle_venta_id')
+    )
+    lote = []
+    for fila in totales.iterator(chunk_size=2000):
+        lote.append(DetalleVenta(id=fila['detalle_venta_id'], cantidad_devuelta=fila['total'] or 0))
+        if len(lote) >= 2000:
+            DetalleVenta.objects.bulk_update(lote, ['cantidad_devuelta'])
+            lote = []
+    if lote:
+        DetalleVenta.objects.bulk_update(lote, ['cantidad_devuelta'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0007_turnocaja'),
+        ('devoluciones', '0002_fecha_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detalleventa',
+            name='cantidad_devuelta',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_cantidad_devuelta, migrations.RunPython.noop),
+    ]
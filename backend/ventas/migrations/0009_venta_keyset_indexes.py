@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:43
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0011_fecha_index'),
+        ('ventas', '0008_detalleventa_cantidad_devuelta'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='detalleventa',
+            index=models.Index(fields=['producto_codigo', 'venta'], name='detalle_codigo_venta_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['fecha', 'id'], name='venta_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['usuario', 'fecha', 'id'], name='venta_usuario_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(django.db.models.functions.text.Lower('email_cliente'), name='venta_email_cliente_idx'),
+        ),
+    ]
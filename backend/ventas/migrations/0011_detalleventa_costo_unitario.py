@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:56
+
+from decimal import Decimal
+
+from django.db import migrations, models, transaction
+from django.db.models import Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, NullIf
+
+CHUNK = 2000
+COSTO = models.DecimalField(max_digits=15, decimal_places=4)
+
+
+def backfill_costo_unitario(apps, schema_editor):
+    """
+    Toma como costo histórico el costo vigente actual del producto (costo
+    promedio o, si aún no tiene, el precio de compra). Se actualiza por rangos
+    de pk, cada uno en su propia transacción, para no bloquear toda la tabla.
+    """
+    DetalleVenta = apps.get_model('ventas', 'DetalleVenta')
+    Producto = apps.get_model('inventario', 'Producto')
+
+    costo = Subquery(
+        Producto.objects
+        .filter(pk=OuterRef('producto_id'))
+        .values(c=Coalesce(NullIf('costo_promedio', Value(Decimal(0))), 'precio_compra', output_field=COSTO))[:1],
+        output_field=COSTO,
+    )
+    ultimo = DetalleVenta.objects.aggregate(m=Max('pk'))['m'] or 0
+    for inicio in range(0, ultimo + 1, CHUNK):
+        with transaction.atomic():
+            (
+                DetalleVenta.objects
+                .filter(pk__gte=inicio, pk__lt=inicio + CHUNK, producto__isnull=False)
+                .update(costo_unitario=Coalesce(costo, Value(Decimal(0)), output_field=COSTO))
+            )
+
+
+class Migration(migrations.Migration):
+    # El backfill hace commit por lote
+    atomic = False
+
+    dependencies = [
+        ('ventas', '0010_venta_fecha_default'),
+        ('inventario', '0012_costo_promedio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detalleventa',
+            name='costo_unitario',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=15),
+        ),
+        migrations.RunPython(backfill_costo_unitario, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0011_detalleventa_costo_unitario'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venta',
+            name='ticket_origen',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddConstraint(
+            model_name='venta',
+            constraint=models.UniqueConstraint(condition=models.Q(('ticket_origen', ''), _negated=True), fields=('ticket_origen',), name='venta_ticket_origen_unico'),
+        ),
+    ]
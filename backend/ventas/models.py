@@ -1,6 +1,105 @@
-from django.db import models
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Lower
 from django.utils import timezone
-from inventario.models import Producto
+from inventario.models import Producto, Inventario
+
+# ===========================
+# TURNO DE CAJA
+# ===========================
+class TurnoCaja(models.Model):
+    """
+    Turno de caja de un cajero. Los totales por método de pago se acumulan
+    al crear cada Venta, así el cierre es una lectura de la fila y no un
+    recorrido de las ventas del turno.
+    """
+    ESTADOS = [
+        ("ABIERTO", "Abierto"),
+        ("CERRADO", "Cerrado"),
+    ]
+
+    # Campo acumulado para cada método de pago de Venta.METODOS_PAGO
+    CAMPOS_METODO = {
+        "EFECTIVO": "total_efectivo",
+        "TARJETA": "total_tarjeta",
+        "TRANSFERENCIA": "total_transferencia",
+    }
+
+    usuario = models.ForeignKey('accounts.User', null=True, on_delete=models.SET_NULL, related_name='turnos')
+    estado = models.CharField(max_length=10, choices=ESTADOS, default="ABIERTO")
+    fecha_apertura = models.DateTimeField(default=timezone.now)
+    fecha_cierre = models.DateTimeField(null=True, blank=True)
+
+    monto_inicial = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+
+    # Acumulados mantenidos por Venta.save
+    num_ventas = models.IntegerField(default=0)
+    total_efectivo = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    total_tarjeta = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    total_transferencia = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    efectivo_recibido = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    cambio_entregado = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+
+    # Arqueo al cerrar
+    efectivo_contado = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    observaciones = models.CharField(max_length=250, blank=True)
+
+    class Meta:
+        constraints = [
+            # Un cajero solo puede tener un turno abierto
+            models.UniqueConstraint(
+                fields=['usuario'],
+                condition=models.Q(estado="ABIERTO"),
+                name='uniq_turno_abierto_por_usuario',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Turno #{self.id} - {self.usuario} ({self.estado})"
+
+    @property
+    def total_vendido(self):
+        return self.total_efectivo + self.total_tarjeta + self.total_transferencia
+
+    @property
+    def efectivo_esperado(self):
+        """Efectivo que debería haber en el cajón: base + recibido - cambio entregado."""
+        return self.monto_inicial + self.efectivo_recibido - self.cambio_entregado
+
+    @property
+    def diferencia(self):
+        """Contado - esperado (negativo = faltante). None mientras no se cierre."""
+        if self.efectivo_contado is None:
+            return None
+        return self.efectivo_contado - self.efectivo_esperado
+
+    @classmethod
+    def abierto_de(cls, usuario):
+        return cls.objects.filter(usuario=usuario, estado="ABIERTO").first()
+
+    @classmethod
+    def registrar_venta(cls, turno_id, venta):
+        """Suma una venta recién creada a los acumulados del turno (un solo UPDATE)."""
+        cambios = {'num_ventas': F('num_ventas') + 1}
+        campo = cls.CAMPOS_METODO.get(venta.metodo_pago)
+        if campo:
+            cambios[campo] = F(campo) + venta.total_final
+        if venta.metodo_pago == "EFECTIVO":
+            cambios['efectivo_recibido'] = F('efectivo_recibido') + venta.monto_recibido
+            cambios['cambio_entregado'] = F('cambio_entregado') + venta.cambio
+        cls.objects.filter(id=turno_id).update(**cambios)
+
+    def cerrar(self, efectivo_contado, observaciones=''):
+        self.refresh_from_db()
+        self.efectivo_contado = efectivo_contado
+        self.observaciones = observaciones
+        self.estado = "CERRADO"
+        self.fecha_cierre = timezone.now()
+        self.save(update_fields=['efectivo_contado', 'observaciones', 'estado', 'fecha_cierre'])
+
 
 # ===========================
 # VENTA
@@ -12,7 +111,8 @@ class Venta(models.Model):
         ("TRANSFERENCIA", "Transferencia"),
     ]
 
-    fecha = models.DateTimeField(auto_now_add=True)
+    # default (no auto_now_add) para poder importar ventas históricas con su fecha original
+    fecha = models.DateTimeField(default=timezone.now, db_index=True)
     total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
 
     # Métodos de pago
@@ -32,9 +132,116 @@ class Venta(models.Model):
     # NUEVO: email del cliente para factura electrónica
     email_cliente = models.EmailField(null=True, blank=True)
 
+    # Turno de caja abierto del cajero al momento de la venta
+    turno = models.ForeignKey(TurnoCaja, null=True, blank=True, on_delete=models.SET_NULL, related_name='ventas')
+
+    # Número de ticket en el POS de origen (ventas importadas); evita importarlas dos veces
+    ticket_origen = models.CharField(max_length=50, blank=True, default='')
+
+    class Meta:
+        indexes = [
+            # Listados paginados por clave (fecha, id), globales y por cajero
+            models.Index(fields=['fecha', 'id'], name='venta_fecha_id_idx'),
+            models.Index(fields=['usuario', 'fecha', 'id'], name='venta_usuario_fecha_idx'),
+            # Búsqueda por email del cliente sin distinguir mayúsculas
+            models.Index(Lower('email_cliente'), name='venta_email_cliente_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['ticket_origen'], condition=~models.Q(ticket_origen=''), name='venta_ticket_origen_unico'
+            ),
+        ]
+
     def __str__(self):
         return f"Venta #{self.id} - ${self.total_final}"
 
+    def save(self, *args, **kwargs):
+        is_new = self.pk is None
+        if is_new and self.turno_id is None and self.usuario_id:
+            self.turno_id = (
+                TurnoCaja.objects
+                .filter(usuario_id=self.usuario_id, estado="ABIERTO")
+                .values_list('id', flat=True)
+                .first()
+            )
+        super().save(*args, **kwargs)
+
+        # Acumular en el turno para que el cierre de caja no recorra las ventas
+        if is_new and self.turno_id:
+            TurnoCaja.registrar_venta(self.turno_id, self)
+
+    @classmethod
+    def registrar(cls, usuario, lineas, descuento=Decimal("0"), metodo_pago="EFECTIVO",
+                  monto_recibido=Decimal("0"), email_cliente=None, iva_porcentaje=Decimal("19")):
+        """
+        Registra una venta completa (cabecera, líneas y salidas de inventario)
+        en una transacción. `lineas` es una lista de (producto_id, cantidad);
+        `usuario` puede ser el User o su id. Lanza ValidationError con el
+        primer problema encontrado, sin dejar nada escrito.
+        """
+        cantidades = {}
+        for producto_id, cantidad in lineas:
+            if cantidad > 0:
+                cantidades[int(producto_id)] = cantidades.get(int(producto_id), 0) + cantidad
+        if not cantidades:
+            raise ValidationError("No seleccionaste productos")
+        if descuento < 0:
+            raise ValidationError("El descuento no puede ser negativo")
+        if monto_recibido < 0:
+            raise ValidationError("El monto recibido no puede ser negativo")
+
+        with transaction.atomic():
+            productos = Producto.objects.select_for_update().in_bulk(sorted(cantidades))
+            items = []
+            total = Decimal("0")
+            for producto_id, cantidad in cantidades.items():
+                producto = productos.get(producto_id)
+                if producto is None:
+                    raise ValidationError("Producto no encontrado.")
+                if cantidad > producto.stock:
+                    raise ValidationError(f"Stock insuficiente para {producto.nombre}. Disponible: {producto.stock}")
+                subtotal = Decimal(str(producto.precio_venta)) * cantidad
+                items.append((producto, cantidad, subtotal))
+                total += subtotal
+
+            total_con_descuento = total - descuento
+            if total_con_descuento < 0:
+                raise ValidationError("El descuento no puede superar el total.")
+            iva_total = total_con_descuento * iva_porcentaje / 100
+            total_final = total_con_descuento + iva_total
+
+            if metodo_pago == "EFECTIVO" and monto_recibido < total_final:
+                raise ValidationError("El monto recibido es menor al total final.")
+            cambio = (monto_recibido - total_final) if metodo_pago == "EFECTIVO" else Decimal("0")
+
+            venta = cls.objects.create(
+                total=total,
+                descuento_general=descuento,
+                iva_porcentaje=iva_porcentaje,
+                iva_total=iva_total,
+                total_final=total_final,
+                metodo_pago=metodo_pago,
+                monto_recibido=monto_recibido,
+                cambio=cambio,
+                usuario_id=getattr(usuario, 'pk', usuario),
+                email_cliente=email_cliente or None,
+            )
+            for producto, cantidad, subtotal in items:
+                DetalleVenta.objects.create(
+                    venta=venta,
+                    producto=producto,
+                    cantidad=cantidad,
+                    precio_unitario=producto.precio_venta,
+                    subtotal=subtotal,
+                )
+                Inventario.objects.create(
+                    producto=producto,
+                    tipo="SALIDA",
+                    cantidad=cantidad,
+                    numero_referencia=f"VENTA-{venta.id}-{producto.id}",
+                )
+        return venta
+
 
 # ===========================
 # DETALLE DE VENTA
@@ -49,16 +256,43 @@ class DetalleVenta(models.Model):
     cantidad = models.IntegerField()
     precio_unitario = models.DecimalField(max_digits=15, decimal_places=2)
     subtotal = models.DecimalField(max_digits=15, decimal_places=2)
+    # Unidades ya devueltas; lo mantiene Devolucion.save
+    cantidad_devuelta = models.IntegerField(default=0)
+    # Costo unitario del producto al momento de la venta (snapshot para el margen)
+    costo_unitario = models.DecimalField(max_digits=15, decimal_places=4, default=0)
+
+    class Meta:
+        indexes = [
+            # Buscar las ventas que incluyen un código de producto
+            models.Index(fields=['producto_codigo', 'venta'], name='detalle_codigo_venta_idx'),
+        ]
+
+    @property
+    def max_devolvible(self):
+        return max(0, self.cantidad - self.cantidad_devuelta)
+
+    @property
+    def margen(self):
+        """Margen bruto de las unidades no devueltas."""
+        return (self.cantidad - self.cantidad_devuelta) * (self.precio_unitario - self.costo_unitario)
 
     def save(self, *args, **kwargs):
+        is_new = self.pk is None
         # Si hay un producto relacionado y no hay snapshot, rellenarlo automáticamente
         if self.producto:
             if not self.producto_nombre:
                 self.producto_nombre = self.producto.nombre
             if not self.producto_codigo:
                 self.producto_codigo = str(self.producto.codigo)
+            if is_new and not self.costo_unitario:
+                self.costo_unitario = self.producto.costo_vigente
         super().save(*args, **kwargs)
 
+        # Mantener el resumen diario por producto usado por los reportes
+        if is_new:
+            from reportes.models import VentaProductoDia
+            VentaProductoDia.registrar_detalle(self)
+
     def __str__(self):
         nombre = self.producto.nombre if self.producto else self.producto_nombre
         return f"{nombre} x {self.cantidad}"
@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from rest_framework import serializers
 from .models import Venta, DetalleVenta
 from inventario.serializers import ProductoSerializer
@@ -90,3 +92,24 @@ class VentaCrearSerializer(serializers.Serializer):
         if not value:
             raise serializers.ValidationError("Debe agregar al menos un producto")
         return value
+
+
+# ===========================
+# CAJA: POST /api/ventas/
+# ===========================
+class LineaVentaSerializer(serializers.Serializer):
+    producto_id = serializers.IntegerField()
+    cantidad = serializers.IntegerField(min_value=1)
+
+
+class VentaCajaSerializer(serializers.Serializer):
+    """Cuerpo de POST /api/ventas/; la validación de stock y totales la hace Venta.registrar."""
+    items = LineaVentaSerializer(many=True, allow_empty=False)
+    metodo_pago = serializers.ChoiceField(choices=Venta.METODOS_PAGO, default="EFECTIVO")
+    monto_recibido = serializers.DecimalField(
+        max_digits=15, decimal_places=2, min_value=Decimal("0"), default=Decimal("0")
+    )
+    descuento_general = serializers.DecimalField(
+        max_digits=15, decimal_places=2, min_value=Decimal("0"), default=Decimal("0")
+    )
+    email_cliente = serializers.EmailField(required=False, allow_blank=True, allow_null=True)
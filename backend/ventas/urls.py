@@ -4,7 +4,10 @@ from .views import (
     
     # Vistas de ventas
     venta_lista, venta_crear, venta_detalle, venta_factura_pdf, mis_ventas,
-    producto_json,productos_search_json# <-- ¡AÑADIDA mis_ventas al import!
+    producto_json,productos_search_json,# <-- ¡AÑADIDA mis_ventas al import!
+
+    # Turno de caja
+    turno_caja, turno_cerrar, turno_detalle,
 )
 
 # Inicialización de router si se usa (aunque no se usa en este ejemplo, se mantiene la estructura)
@@ -25,4 +28,9 @@ urlpatterns = [
      path('api/productos-search/', productos_search_json, name='ventas_productos_search'),
     path('api/producto/<int:producto_id>/', producto_json, name='ventas_producto_json'),
 
+    # Turno de caja (apertura, cierre y reporte de cierre)
+    path('turno/', turno_caja, name='turno_caja'),
+    path('turno/cerrar/', turno_cerrar, name='turno_cerrar'),
+    path('turno/<int:turno_id>/', turno_detalle, name='turno_detalle'),
+
 ]
\ No newline at end of file
@@ -1,7 +1,7 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import HttpResponse, HttpResponseForbidden
-from django.contrib.auth.decorators import login_required, user_passes_test
-from .models import Venta, DetalleVenta
+from django.contrib.auth.decorators import login_required
+from .models import Venta, DetalleVenta, TurnoCaja
 from inventario.models import Producto, Inventario
 from django.http import JsonResponse  # opcional, si se planea usar viewsets aquí
 from django.utils.decorators import method_decorator
@@ -10,12 +10,18 @@ from decimal import Decimal
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from django.contrib import messages
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from django.core.mail import EmailMessage
 from django.conf import settings
 from io import BytesIO
 
 # Importación de la función de chequeo de Admin/Cajero (aunque usaremos lambda)
-from accounts.views import es_admin, es_cajero  # Importar las funciones (aunque se usa lambda)
+from mytienda.accesos import requiere
+from mytienda import cacheado
+
+# Segundos que se conserva en caché el PDF de una factura
+FACTURA_TTL = 60 * 60 * 24
 
 
 # ==================== FUNCIÓN AUXILIAR: GENERAR Y ENVIAR FACTURA ====================
@@ -69,6 +75,14 @@ def generar_pdf_factura(venta):
     return pdf_data
 
 
+def factura_pdf(venta):
+    """PDF de la factura, cacheado un día (se invalida si cambian nombres del catálogo)."""
+    return cacheado.obtener(
+        ('factura', venta.id), lambda: generar_pdf_factura(venta),
+        timeout=FACTURA_TTL, etiquetas=('catalogo',),
+    )
+
+
 def enviar_factura_email(venta):
     """Envía la factura por email al cliente"""
     try:
@@ -80,7 +94,7 @@ def enviar_factura_email(venta):
             return False
         
         # Generar PDF
-        pdf_data = generar_pdf_factura(venta)
+        pdf_data = factura_pdf(venta)
         
         # Crear email
         asunto = f"📄 Factura de Venta #{venta.id} - Stock Master"
@@ -138,8 +152,7 @@ Stock Master
 
 # ==================== VENTAS ====================
 
-@login_required(login_url='login')
-@user_passes_test(lambda u: u.rol in ["ADMIN", "CAJERO"], login_url='login')
+@requiere('caja')
 def venta_lista(request):
     """
     Mostrar listado de ventas.
@@ -157,120 +170,52 @@ def venta_lista(request):
     return render(request, 'inventario/venta_lista.html', {'ventas': ventas})
 
 
-@login_required(login_url='login')
-@user_passes_test(lambda u: u.rol in ["ADMIN", "CAJERO"], login_url='login')
+@requiere('caja')
 def venta_crear(request):
     """Crear nueva venta (Solo ADMIN/CAJERO)."""
 
     if request.method == 'POST':
-        items = []
-        total = Decimal("0")
+        lineas = []
 
         # Detectar productos dinámicamente
         for key in request.POST:
             if key.startswith("prod_"):
-                prod_id = key.split("_")[1]
                 valor = request.POST[key]
 
                 if valor.strip() == "":
                     continue
 
                 try:
-                    cantidad = int(valor)
+                    lineas.append((int(key.split("_")[1]), int(valor)))
                 except ValueError:
                     messages.error(request, "La cantidad debe ser un número entero válido.")
                     return redirect('venta_crear')
 
-                if cantidad <= 0:
-                    continue
-
-                try:
-                    producto = Producto.objects.get(id=prod_id)
-                except Producto.DoesNotExist:
-                    messages.error(request, "Producto no encontrado.")
-                    return redirect('venta_crear')
-
-                if cantidad > producto.stock:
-                    messages.error(request, f"Stock insuficiente para {producto.nombre}. Disponible: {producto.stock}")
-                    return redirect('venta_crear')
-
-                subtotal = Decimal(str(producto.precio_venta)) * cantidad
-                items.append((producto, cantidad, subtotal))
-                total += subtotal
-
-        if not items:
-            messages.error(request, "No seleccionaste productos")
-            return redirect('venta_crear')
-
-        # Descuento general
-        descuento_str = request.POST.get("descuento_general", "").strip()
+        # Descuento general y monto recibido
         try:
-            descuento = Decimal(descuento_str if descuento_str else "0")
+            descuento = Decimal(request.POST.get("descuento_general", "").strip() or "0")
         except:
             messages.error(request, "El descuento no es un valor válido.")
             return redirect('venta_crear')
-
-        total_con_descuento = total - descuento
-
-        if total_con_descuento < 0:
-            messages.error(request, "El descuento no puede superar el total.")
-            return redirect('venta_crear')
-
-        # IVA
-        iva_porcentaje = Decimal("19")
-        iva_total = total_con_descuento * iva_porcentaje / 100
-
-        # Total final
-        total_final = total_con_descuento + iva_total
-
-        # Método de pago
-        metodo_pago = request.POST.get("metodo_pago")
-        monto_str = request.POST.get("monto_recibido", "").strip()
         try:
-            monto_recibido = Decimal(monto_str if monto_str else "0")
+            monto_recibido = Decimal(request.POST.get("monto_recibido", "").strip() or "0")
         except:
             messages.error(request, "El monto recibido no es un valor válido.")
             return redirect('venta_crear')
 
-        if metodo_pago == "EFECTIVO" and monto_recibido < total_final:
-            messages.error(request, "El monto recibido es menor al total final.")
-            return redirect('venta_crear')
-
-        cambio = (monto_recibido - total_final) if metodo_pago == "EFECTIVO" else Decimal("0")
-
-        # Capturar correo del cliente
-        email_cliente = request.POST.get("email_cliente")
-
-        # Crear venta
-        venta = Venta.objects.create(
-            total=total,
-            descuento_general=descuento,
-            iva_porcentaje=iva_porcentaje,
-            iva_total=iva_total,
-            total_final=total_final,
-            metodo_pago=metodo_pago,
-            monto_recibido=monto_recibido,
-            cambio=cambio,
-            usuario=request.user,
-            email_cliente=email_cliente  # ⬅️ nuevo
-        )
-
-        # Guardar detalles + descontar stock
-        for producto, cantidad, subtotal in items:
-            DetalleVenta.objects.create(
-                venta=venta,
-                producto=producto,
-                cantidad=cantidad,
-                precio_unitario=producto.precio_venta,
-                subtotal=subtotal
-            )
-
-            Inventario.objects.create(
-                producto=producto,
-                tipo="SALIDA",
-                cantidad=cantidad,
-                numero_referencia=f"VENTA-{venta.id}-{producto.id}"
+        # Validación de stock, totales, IVA y registro (ver Venta.registrar)
+        try:
+            venta = Venta.registrar(
+                request.user,
+                lineas,
+                descuento=descuento,
+                metodo_pago=request.POST.get("metodo_pago"),
+                monto_recibido=monto_recibido,
+                email_cliente=request.POST.get("email_cliente"),
             )
+        except ValidationError as e:
+            messages.error(request, e.messages[0])
+            return redirect('venta_crear')
 
         messages.success(request, f"Venta #{venta.id} registrada correctamente")
         
@@ -283,8 +228,7 @@ def venta_crear(request):
     return render(request, 'inventario/venta_crear.html')
 
 
-@login_required(login_url='login')
-@user_passes_test(lambda u: u.rol in ["ADMIN", "CAJERO"], login_url='login')
+@requiere('caja')
 def venta_detalle(request, venta_id):
     """Ver detalle de una venta, solo si es de ADMIN o si es su propia venta."""
     # ✅ OPTIMIZACIÓN: prefetch_related para detalles y productos evita N+1 queries
@@ -305,21 +249,108 @@ def venta_detalle(request, venta_id):
 
 # ==================== FACTURA PDF ====================
 
-@login_required(login_url='login')
-@user_passes_test(lambda u: u.rol in ["ADMIN", "CAJERO"], login_url='login')
+@requiere('caja')
 def venta_factura_pdf(request, venta_id):
     venta = get_object_or_404(Venta, id=venta_id)
 
     if request.user.rol != "ADMIN" and venta.usuario != request.user:
         return HttpResponseForbidden("No tienes permiso para ver esta factura.")
 
-    pdf_data = generar_pdf_factura(venta)
+    pdf_data = factura_pdf(venta)
 
     response = HttpResponse(pdf_data, content_type="application/pdf")
     response['Content-Disposition'] = f'inline; filename="factura_{venta.id}.pdf"'
     return response
 
 
+# ==================== TURNO DE CAJA ====================
+
+@requiere('caja')
+def turno_caja(request):
+    """
+    Turno de caja del usuario actual.
+    GET muestra el turno abierto (o el formulario para abrir uno).
+    POST abre un turno nuevo con el monto inicial del cajón.
+    """
+    turno = TurnoCaja.abierto_de(request.user)
+
+    if request.method == 'POST':
+        if turno:
+            messages.error(request, f"Ya tienes abierto el turno #{turno.id}.")
+            return redirect('turno_caja')
+
+        monto_str = request.POST.get('monto_inicial', '').strip()
+        try:
+            monto_inicial = Decimal(monto_str if monto_str else "0")
+        except:
+            messages.error(request, "El monto inicial no es un valor válido.")
+            return redirect('turno_caja')
+
+        if monto_inicial < 0:
+            messages.error(request, "El monto inicial no puede ser negativo.")
+            return redirect('turno_caja')
+
+        try:
+            with transaction.atomic():
+                turno = TurnoCaja.objects.create(usuario=request.user, monto_inicial=monto_inicial)
+        except IntegrityError:
+            # Doble envío u otra pestaña: la restricción de un turno abierto por usuario lo rechaza
+            turno = TurnoCaja.abierto_de(request.user)
+            messages.error(request, f"Ya tienes abierto el turno #{turno.id}." if turno else "Ya tienes un turno abierto.")
+            return redirect('turno_caja')
+        messages.success(request, f"Turno #{turno.id} abierto")
+        return redirect('turno_caja')
+
+    if request.user.rol == "ADMIN":
+        cerrados = TurnoCaja.objects.filter(estado="CERRADO").select_related('usuario')
+    else:
+        cerrados = TurnoCaja.objects.filter(estado="CERRADO", usuario=request.user)
+
+    return render(request, 'ventas/turno_caja.html', {
+        'turno': turno,
+        'cerrados': cerrados.order_by('-fecha_cierre')[:20],
+    })
+
+
+@requiere('caja')
+def turno_cerrar(request):
+    """Cierra el turno abierto registrando el efectivo contado en el cajón."""
+    turno = TurnoCaja.abierto_de(request.user)
+    if not turno:
+        messages.error(request, "No tienes un turno abierto.")
+        return redirect('turno_caja')
+
+    if request.method != 'POST':
+        return redirect('turno_caja')
+
+    contado_str = request.POST.get('efectivo_contado', '').strip()
+    try:
+        efectivo_contado = Decimal(contado_str)
+    except:
+        messages.error(request, "El efectivo contado no es un valor válido.")
+        return redirect('turno_caja')
+
+    if efectivo_contado < 0:
+        messages.error(request, "El efectivo contado no puede ser negativo.")
+        return redirect('turno_caja')
+
+    turno.cerrar(efectivo_contado, request.POST.get('observaciones', '').strip())
+    messages.success(request, f"Turno #{turno.id} cerrado")
+    return redirect('turno_detalle', turno_id=turno.id)
+
+
+@requiere('caja')
+def turno_detalle(request, turno_id):
+    """Reporte de cierre: totales por método de pago y efectivo contado vs esperado."""
+    turno = get_object_or_404(TurnoCaja.objects.select_related('usuario'), id=turno_id)
+
+    if request.user.rol != "ADMIN" and turno.usuario_id != request.user.id:
+        messages.error(request, "No tienes permiso para ver este turno.")
+        return redirect('turno_caja')
+
+    return render(request, 'ventas/turno_detalle.html', {'turno': turno})
+
+
 # ==================== MIS VENTAS ====================
 
 @login_required
@@ -329,17 +360,9 @@ def mis_ventas(request):
 
 
 
-#mimimiim
-@login_required(login_url='login')
-@user_passes_test(lambda u: u.rol in ["ADMIN", "CAJERO"], login_url='login')
-@require_GET
-def productos_search_json(request):
-    """
-    GET /ventas/api/productos-search/?q=...
-    Devuelve JSON con lista de productos activos que coinciden por nombre o código.
-    Limita a 30 resultados.
-    """
-    q = request.GET.get('q', '').strip()
+def buscar_productos(q, limite=30):
+    """Productos activos que coinciden por nombre o código (compartido con la API JWT)."""
+    q = q.strip()
     productos = Producto.objects.filter(activo=True)
 
     if q:
@@ -349,9 +372,7 @@ def productos_search_json(request):
         else:
             productos = productos.filter(nombre__icontains=q)
 
-    productos = productos.order_by('nombre')[:30]
-
-    data = [
+    return [
         {
             'id': p.id,
             'nombre': p.nombre,
@@ -359,13 +380,22 @@ def productos_search_json(request):
             'precio_venta': float(p.precio_venta),
             'stock': p.stock,
         }
-        for p in productos
+        for p in productos.order_by('nombre')[:limite]
     ]
-    return JsonResponse(data, safe=False)
 
 
-@login_required(login_url='login')
-@user_passes_test(lambda u: u.rol in ["ADMIN", "CAJERO"], login_url='login')
+@requiere('caja')
+@require_GET
+def productos_search_json(request):
+    """
+    GET /ventas/api/productos-search/?q=...
+    Devuelve JSON con lista de productos activos que coinciden por nombre o código.
+    Limita a 30 resultados.
+    """
+    return JsonResponse(buscar_productos(request.GET.get('q', '')), safe=False)
+
+
+@requiere('caja')
 @require_GET
 def producto_json(request, producto_id):
     """